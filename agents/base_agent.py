@@ -1,65 +1,209 @@
 from __future__ import annotations
 
 import json
+import time
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, AsyncIterator, Awaitable, Mapping, TypeVar
+
+from pydantic import BaseModel, ValidationError
 
 from models import IncidentContext
-from utils.llm_client import LLMClient
-from utils.logger import log
+from utils.deadline import run_with_deadline
+from utils.json_repair import repair_json
+from utils.llm_client import FieldCallback, LLMClient
+from utils.logger import emit, log
+from utils.prompt_encoding import PromptEncoder
+
+T = TypeVar("T")
 
 
 class BaseAgent(ABC):
     name: str = "BASE"
 
-    def __init__(self, llm: LLMClient, tools: dict[str, Any]) -> None:
+    # IncidentContext fields consumed by analyze() and produced by it. The
+    # orchestrator derives its dependency graph from these declarations, so
+    # an agent only waits on the upstream agents whose output it reads.
+    reads: tuple[str, ...] = ()
+    writes: tuple[str, ...] = ()
+
+    # Critical-path agents opt in to hedged LLM requests (see LLMClient)
+    hedge: bool = False
+
+    # Reply fields worth surfacing before the whole reply has arrived, as
+    # paths like "headline" or "probable_root_causes[0]". When set, the LLM
+    # reply is streamed and each field lands in ctx.early_fields on completion.
+    stream_fields: tuple[str, ...] = ()
+
+    def __init__(self, llm: LLMClient, tools: Mapping[str, Any]) -> None:
         self.llm = llm
         self.tools = tools
+        # Reply handling outcomes across every incident this agent has served
+        self.json_stats = {"calls": 0, "repaired": 0, "retried": 0, "failed": 0}
 
-    @abstractmethod
     async def run(self, ctx: IncidentContext) -> None:
-        """Execute the agent's work, writing results into ctx."""
+        """Execute the agent's work end to end, writing results into ctx."""
+        evidence = await self.gather(ctx)
+        await self.analyze(ctx, evidence)
+
+    async def gather(self, ctx: IncidentContext) -> dict[str, Any]:
+        """Fetch tool evidence. Must only depend on ctx.alert so it can start immediately."""
+        return {}
+
+    @abstractmethod
+    async def analyze(self, ctx: IncidentContext, evidence: dict[str, Any]) -> None:
+        """Reason over the gathered evidence and upstream ctx fields, writing results into ctx."""
         ...
 
-    async def _call_llm(self, system_prompt: str, user_prompt: str) -> dict[str, Any]:
-        """Call the LLM and parse JSON response, with one retry on parse failure."""
-        raw = await self.llm.complete(system_prompt, user_prompt, self.name)
-        result, ok = self._try_parse_json(raw)
-        if ok:
-            self._log("JSON parse succeeded")
+    async def _call_llm(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        cache_prefix: str = "",
+        ctx: IncidentContext | None = None,
+        output_model: type[BaseModel] | None = None,
+        call_name: str | None = None,
+    ) -> dict[str, Any]:
+        """Call the LLM and return its JSON reply, validated against output_model.
+
+        A malformed reply is repaired locally first; the prompt is only
+        re-sent when repair fails or the result does not fit output_model.
+        cache_prefix is sent ahead of user_prompt and marked cacheable; pass
+        the parts of the prompt that are identical across calls. Pass ctx to
+        have the agent's stream_fields published as they arrive. call_name
+        replaces the agent name for routing, latency and usage accounting, so
+        an agent making several kinds of call can account for each separately.
+        """
+        name = call_name or self.name
+        on_field = self._field_reporter(ctx) if ctx is not None and self.stream_fields else None
+        schema = output_model.model_json_schema() if output_model is not None else None
+        self.json_stats["calls"] += 1
+        raw = await self.llm.complete(
+            system_prompt,
+            user_prompt,
+            name,
+            hedge=self.hedge,
+            cache_prefix=cache_prefix,
+            on_field=on_field,
+            output_schema=schema,
+        )
+        result, problem = self._parse_reply(raw, output_model)
+        if result is not None:
             return result
 
-        # First attempt failed — retry with a corrective prefix
-        self._log("JSON parse failed — retrying with correction prompt")
+        # Last resort — retry with a corrective suffix, leaving the cached
+        # prefix untouched so the retry still reads it from the cache
+        self.json_stats["retried"] += 1
+        self._log(f"{problem} — retrying with correction prompt")
         retry_user = (
-            "Your previous response was not valid JSON. "
-            "Return ONLY valid JSON with no markdown fences, no explanation:\n\n"
-            + user_prompt
+            user_prompt
+            + f"\n\nYour previous response was unusable ({problem}). "
+            "Return ONLY valid JSON matching the schema, with no markdown fences, no explanation."
+        )
+        raw2 = await self.llm.complete(
+            system_prompt,
+            retry_user,
+            name,
+            hedge=self.hedge,
+            cache_prefix=cache_prefix,
+            on_field=on_field,
+            output_schema=schema,
         )
-        raw2 = await self.llm.complete(system_prompt, retry_user, self.name)
-        result2, ok2 = self._try_parse_json(raw2)
-        if ok2:
+        result2, problem2 = self._parse_reply(raw2, output_model)
+        if result2 is not None:
             self._log("JSON parse succeeded on retry")
             return result2
 
+        self.json_stats["failed"] += 1
         raise RuntimeError(
-            f"[{self.name}] JSON parse failed on both attempts. "
+            f"[{name}] JSON parse failed on both attempts ({problem2}). "
             f"Last raw response:\n{raw2}"
         )
 
-    @staticmethod
-    def _try_parse_json(raw: str) -> tuple[dict[str, Any], bool]:
-        """Strip markdown fences and try json.loads. Returns (result, success)."""
-        cleaned = raw.strip()
-        # Remove optional ```json ... ``` fences
-        if cleaned.startswith("```"):
-            lines = cleaned.splitlines()
-            # Drop first line (```json or ```) and last line (```)
-            cleaned = "\n".join(lines[1:-1]).strip()
+    def _parse_reply(
+        self, raw: str, output_model: type[BaseModel] | None
+    ) -> tuple[dict[str, Any] | None, str]:
+        """Parse (repairing if needed) and validate a reply. Returns (result, problem)."""
         try:
-            return json.loads(cleaned), True
+            result, repairs = json.loads(raw), []
         except json.JSONDecodeError:
-            return {}, False
+            try:
+                result, repairs = repair_json(raw)
+            except ValueError as exc:
+                return None, f"JSON parse failed, not repairable: {exc}"
+
+        if output_model is not None:
+            try:
+                output_model.model_validate(result)
+            except ValidationError as exc:
+                return None, (
+                    f"JSON does not match {output_model.__name__} "
+                    f"({exc.error_count()} errors, first: {exc.errors()[0]['loc']})"
+                )
+        elif not isinstance(result, dict):
+            return None, "JSON reply is not an object"
+
+        if repairs:
+            self.json_stats["repaired"] += 1
+            self._log(f"JSON repaired locally ({', '.join(repairs)}) — no retry needed")
+        else:
+            self._log("JSON parse succeeded")
+        return result, ""
+
+    def _field_reporter(self, ctx: IncidentContext) -> FieldCallback:
+        """on_field callback publishing this agent's stream_fields into ctx."""
+        started = time.perf_counter()
+
+        def report(path: str, value: Any) -> None:
+            if path in self.stream_fields:
+                self._publish_field(
+                    ctx, path, value, f"streamed after {time.perf_counter() - started:.2f}s"
+                )
+
+        return report
+
+    def _publish_field(self, ctx: IncidentContext, path: str, value: Any, origin: str) -> None:
+        """Store a key field in ctx.early_fields and emit it, once per incident."""
+        key = f"{self.name}.{path}"
+        # Hedged requests and the parse retry can report a field again
+        if key in ctx.early_fields:
+            return
+        ctx.early_fields[key] = value
+        preview = json.dumps(value, ensure_ascii=False)
+        if len(preview) > 100:
+            preview = preview[:97] + "..."
+        self._log(f"⚡ {path} {origin}: {preview}")
+        emit("agent_field", {"agent": self.name, "field": path, "value": value})
+
+    @staticmethod
+    def _alert_prefix(
+        ctx: IncidentContext, enc: PromptEncoder, heading: str = "INCIDENT ALERT"
+    ) -> str:
+        """Serialized alert block that opens every agent's user prompt."""
+        return f"{heading}:\n{enc.encode(ctx.alert)}\n\n"
+
+    def _record_encoding(self, ctx: IncidentContext, enc: PromptEncoder) -> None:
+        """Log and store how much the compact prompt encoding saved."""
+        stats = enc.stats()
+        ctx.prompt_encoding[self.name] = stats
+        before, after = stats["before_tokens"], stats["after_tokens"]
+        saved = 1 - after / before if before else 0.0
+        self._log(f"Prompt encoding: ~{before:,} → ~{after:,} tokens ({saved:.0%} smaller)")
+
+    async def _tool(self, call: Awaitable[T], label: str) -> T:
+        """Await a tool call within the current agent/incident deadline."""
+        return await run_with_deadline(call, f"{self.name} {label}")
+
+    async def _tool_stream(self, pages: AsyncIterator[T], label: str) -> AsyncIterator[T]:
+        """Iterate a paginated tool call, each page fetch bounded by the current deadline."""
+        try:
+            while True:
+                try:
+                    page = await run_with_deadline(pages.__anext__(), f"{self.name} {label}")
+                except StopAsyncIteration:
+                    return
+                yield page
+        finally:
+            await pages.aclose()
 
     def _log(self, message: str) -> None:
         log(self.name, message)
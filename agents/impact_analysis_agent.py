@@ -1,15 +1,20 @@
 from __future__ import annotations
 
-import json
+from typing import Any, Mapping
 
 from agents.base_agent import BaseAgent
 from models import ImpactAnalysisOutput, IncidentContext
+from utils.llm_client import LLMClient
+from utils.prompt_encoding import PromptEncoder
+from utils.service_graph import ServiceGraph, process_service_graph
+from utils.traces import TraceIndex
 
 _SYSTEM_PROMPT = """\
 You are an Impact Analysis agent for production incidents.
 
-Given an alert, service metrics, and distributed traces, determine:
-- Which downstream services are in the blast radius (list ALL services experiencing degradation)
+Given an alert, service metrics, distributed traces, and the blast radius computed from the
+service dependency graph, determine:
+- Which services are in the blast radius (the computed blast radius is fact — use it as given)
 - Which customer segments are affected and how severely
 - Estimated number of users impacted right now (make a data-driven estimate)
 - Revenue impact per minute (make a reasonable estimate based on the service criticality)
@@ -31,18 +36,33 @@ Respond ONLY with valid JSON that exactly matches this schema — no markdown, n
 """
 
 
+# Span tag marking a request that waited on an exhausted DB connection pool
+_POOL_EXHAUSTED = ("hikaricp.pool_status", "pool_exhausted")
+
+
 class ImpactAnalysisAgent(BaseAgent):
     name = "IMPACT"
+    writes = ("impact_analysis",)
 
-    async def run(self, ctx: IncidentContext) -> None:
+    def __init__(
+        self, llm: LLMClient, tools: Mapping[str, Any], graph: ServiceGraph | None = None
+    ) -> None:
+        super().__init__(llm, tools)
+        # Process-wide by default: every incident's traces extend the shared topology
+        self.graph = graph if graph is not None else process_service_graph
+
+    async def gather(self, ctx: IncidentContext) -> dict[str, Any]:
         self._log("Starting impact analysis")
 
         dynatrace = self.tools["dynatrace"]
+        pagerduty = self.tools["pagerduty"]
         services = ctx.alert.affected_services
 
         # ── Tool call 1: service metrics ───────────────────────────────────
         self._log(f"[TOOL] dynatrace.get_service_metrics({services})")
-        metrics = await dynatrace.get_service_metrics(services)
+        metrics = await self._tool(
+            dynatrace.get_service_metrics(services), "dynatrace.get_service_metrics"
+        )
 
         # Log the key signals for each service
         for svc, m in metrics.items():
@@ -54,36 +74,93 @@ class ImpactAnalysisAgent(BaseAgent):
 
         # ── Tool call 2: distributed traces ───────────────────────────────
         self._log(f"[TOOL] dynatrace.get_distributed_traces({services})")
-        traces = await dynatrace.get_distributed_traces(services)
-        self._log(f"  ↳ Retrieved {len(traces)} traces")
-
-        # Surface the smoking-gun span for visibility
-        for trace in traces:
-            for span in trace.get("spans", []):
+        traces = await self._tool(
+            dynatrace.get_distributed_traces(services), "dynatrace.get_distributed_traces"
+        )
+        index = TraceIndex()
+        index.add_all(traces)
+        self._log(f"  ↳ Retrieved {len(traces)} traces across {len(index.services())} services")
+
+        summary = index.summary(flag_tags=[_POOL_EXHAUSTED])
+
+        # Surface the smoking-gun spans for visibility: the count, then the
+        # slowest few the prompt also gets
+        flagged = summary.get("flagged_spans", {}).get("=".join(_POOL_EXHAUSTED))
+        if flagged:
+            self._log(f"  ↳ ⚠ {flagged['count']} spans blocked on pool_exhausted")
+            for span in flagged["examples"]:
                 tags = span.get("tags", {})
-                if tags.get("hikaricp.pool_status") == "pool_exhausted":
-                    self._log(
-                        f"  ↳ ⚠ TRACE {trace['trace_id']} span {span['span_id']}: "
-                        f"{span['service']} blocked {tags.get('hikaricp.connection_wait_ms', '?')}ms "
-                        f"on pool_exhausted (max={tags.get('hikaricp.pool_size_max', tags.get('hikaricp.pool', '?'))})"
-                    )
+                self._log(
+                    f"  ↳ ⚠ TRACE {span['trace_id']} span {span['span_id']}: "
+                    f"{span['service']} blocked {tags.get('hikaricp.connection_wait_ms', '?')}ms "
+                    f"on pool_exhausted (max={tags.get('hikaricp.pool_size_max', tags.get('hikaricp.pool', '?'))})"
+                )
+        for service, stats in list(summary["per_service"].items())[:3]:
+            self._log(
+                f"  ↳ critical path: {service} {stats['critical_path_share']:.0%} "
+                f"(self time {stats['self_time_ms']}ms over {stats['spans']} spans)"
+            )
 
+        # ── Dependency graph: blast radius as fact ────────────────────────
+        new_edges = self.graph.add_traces(traces)
+        radius = self.graph.blast_radius(services)
+        self._log(
+            f"  ↳ Dependency graph: {len(self.graph)} services, {self.graph.edge_count} calls "
+            f"(+{new_edges} new) — blast radius {len(radius)} services"
+        )
+        unowned = [service for service in radius if service not in self.graph.owners]
+        if unowned:
+            self._log(f"[TOOL] pagerduty.get_service_ownership({len(unowned)} services)")
+            ownership = await self._tool(
+                pagerduty.get_service_ownership(unowned), "pagerduty.get_service_ownership"
+            )
+            self.graph.add_ownership(ownership)
+        graph = self.graph.summary(services)
+        for hops, ring in graph["blast_radius_by_hops"].items():
+            more = f" (+{len(ring) - 8} more)" if len(ring) > 8 else ""
+            self._log(f"  ↳ {hops} hops: {', '.join(ring[:8])}{more}")
+        # The graph's radius is what the brief reports, so publish it now
+        # rather than waiting for the LLM to restate it
+        if graph["blast_radius"]:
+            self._publish_field(ctx, "blast_radius", graph["blast_radius"], "from the dependency graph")
+
+        return {"metrics": metrics, "traces": summary, "dependency_graph": graph}
+
+    async def analyze(self, ctx: IncidentContext, evidence: dict[str, Any]) -> None:
+        metrics = evidence["metrics"]
+        traces = evidence["traces"]
+        graph = evidence["dependency_graph"]
+
+        enc = PromptEncoder()
+        alert_block = self._alert_prefix(ctx, enc)
         user_prompt = f"""\
-INCIDENT ALERT:
-{ctx.alert.model_dump_json(indent=2)}
-
 SERVICE METRICS (from Dynatrace):
-{json.dumps(metrics, indent=2)}
+{enc.encode(metrics)}
+
+DISTRIBUTED TRACES (from Dynatrace — critical-path summary: per-service share of end-to-end
+latency and self time, the slowest traces' critical paths, and flagged spans):
+{enc.encode(traces)}
 
-DISTRIBUTED TRACES (from Dynatrace):
-{json.dumps(traces, indent=2)}
+BLAST RADIUS (computed from the service dependency graph learned from traces — services calling
+the affected ones directly or transitively, by hop count and owning team; this is fact):
+{enc.encode(graph)}
 
 Perform a full impact analysis. Output ONLY valid JSON matching the schema in your instructions.
 """
 
-        self._log("Sending metrics + traces to LLM for impact analysis")
-        result = await self._call_llm(_SYSTEM_PROMPT, user_prompt)
+        self._log("Sending metrics + trace critical-path summary to LLM for impact analysis")
+        self._record_encoding(ctx, enc)
+        result = await self._call_llm(
+            _SYSTEM_PROMPT,
+            user_prompt,
+            cache_prefix=alert_block,
+            ctx=ctx,
+            output_model=ImpactAnalysisOutput,
+        )
 
+        # The graph's radius is authoritative; the model only explains it
+        if graph["blast_radius"]:
+            result["blast_radius"] = graph["blast_radius"]
         ctx.impact_analysis = ImpactAnalysisOutput(**result)
         ia = ctx.impact_analysis
         self._log(
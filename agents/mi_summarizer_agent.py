@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-import json
+from typing import Any
 
 from agents.base_agent import BaseAgent
 from models import MISummaryOutput, IncidentContext
+from utils.prompt_encoding import PromptEncoder
 
 _SYSTEM_PROMPT = """\
 You are the MI Bridge Summarizer. You are speaking to a live bridge call
@@ -44,21 +45,22 @@ Respond ONLY with valid JSON that exactly matches this schema — no markdown, n
 
 class MISummarizerAgent(BaseAgent):
     name = "SUMMARIZER"
+    hedge = True
+    reads = ("impact_analysis", "similar_incidents")
+    writes = ("mi_summary",)
+    stream_fields = ("headline",)
 
-    async def run(self, ctx: IncidentContext) -> None:
-        self._log("Building MI bridge summary")
-        self._log(
-            f"  ↳ Reading from ctx: "
-            f"impact_analysis={'✓' if ctx.impact_analysis else '✗ (None)'} | "
-            f"similar_incidents={'✓' if ctx.similar_incidents else '✗ (None)'}"
-        )
+    async def gather(self, ctx: IncidentContext) -> dict[str, Any]:
+        self._log("Fetching on-call and ownership data")
 
         pagerduty = self.tools["pagerduty"]
         services = ctx.alert.affected_services
 
         # ── Tool call 1: on-call roster ────────────────────────────────────
         self._log(f"[TOOL] pagerduty.get_oncall_roster({services})")
-        roster = await pagerduty.get_oncall_roster(services)
+        roster = await self._tool(
+            pagerduty.get_oncall_roster(services), "pagerduty.get_oncall_roster"
+        )
         for svc, r in roster.items():
             self._log(
                 f"  ↳ {svc}: oncall={r['oncall_engineer']} "
@@ -67,13 +69,28 @@ class MISummarizerAgent(BaseAgent):
 
         # ── Tool call 2: service ownership ────────────────────────────────
         self._log(f"[TOOL] pagerduty.get_service_ownership({services})")
-        ownership = await pagerduty.get_service_ownership(services)
+        ownership = await self._tool(
+            pagerduty.get_service_ownership(services), "pagerduty.get_service_ownership"
+        )
         for svc, o in ownership.items():
             self._log(
                 f"  ↳ {svc}: channel={o['slack_channel']} | "
                 f"slo_current={o['slo_current_pct']}% (target={o['slo_target_pct']}%)"
             )
 
+        return {"roster": roster, "ownership": ownership}
+
+    async def analyze(self, ctx: IncidentContext, evidence: dict[str, Any]) -> None:
+        roster = evidence["roster"]
+        ownership = evidence["ownership"]
+
+        self._log("Building MI bridge summary")
+        self._log(
+            f"  ↳ Reading from ctx: "
+            f"impact_analysis={'✓' if ctx.impact_analysis else '✗ (None)'} | "
+            f"similar_incidents={'✓' if ctx.similar_incidents else '✗ (None)'}"
+        )
+
         # Log what context Phase 1 provided
         if ctx.impact_analysis:
             ia = ctx.impact_analysis
@@ -88,38 +105,33 @@ class MISummarizerAgent(BaseAgent):
                 f"resolved in {top.resolution_time_minutes}min"
             )
 
-        impact_json = (
-            ctx.impact_analysis.model_dump_json(indent=2)
-            if ctx.impact_analysis
-            else "null"
-        )
-        similar_json = (
-            ctx.similar_incidents.model_dump_json(indent=2)
-            if ctx.similar_incidents
-            else "null"
-        )
-
+        enc = PromptEncoder()
+        alert_block = self._alert_prefix(ctx, enc)
         user_prompt = f"""\
-INCIDENT ALERT:
-{ctx.alert.model_dump_json(indent=2)}
-
 IMPACT ANALYSIS (from ImpactAnalysisAgent):
-{impact_json}
+{enc.encode(ctx.impact_analysis)}
 
 SIMILAR PAST INCIDENTS (from SimilarIncidentAgent):
-{similar_json}
+{enc.encode(ctx.similar_incidents)}
 
 ON-CALL ROSTER (from PagerDuty):
-{json.dumps(roster, indent=2)}
+{enc.encode(roster)}
 
 SERVICE OWNERSHIP (from PagerDuty):
-{json.dumps(ownership, indent=2)}
+{enc.encode(ownership)}
 
 Produce the MI bridge summary. Output ONLY valid JSON matching the schema in your instructions.
 """
 
         self._log("Sending all context to LLM for bridge summary")
-        result = await self._call_llm(_SYSTEM_PROMPT, user_prompt)
+        self._record_encoding(ctx, enc)
+        result = await self._call_llm(
+            _SYSTEM_PROMPT,
+            user_prompt,
+            cache_prefix=alert_block,
+            ctx=ctx,
+            output_model=MISummaryOutput,
+        )
 
         ctx.mi_summary = MISummaryOutput(**result)
         ms = ctx.mi_summary
@@ -1,9 +1,61 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Mapping
+
+from pydantic import BaseModel
 
 from agents.base_agent import BaseAgent
-from models import RCAOutput, IncidentContext
+from models import (
+    CRAuditOutput,
+    HistoryComparisonOutput,
+    IncidentContext,
+    LogAnalysisOutput,
+    RCAOutput,
+)
+from utils.change_index import ChangeRequestIndex, to_epoch
+from utils.llm_client import LLMClient
+from utils.log_aggregation import ErrorLogAggregator
+from utils.logger import emit
+from utils.prompt_encoding import PromptEncoder
+from utils.service_graph import ServiceGraph, process_service_graph
+from utils.signatures import SignatureMatch, match_signatures, provisional_rca
+
+_RCA_SCHEMA = """\
+Respond ONLY with valid JSON that exactly matches this schema — no markdown, no explanation outside the JSON:
+
+{
+  "probable_root_causes": [
+    {
+      "rank": 1,
+      "cause": "<specific description>",
+      "evidence": "<what data supports this>",
+      "confidence_pct": <integer 0-100>
+    }
+  ],
+  "correlated_change_requests": [
+    {
+      "cr_id": "<id>",
+      "service": "<service>",
+      "deployed_at": "<ISO timestamp>",
+      "deployed_by": "<email>",
+      "description": "<what changed>"
+    }
+  ],
+  "recommended_resolution": "<clear recommended fix>",
+  "rollback_candidate": "<cr_id or null>",
+  "remediation_steps": ["<step 1>", "<step 2>", ...],
+  "evidence_trail": [
+    {
+      "source": "<splunk_logs | servicenow_crs | past_incidents | dynatrace_traces>",
+      "query_or_action": "<what was queried or examined>",
+      "finding": "<what was found>"
+    }
+  ]
+}
+"""
 
 _SYSTEM_PROMPT = """\
 You are the Root Cause Analysis (RCA) agent for production incidents.
@@ -13,8 +65,12 @@ and past incident history.
 Follow this reasoning process STEP BY STEP — be explicit in your thinking:
 
 1. CHANGE REQUEST AUDIT
-   - Scan Change Requests deployed within 3 hours of the incident start time.
-   - For each CR touching an affected service, flag it as a SUSPECT.
+   - Change Requests arrive pre-scored: hours_before_onset is how long before the
+     incident started each one deployed, and suspect_score (0-1) combines recency,
+     service proximity (hops from the affected services along their dependencies), the
+     risk of the kind of change and the service's error volume.
+   - Any CR deployed within 3 hours of onset on an affected service or a dependency is a SUSPECT;
+     start from the highest suspect_score but judge each on what it changed.
    - Note what was changed: configuration, code, infrastructure.
 
 2. ERROR LOG ANALYSIS
@@ -26,103 +82,225 @@ Follow this reasoning process STEP BY STEP — be explicit in your thinking:
    - Does the exception class or error pattern match anything a recent CR changed?
    - Example: If logs show "HikariPool timeout" and a CR changed HikariCP config — that is a strong correlation.
 
-4. HISTORICAL COMPARISON
+4. SIGNATURE MATCHES
+   - Deterministic rules may already have matched a known failure signature (a config
+     change plus the exceptions and pool state it typically produces). Treat a match as a
+     hypothesis: confirm it if the evidence holds, refute or re-rank it if it does not.
+
+5. HISTORICAL COMPARISON
    - Has this failure mode appeared in past incidents?
    - If yes, what was the root cause and resolution then?
 
-5. RANK YOUR CAUSES
+6. RANK YOUR CAUSES
    - Rank 1-3 probable causes with evidence for each.
    - If a CR is your #1 cause, set it as rollback_candidate.
 
-6. REMEDIATION
+7. REMEDIATION
    - Provide specific, ordered remediation steps.
    - Cite the rollback procedure if one exists.
 
 For EVERY conclusion, cite the SOURCE (splunk_logs / servicenow_crs / past_incidents / dynatrace_traces)
 and the specific FINDING that supports it.
 
-Respond ONLY with valid JSON that exactly matches this schema — no markdown, no explanation outside the JSON:
+""" + _RCA_SCHEMA
+
+# ─── Map-reduce mode: one focused prompt per kind of evidence, then a synthesis ──
+
+_EVIDENCE_TRAIL_SCHEMA = """\
+  "evidence_trail": [
+    {"source": "<splunk_logs | servicenow_crs | past_incidents | dynatrace_traces>",
+     "query_or_action": "<what was examined>", "finding": "<what was found>"}
+  ]"""
+
+_CHANGES_PROMPT = """\
+You are auditing Change Requests for a production incident's root cause analysis.
+
+CRs arrive pre-scored: hours_before_onset is how long before the incident started each
+deployed, and suspect_score (0-1) combines recency, service proximity, the risk of the
+kind of change and the service's error volume. Signature matches are deterministic rules
+that already paired a config change with the symptoms it typically causes — treat them
+as hypotheses.
+
+Any CR deployed within 3 hours of onset on an affected service or a dependency is a
+suspect. For each suspect say what changed (configuration, code, infrastructure) and why
+it could cause this incident; clear the others with a reason.
+
+Respond ONLY with valid JSON — no markdown:
 
 {
-  "probable_root_causes": [
-    {
-      "rank": 1,
-      "cause": "<specific description>",
-      "evidence": "<what data supports this>",
-      "confidence_pct": <integer 0-100>
-    }
+  "suspects": [
+    {"cr_id": "<id>", "service": "<service>", "deployed_at": "<ISO timestamp>",
+     "deployed_by": "<email>", "what_changed": "<what changed>",
+     "suspicion": "<HIGH | MEDIUM | LOW>", "reason": "<why>"}
   ],
-  "correlated_change_requests": [
-    {
-      "cr_id": "<id>",
-      "service": "<service>",
-      "deployed_at": "<ISO timestamp>",
-      "deployed_by": "<email>",
-      "description": "<what changed>"
-    }
+  "cleared": [{"cr_id": "<id>", "reason": "<why not>"}],
+""" + _EVIDENCE_TRAIL_SCHEMA + "\n}\n"
+
+_LOGS_PROMPT = """\
+You are analysing aggregated error logs for a production incident's root cause analysis.
+
+Identify the dominant failure: which exception classes appear most, what the stack traces
+and message templates point to (connection pools, timeouts, specific libraries), and any
+configuration parameters, pool names or limits visible in the logs.
+
+Respond ONLY with valid JSON — no markdown:
+
+{
+  "dominant_failure": "<one or two sentences>",
+  "exception_patterns": [
+    {"exception_class": "<class>", "count": <integer>, "points_to": "<what it indicates>"}
   ],
-  "recommended_resolution": "<clear recommended fix>",
-  "rollback_candidate": "<cr_id or null>",
-  "remediation_steps": ["<step 1>", "<step 2>", ...],
-  "evidence_trail": [
-    {
-      "source": "<splunk_logs | servicenow_crs | past_incidents | dynatrace_traces>",
-      "query_or_action": "<what was queried or examined>",
-      "finding": "<what was found>"
-    }
-  ]
-}
-"""
+  "config_clues": ["<parameter, pool or limit seen in the logs>", ...],
+""" + _EVIDENCE_TRAIL_SCHEMA + "\n}\n"
+
+_HISTORY_PROMPT = """\
+You are comparing a production incident with past incidents for its root cause analysis.
+
+Has this failure mode appeared before? For each relevant past incident give its root
+cause and resolution and why it is relevant; say what failure mode recurs, if any.
+
+Respond ONLY with valid JSON — no markdown:
+
+{
+  "matches": [
+    {"incident_id": "<id>", "root_cause": "<then>", "resolution": "<then>",
+     "relevance": "<why it matches>"}
+  ],
+  "recurring_failure_mode": "<description or null>",
+""" + _EVIDENCE_TRAIL_SCHEMA + "\n}\n"
+
+_SYNTHESIS_PROMPT = """\
+You are the Root Cause Analysis (RCA) agent for production incidents. Three focused
+sub-analyses have already been run in parallel: a Change Request audit, an error log
+analysis and a historical comparison. Combine them:
+
+1. CROSS-REFERENCE — does the dominant failure in the logs match anything a suspect CR
+   changed? (e.g. HikariPool timeouts and a CR that changed HikariCP config is a strong
+   correlation.) Does a past incident confirm the failure mode and its fix?
+2. RANK YOUR CAUSES — rank 1-3 probable causes with evidence for each. If a CR is your
+   #1 cause, set it as rollback_candidate.
+3. REMEDIATION — specific, ordered steps; cite the rollback procedure if one exists.
+
+Carry the sub-analyses' evidence trails into yours, and cite the SOURCE and FINDING for
+every conclusion.
+
+""" + _RCA_SCHEMA
 
 
 class RCAAgent(BaseAgent):
     name = "RCA"
-
-    async def run(self, ctx: IncidentContext) -> None:
-        self._log("Starting root cause analysis")
-        self._log(
-            f"  ↳ Prior context: "
-            f"impact={'✓' if ctx.impact_analysis else '✗'} | "
-            f"similar={'✓' if ctx.similar_incidents else '✗'} | "
-            f"summary={'✓' if ctx.mi_summary else '✗'}"
-        )
+    hedge = True
+    reads = ("impact_analysis", "similar_incidents", "mi_summary")
+    writes = ("rca",)
+    stream_fields = ("probable_root_causes[0]",)
+    # Splunk entries fetched per request; only one page is held at a time
+    log_page_size = 500
+    # Failure signatures are re-checked every this many log pages, and sooner
+    # when a page brings an exception class not seen before
+    signature_check_pages = 20
+    # Change requests deployed this many hours before onset are considered
+    change_window_hours = 24
+    # Dependencies of the affected services whose CRs are considered, in call hops
+    dependency_hops = 2
+    # Highest-scoring CRs sent to the LLM
+    max_change_requests = 20
+
+    def __init__(
+        self,
+        llm: LLMClient,
+        tools: Mapping[str, Any],
+        graph: ServiceGraph | None = None,
+        map_reduce: bool = False,
+    ) -> None:
+        super().__init__(llm, tools)
+        # Shared with ImpactAnalysisAgent by default; traces either agent fetched count
+        self.graph = graph if graph is not None else process_service_graph
+        # Concurrent per-evidence sub-analyses plus a synthesis call, instead of one prompt
+        self.map_reduce = map_reduce
+
+    async def gather(self, ctx: IncidentContext) -> dict[str, Any]:
+        self._log("Gathering RCA evidence")
 
         splunk = self.tools["splunk"]
         servicenow = self.tools["servicenow"]
         services = ctx.alert.affected_services
 
-        # ── Tool call 1: error logs ────────────────────────────────────────
-        self._log(f"[TOOL] splunk.query_error_logs({services})")
-        error_logs = await splunk.query_error_logs(services)
-        self._log(f"  ↳ Retrieved {len(error_logs)} error log entries")
+        # ── Tool calls 1-2: traces, then change requests on the affected
+        # services and their dependencies — fetched while the logs stream ──
+        first_logged: asyncio.Future[str | None] = asyncio.get_running_loop().create_future()
+        changes = asyncio.create_task(self._fetch_changes(ctx, services, first_logged))
+
+        # ── Tool call 3: error logs (streamed page by page) ────────────────
+        self._log(f"[TOOL] splunk.stream_error_logs({services}, page_size={self.log_page_size})")
+        logs = ErrorLogAggregator()
+        pages = 0
+        # Page count and exception classes seen at the last signature check
+        checked_at: int | None = None
+        checked_classes = 0
+        try:
+            async for page in self._tool_stream(
+                splunk.stream_error_logs(services, page_size=self.log_page_size),
+                "splunk.stream_error_logs",
+            ):
+                logs.add_page(page)
+                pages += 1
+                if not first_logged.done():
+                    first_logged.set_result(logs.first_timestamp)
+                # Known failure signatures need only exception counts, pool
+                # extremes and the CRs: try them as soon as the CRs are in,
+                # then when a new exception class appears or periodically
+                if changes.done() and (
+                    checked_at is None
+                    or len(logs.exception_counts) > checked_classes
+                    or pages - checked_at >= self.signature_check_pages
+                ):
+                    self._check_signatures(ctx, logs, *changes.result())
+                    checked_at, checked_classes = pages, len(logs.exception_counts)
+            if not first_logged.done():
+                first_logged.set_result(None)
+            distances, index = await changes
+        finally:
+            changes.cancel()
+        self._log(f"  ↳ Aggregated {logs.total} error log entries from {pages} pages")
 
         # Surface exception classes prominently
-        exc_counts: dict[str, int] = {}
-        for entry in error_logs:
-            exc = entry.get("exception_class", "unknown")
-            exc_counts[exc] = exc_counts.get(exc, 0) + 1
-        for exc, count in sorted(exc_counts.items(), key=lambda x: -x[1]):
+        for exc, count in logs.exception_counts.most_common():
             self._log(f"  ↳ exception: {exc}  ×{count}")
 
+        # Distinct failure modes, most frequent first
+        for template in logs.templates.summary(top=5):
+            self._log(f"  ↳ template ×{template['count']}: {template['template'][:90]}")
+
         # Surface HikariCP pool state at worst point
-        for entry in error_logs:
-            pool = entry.get("hikaricp")
-            if pool:
-                self._log(
-                    f"  ↳ ⚠ HikariCP pool state: "
-                    f"active={pool['active_connections']}/max={pool['max_pool_size']}  "
-                    f"idle={pool['idle_connections']}  "
-                    f"pending_threads={pool['pending_threads']}"
-                )
+        for name, pool in logs.pools().items():
+            self._log(
+                f"  ↳ ⚠ {name} worst state: "
+                f"active={pool['max_active_connections']}/max={pool['max_pool_size']}  "
+                f"idle={pool['min_idle_connections']}  "
+                f"pending_threads={pool['max_pending_threads']}"
+            )
+
+        # ── Change requests in the window before onset, pre-scored ────────
+        onset = self._onset(ctx, logs)
+        hours = self.change_window_hours
+        change_requests, signatures = self._check_signatures(ctx, logs, distances, index)
+        self._log(
+            f"  ↳ {len(change_requests)} of {len(index)} CRs deployed in the {hours}h "
+            f"before onset ({onset})"
+        )
+        for match in signatures:
+            self._log(
+                f"  ↳ ⚡ signature {match.signature.name}: {match.cr['cr_id']} "
+                f"({match.confidence_pct}%)"
+            )
 
-        # ── Tool call 2: change requests ──────────────────────────────────
-        self._log(f"[TOOL] servicenow.get_active_change_requests({services})")
-        change_requests = await servicenow.get_active_change_requests(services)
-        self._log(f"  ↳ Retrieved {len(change_requests)} active CRs")
+        if len(change_requests) > self.max_change_requests:
+            self._log(f"  ↳ Sending the {self.max_change_requests} most suspect")
+            change_requests = change_requests[: self.max_change_requests]
         for cr in change_requests:
             self._log(
-                f"  ↳ {cr['cr_id']} [{cr['status']}] deployed {cr['deployed_at']} "
-                f"by {cr['deployed_by']}"
+                f"  ↳ {cr['cr_id']} suspect={cr['suspect_score']} {cr['suspect_factors']} "
+                f"— deployed {cr['hours_before_onset']}h before onset by {cr['deployed_by']}"
             )
             self._log(f"     service={cr['service']} | \"{cr['title']}\"")
             if "config_change" in cr:
@@ -132,71 +310,338 @@ class RCAAgent(BaseAgent):
                     f"{cfg['old_value']} → {cfg['new_value']}"
                 )
 
-        # ── Tool call 3: past incidents ───────────────────────────────────
+        # ── Tool call 4: past incidents ───────────────────────────────────
         keywords = ["connection pool", "timeout", "HikariCP"] + services
         self._log(f"[TOOL] servicenow.search_past_incidents({len(keywords)} keywords)")
-        past_incidents = await servicenow.search_past_incidents(keywords)
+        past_incidents = await self._tool(
+            servicenow.search_past_incidents(keywords), "servicenow.search_past_incidents"
+        )
         self._log(f"  ↳ Retrieved {len(past_incidents)} past incidents for historical comparison")
         for inc in past_incidents:
             self._log(f"  ↳ {inc['incident_id']}: {inc['title'][:60]}")
 
-        # ── Assemble full context for the LLM ─────────────────────────────
-        impact_json = (
-            ctx.impact_analysis.model_dump_json(indent=2)
-            if ctx.impact_analysis
-            else "null"
+        return {
+            "error_logs": logs.summary(),
+            "change_requests": change_requests,
+            "past_incidents": past_incidents,
+            "signature_matches": [match.as_dict() for match in signatures],
+        }
+
+    async def _fetch_changes(
+        self,
+        ctx: IncidentContext,
+        services: list[str],
+        first_logged: asyncio.Future[str | None],
+    ) -> tuple[dict[str, int], ChangeRequestIndex]:
+        """Hops from the affected services to each dependency, and the CRs on
+        them that could fall in the change window.
+
+        The onset is only known once the logs are in, so ServiceNow is asked
+        for the window before either possible onset and the exact one is
+        applied to the index afterwards. Without traces, only the affected
+        services' own CRs are considered.
+        """
+        dynatrace = self.tools["dynatrace"]
+        servicenow = self.tools["servicenow"]
+        # The same call IMPACT makes, so the gateway serves it once
+        self._log(f"[TOOL] dynatrace.get_distributed_traces({services})")
+        try:
+            traces = await self._tool(
+                dynatrace.get_distributed_traces(services), "dynatrace.get_distributed_traces"
+            )
+        except Exception as exc:
+            self._log(f"  ↳ ⚠ traces unavailable ({exc}) — CRs on the affected services only")
+            distances = {service: 0 for service in services}
+        else:
+            self.graph.add_traces(traces)
+            distances = {
+                service: hops
+                for service, hops in self.graph.dependencies(services).items()
+                if hops <= self.dependency_hops
+            }
+            self._log(
+                f"  ↳ {len(distances) - len(set(services))} dependencies within "
+                f"{self.dependency_hops} hops of the affected services"
+            )
+
+        windows = self._change_windows(ctx.alert.timestamp.isoformat(), await first_logged)
+        self._log(
+            f"[TOOL] servicenow.get_active_change_requests({len(distances)} services, "
+            + " and ".join(f"{hours:g}h before {until}" for until, hours in windows)
+            + ")"
         )
-        similar_json = (
-            ctx.similar_incidents.model_dump_json(indent=2)
-            if ctx.similar_incidents
-            else "null"
+        batches = await asyncio.gather(*(
+            self._tool(
+                servicenow.get_active_change_requests(list(distances), until=until, hours=hours),
+                "servicenow.get_active_change_requests",
+            )
+            for until, hours in windows
+        ))
+        unique = {cr["cr_id"]: cr for batch in batches for cr in batch}
+        return distances, ChangeRequestIndex(unique.values())
+
+    def _change_windows(self, alerted: str, first: str | None) -> list[tuple[str, float]]:
+        """(until, hours) spans covering the change window before either
+        possible onset: the alert time, or the first error logged. One span
+        when the two are close, otherwise one per onset."""
+        hours = self.change_window_hours
+        if first is None:
+            return [(alerted, hours)]
+        early, late = sorted((alerted, first), key=to_epoch)
+        gap_h = (to_epoch(late) - to_epoch(early)) / 3600
+        if gap_h <= hours:
+            return [(late, round(hours + gap_h, 3))]
+        return [(early, hours), (late, hours)]
+
+    def _check_signatures(
+        self,
+        ctx: IncidentContext,
+        logs: ErrorLogAggregator,
+        distances: dict[str, int],
+        index: ChangeRequestIndex,
+    ) -> tuple[list[dict[str, Any]], list[SignatureMatch]]:
+        """Score the CRs in the window before onset (as far as the logs seen
+        so far place it) and match them against known failure signatures,
+        publishing a provisional RCA when it beats the one already published."""
+        change_requests = index.suspects(
+            distances, self._onset(ctx, logs), self.change_window_hours,
+            error_counts=logs.service_counts,
         )
-        summary_json = (
-            ctx.mi_summary.model_dump_json(indent=2) if ctx.mi_summary else "null"
+        matches = match_signatures(logs, change_requests)
+        provisional = provisional_rca(matches)
+        if provisional is not None:
+            published = ctx.provisional_rca
+            confidence = provisional["probable_root_causes"][0]["confidence_pct"]
+            if published is None or confidence > published.probable_root_causes[0]["confidence_pct"]:
+                self._publish_provisional(ctx, provisional)
+        return change_requests, matches
+
+    def _publish_provisional(self, ctx: IncidentContext, provisional: dict[str, Any]) -> None:
+        ctx.provisional_rca = RCAOutput(**provisional)
+        ctx.provisional_rca_at = (datetime.now(timezone.utc) - ctx.created_at).total_seconds()
+        top = ctx.provisional_rca.probable_root_causes[0]
+        self._log(
+            f"Provisional RCA at {ctx.provisional_rca_at:.2f}s — rollback candidate "
+            f"{ctx.provisional_rca.rollback_candidate} ({top['confidence_pct']}%, signature match)"
+        )
+        emit(
+            "provisional_rca",
+            {
+                "agent": self.name,
+                "at": round(ctx.provisional_rca_at, 2),
+                "output": ctx.provisional_rca.model_dump(mode="json"),
+            },
         )
 
-        user_prompt = f"""\
-INCIDENT ALERT:
-{ctx.alert.model_dump_json(indent=2)}
+    @staticmethod
+    def _onset(ctx: IncidentContext, logs: ErrorLogAggregator) -> str:
+        """When the incident started: the alert time if the logs cover it,
+        otherwise the first error logged."""
+        alerted = ctx.alert.timestamp.isoformat()
+        first, last = logs.first_timestamp, logs.last_timestamp
+        if first is None or to_epoch(first) <= to_epoch(alerted) <= to_epoch(last):
+            return alerted
+        return first
+
+    async def analyze(self, ctx: IncidentContext, evidence: dict[str, Any]) -> None:
+        self._log("Starting root cause analysis")
+        self._log(
+            f"  ↳ Prior context: "
+            f"impact={'✓' if ctx.impact_analysis else '✗'} | "
+            f"similar={'✓' if ctx.similar_incidents else '✗'} | "
+            f"summary={'✓' if ctx.mi_summary else '✗'}"
+        )
+
+        if self.map_reduce:
+            result = await self._map_reduce(ctx, evidence)
+        else:
+            result = await self._single_call(ctx, evidence)
+
+        ctx.rca = RCAOutput(**result)
+        rca = ctx.rca
+
+        # Log the verdict
+        self._log(f"Complete ✓ — {len(rca.probable_root_causes)} probable causes identified")
+        for cause in rca.probable_root_causes:
+            self._log(
+                f"  ↳ #{cause['rank']} ({cause['confidence_pct']}% confidence): "
+                f"{cause['cause'][:70]}"
+            )
+        self._log(f"  ↳ Rollback candidate: {rca.rollback_candidate}")
+        provisional = ctx.provisional_rca
+        if provisional is not None:
+            if provisional.rollback_candidate == rca.rollback_candidate:
+                self._log(f"  ↳ Provisional RCA confirmed: {rca.rollback_candidate}")
+            else:
+                self._log(
+                    f"  ↳ Provisional RCA refined: rollback candidate "
+                    f"{provisional.rollback_candidate} → {rca.rollback_candidate}"
+                )
+        self._log(
+            f"  ↳ Evidence trail: {len(rca.evidence_trail)} items | "
+            f"CRs correlated: {[c['cr_id'] for c in rca.correlated_change_requests]}"
+        )
 
+    async def _single_call(self, ctx: IncidentContext, evidence: dict[str, Any]) -> dict[str, Any]:
+        """The whole analysis in one prompt and one LLM call."""
+        error_logs = evidence["error_logs"]
+        change_requests = evidence["change_requests"]
+        past_incidents = evidence["past_incidents"]
+        signature_matches = evidence["signature_matches"]
+
+        # ── Assemble full context for the LLM ─────────────────────────────
+        enc = PromptEncoder()
+        alert_block = self._alert_prefix(ctx, enc)
+        user_prompt = f"""\
 PRIOR ANALYSIS CONTEXT:
-- Impact Analysis: {impact_json}
-- Similar Incidents: {similar_json}
-- MI Summary: {summary_json}
+- Impact Analysis: {enc.encode(ctx.impact_analysis)}
+- Similar Incidents: {enc.encode(ctx.similar_incidents)}
+- MI Summary: {enc.encode(ctx.mi_summary)}
 
 EVIDENCE TO ANALYSE:
 
-[1] ERROR LOGS (from Splunk — last 30 minutes):
-{json.dumps(error_logs, indent=2)}
+[1] ERROR LOGS (from Splunk — last 30 minutes; aggregated over every entry — message templates with
+counts and numeric parameter ranges, <NUM>/<*> mark variable parts — plus one exemplar per service/exception):
+{enc.encode(error_logs)}
 
-[2] ACTIVE CHANGE REQUESTS (from ServiceNow — deployed within 24h):
-{json.dumps(change_requests, indent=2)}
+[2] CHANGE REQUESTS (from ServiceNow — deployed within {self.change_window_hours}h before onset on the affected services or
+their dependencies; pre-scored, most suspect first):
+{enc.encode(change_requests)}
 
 [3] PAST SIMILAR INCIDENTS (from ServiceNow):
-{json.dumps(past_incidents, indent=2)}
+{enc.encode(past_incidents)}
+
+[4] SIGNATURE MATCHES (deterministic rules over the CRs, exception classes and pool state above):
+{enc.encode(signature_matches) if signature_matches else "none"}
 
 Now perform a full root cause analysis following the step-by-step process in your instructions.
 Output ONLY valid JSON matching the schema.
 """
 
         self._log(
-            f"Sending {len(error_logs)} logs + {len(change_requests)} CRs + "
+            f"Sending {error_logs['total_entries']} logs (aggregated) + {len(change_requests)} CRs + "
             f"{len(past_incidents)} past incidents to LLM for RCA"
         )
-        result = await self._call_llm(_SYSTEM_PROMPT, user_prompt)
+        self._record_encoding(ctx, enc)
+        return await self._call_llm(
+            _SYSTEM_PROMPT,
+            user_prompt,
+            cache_prefix=alert_block,
+            ctx=ctx,
+            output_model=RCAOutput,
+        )
 
-        ctx.rca = RCAOutput(**result)
-        rca = ctx.rca
+    async def _map_reduce(self, ctx: IncidentContext, evidence: dict[str, Any]) -> dict[str, Any]:
+        """CR audit, log analysis and historical comparison as concurrent calls,
+        each given only its own evidence, then a synthesis call over their results."""
+        enc = PromptEncoder()
+        alert_block = self._alert_prefix(ctx, enc)
+        impact = ctx.impact_analysis
+        blast_radius = impact.blast_radius if impact is not None else ctx.alert.affected_services
+        signature_matches = evidence["signature_matches"]
+
+        prompts = {
+            "changes": (
+                _CHANGES_PROMPT,
+                f"""\
+BLAST RADIUS: {enc.encode(blast_radius)}
+
+CHANGE REQUESTS (from ServiceNow — deployed within {self.change_window_hours}h before onset on the affected services or
+their dependencies; pre-scored, most suspect first):
+{enc.encode(evidence["change_requests"])}
+
+SIGNATURE MATCHES:
+{enc.encode(signature_matches) if signature_matches else "none"}
+""",
+                CRAuditOutput,
+            ),
+            "logs": (
+                _LOGS_PROMPT,
+                f"""\
+ERROR LOGS (from Splunk; aggregated over every entry — message templates with counts and numeric
+parameter ranges, <NUM>/<*> mark variable parts — plus one exemplar per service/exception):
+{enc.encode(evidence["error_logs"])}
+""",
+                LogAnalysisOutput,
+            ),
+            "history": (
+                _HISTORY_PROMPT,
+                f"""\
+PAST INCIDENTS (from ServiceNow):
+{enc.encode(evidence["past_incidents"])}
+
+SIMILAR INCIDENT ANALYSIS:
+{enc.encode(ctx.similar_incidents)}
+""",
+                HistoryComparisonOutput,
+            ),
+        }
+
+        self._log(f"Map-reduce RCA: {', '.join(prompts)} sub-analyses in parallel")
+        results = await asyncio.gather(
+            *(
+                self._sub_call(ctx, part, system, user, alert_block, model)
+                for part, (system, user, model) in prompts.items()
+            ),
+            return_exceptions=True,
+        )
+        findings: dict[str, Any] = {}
+        for part, result in zip(prompts, results):
+            if isinstance(result, BaseException):
+                if not isinstance(result, Exception):
+                    raise result
+                self._log(f"  ↳ {part} sub-analysis failed: {result}")
+                findings[part] = "unavailable"
+            else:
+                findings[part] = result
+        if all(value == "unavailable" for value in findings.values()):
+            raise RuntimeError("every RCA sub-analysis failed")
+
+        summary = ctx.mi_summary
+        user_prompt = f"""\
+PRIOR ANALYSIS CONTEXT:
+- Impact: {enc.encode(impact.model_dump(include={"blast_radius", "severity_recommendation"}) if impact else None)}
+- MI Summary headline: {summary.headline if summary else "unavailable"}
 
-        # Log the verdict
-        self._log(f"Complete ✓ — {len(rca.probable_root_causes)} probable causes identified")
-        for cause in rca.probable_root_causes:
-            self._log(
-                f"  ↳ #{cause['rank']} ({cause['confidence_pct']}% confidence): "
-                f"{cause['cause'][:70]}"
-            )
-        self._log(f"  ↳ Rollback candidate: {rca.rollback_candidate}")
-        self._log(
-            f"  ↳ Evidence trail: {len(rca.evidence_trail)} items | "
-            f"CRs correlated: {[c['cr_id'] for c in rca.correlated_change_requests]}"
+[1] CHANGE REQUEST AUDIT:
+{enc.encode(findings["changes"])}
+
+[2] ERROR LOG ANALYSIS:
+{enc.encode(findings["logs"])}
+
+[3] HISTORICAL COMPARISON:
+{enc.encode(findings["history"])}
+
+Cross-reference these, rank the probable causes and give remediation.
+Output ONLY valid JSON matching the schema.
+"""
+        self._record_encoding(ctx, enc)
+        return await self._sub_call(
+            ctx, "synthesis", _SYNTHESIS_PROMPT, user_prompt, alert_block, RCAOutput, stream=True
         )
+
+    async def _sub_call(
+        self,
+        ctx: IncidentContext,
+        part: str,
+        system: str,
+        user: str,
+        cache_prefix: str,
+        output_model: type[BaseModel],
+        stream: bool = False,
+    ) -> dict[str, Any]:
+        """One map-reduce call, accounted as "RCA.<part>" and timed in phase_timings."""
+        start = time.perf_counter()
+        try:
+            return await self._call_llm(
+                system,
+                user,
+                cache_prefix=cache_prefix,
+                ctx=ctx if stream else None,
+                output_model=output_model,
+                call_name=f"{self.name}.{part}",
+            )
+        finally:
+            elapsed = time.perf_counter() - start
+            ctx.phase_timings[f"rca.{part}"] = elapsed
+            self._log(f"  ↳ {part} finished in {elapsed:.2f}s")
@@ -1,15 +1,21 @@
 from __future__ import annotations
 
-import json
+import time
+from typing import Any, Mapping
 
 from agents.base_agent import BaseAgent
 from models import SimilarIncident, SimilarIncidentOutput, IncidentContext
+from utils.incident_index import IncidentIndex
+from utils.llm_client import LLMClient
+from utils.prompt_encoding import PromptEncoder
 
 _SYSTEM_PROMPT = """\
 You are a Similar Incident Detector for a production operations team.
 
-Given the current incident details and a list of past resolved incidents,
-identify the top 3 most similar past incidents.
+Given the current incident details and a short list of candidate past
+incidents — already pre-ranked by a local text and service-overlap index,
+with that score as local_score — identify the top 3 most similar past
+incidents. Re-rank freely: local_score is lexical, you judge the failure mode.
 
 Score each from 0.0 to 1.0 based on:
 - Affected services overlap (high weight)
@@ -52,8 +58,22 @@ The "incidents" array must have exactly 3 items, ranked by similarity_score desc
 
 class SimilarIncidentAgent(BaseAgent):
     name = "SIMILAR"
-
-    async def run(self, ctx: IncidentContext) -> None:
+    writes = ("similar_incidents",)
+    stream_fields = ("top_match",)
+    # Incidents requested per ServiceNow search, and how many of the locally
+    # pre-ranked candidates the LLM re-ranks
+    search_limit = 200
+    candidates = 5
+
+    def __init__(
+        self, llm: LLMClient, tools: Mapping[str, Any], index: IncidentIndex | None = None
+    ) -> None:
+        super().__init__(llm, tools)
+        # Every search result grows the index; pass one in to share it, or to
+        # start from a pre-built archive
+        self.index = index if index is not None else IncidentIndex()
+
+    async def gather(self, ctx: IncidentContext) -> dict[str, Any]:
         self._log("Searching for similar past incidents")
 
         servicenow = self.tools["servicenow"]
@@ -67,30 +87,63 @@ class SimilarIncidentAgent(BaseAgent):
         # ── Tool call: search past incidents ──────────────────────────────
         self._log(f"[TOOL] servicenow.search_past_incidents({len(keywords)} keywords)")
         self._log(f"  ↳ keywords: {keywords}")
-        past_incidents = await servicenow.search_past_incidents(keywords)
-        self._log(f"  ↳ Retrieved {len(past_incidents)} past incidents from ServiceNow")
+        past_incidents = await self._tool(
+            servicenow.search_past_incidents(keywords, limit=self.search_limit),
+            "servicenow.search_past_incidents",
+        )
+        added = self.index.add_all(past_incidents)
+        self._log(
+            f"  ↳ Retrieved {len(past_incidents)} past incidents from ServiceNow "
+            f"({added} new · {len(self.index)} in local index)"
+        )
 
-        for inc in past_incidents:
+        # ── Local pre-ranking: only the best few reach the LLM ────────────
+        events = ctx.alert.raw_payload.get("alert_events", [])
+        query = " ".join(keywords + [e.get("name", "") for e in events])
+        started = time.perf_counter()
+        ranked = self.index.search(query, ctx.alert.affected_services, k=self.candidates)
+        self._log(
+            f"  ↳ Pre-ranked {len(self.index)} incidents locally in "
+            f"{(time.perf_counter() - started) * 1000:.1f}ms — top {len(ranked)}:"
+        )
+        for candidate in ranked:
+            inc = candidate.incident
             self._log(
                 f"  ↳ {inc['incident_id']} [{inc['severity']}] {inc['date']}: "
-                f"\"{inc['title']}\""
+                f"\"{inc['title']}\"  score={candidate.score:.3f}"
             )
             self._log(f"     services={inc['affected_services']}  "
+                      f"overlap={candidate.service_overlap:.2f}  "
                       f"resolved_in={inc['resolution_time_minutes']}min")
 
-        user_prompt = f"""\
-CURRENT INCIDENT:
-{ctx.alert.model_dump_json(indent=2)}
+        return {
+            "past_incidents": [
+                {**c.incident, "local_score": round(c.score, 3)} for c in ranked
+            ]
+        }
 
-PAST RESOLVED INCIDENTS (from ServiceNow):
-{json.dumps(past_incidents, indent=2)}
+    async def analyze(self, ctx: IncidentContext, evidence: dict[str, Any]) -> None:
+        past_incidents = evidence["past_incidents"]
+
+        enc = PromptEncoder()
+        alert_block = self._alert_prefix(ctx, enc, "CURRENT INCIDENT")
+        user_prompt = f"""\
+CANDIDATE PAST INCIDENTS (from ServiceNow, pre-ranked locally — best first):
+{enc.encode(past_incidents)}
 
 Identify the top 3 most similar past incidents and suggest a runbook action.
 Output ONLY valid JSON matching the schema in your instructions.
 """
 
-        self._log("Sending past incidents to LLM for similarity analysis")
-        result = await self._call_llm(_SYSTEM_PROMPT, user_prompt)
+        self._log(f"Sending {len(past_incidents)} candidates to LLM for re-ranking")
+        self._record_encoding(ctx, enc)
+        result = await self._call_llm(
+            _SYSTEM_PROMPT,
+            user_prompt,
+            cache_prefix=alert_block,
+            ctx=ctx,
+            output_model=SimilarIncidentOutput,
+        )
 
         ctx.similar_incidents = SimilarIncidentOutput(
             incidents=[SimilarIncident(**inc) for inc in result["incidents"]],
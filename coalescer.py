@@ -0,0 +1,142 @@
+"""Single-flight alert coalescing in front of MIBridgeOrchestrator.handle_alert.
+
+Dynatrace re-fires the same problem many times while it is open. Alerts that
+share an incident key join the run already in flight instead of launching a
+second four-agent pipeline; every caller gets the same IncidentContext.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+from models import IncidentContext, RawAlert
+from orchestrator import MIBridgeOrchestrator
+from utils.logger import capture, log
+
+_SEVERITY_RANK = {"P1": 1, "P2": 2, "P3": 3, "P4": 4}
+
+
+def incident_key(alert: RawAlert) -> str:
+    """Source problem id when the payload carries one, else the incident id."""
+    problem_id = alert.raw_payload.get("problem_id")
+    if problem_id:
+        return f"{alert.source}:{problem_id}"
+    return f"incident:{alert.incident_id}"
+
+
+def merge_alerts(base: RawAlert, update: RawAlert) -> RawAlert:
+    """Fold a re-fired alert into the one being worked.
+
+    Keeps the original identity and start time, escalates severity, unions
+    the affected services, takes the latest error rate and overlays the
+    newer raw payload.
+    """
+    return base.model_copy(
+        update={
+            "severity": min(base.severity, update.severity, key=_SEVERITY_RANK.__getitem__),
+            "affected_services": list(
+                dict.fromkeys(base.affected_services + update.affected_services)
+            ),
+            "error_rate": update.error_rate,
+            "raw_payload": {**base.raw_payload, **update.raw_payload},
+        }
+    )
+
+
+class _Flight:
+    def __init__(self, ctx: IncidentContext, task: asyncio.Task[IncidentContext]) -> None:
+        self.ctx = ctx
+        self.task = task
+        self.started = time.perf_counter()
+
+
+class AlertCoalescer:
+    """Collapses alerts with the same incident key onto one in-flight run.
+
+    Alerts arriving within `fold_window_seconds` of the run starting have
+    their fields folded into ctx.alert, so agent steps that have not yet
+    started see the latest reading. Later duplicates still share the result
+    but leave the alert untouched.
+    """
+
+    def __init__(
+        self, orchestrator: MIBridgeOrchestrator, fold_window_seconds: float = 30.0
+    ) -> None:
+        self.orchestrator = orchestrator
+        self.fold_window_seconds = fold_window_seconds
+        self._flights: dict[str, _Flight] = {}
+        self.runs = 0
+        self.coalesced = 0
+        self.folded = 0
+
+    async def handle_alert(self, alert: RawAlert) -> IncidentContext:
+        key = incident_key(alert)
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._start(key, alert)
+        else:
+            self._join(key, flight, alert)
+        # Shield so one caller going away does not cancel the shared run
+        return await asyncio.shield(flight.task)
+
+    def fold(self, alert: RawAlert) -> bool:
+        """Attach an alert to its in-flight run without awaiting it.
+
+        Returns False when no run is in flight for the alert's key.
+        """
+        key = incident_key(alert)
+        flight = self._flights.get(key)
+        if flight is None:
+            return False
+        self._join(key, flight, alert)
+        return True
+
+    def in_flight(self) -> list[str]:
+        return list(self._flights)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "in_flight": len(self._flights),
+            "runs": self.runs,
+            "coalesced": self.coalesced,
+            "folded": self.folded,
+        }
+
+    def _start(self, key: str, alert: RawAlert) -> _Flight:
+        ctx = self.orchestrator.new_context(alert)
+        task = asyncio.create_task(self._run(key, ctx))
+        flight = _Flight(ctx, task)
+        self._flights[key] = flight
+        self.runs += 1
+        return flight
+
+    def _join(self, key: str, flight: _Flight, alert: RawAlert) -> None:
+        self.coalesced += 1
+        flight.ctx.coalesced_alerts += 1
+        age = time.perf_counter() - flight.started
+        if age <= self.fold_window_seconds:
+            flight.ctx.alert = merge_alerts(flight.ctx.alert, alert)
+            self.folded += 1
+            log(
+                "ORCHESTRATOR",
+                f"Coalesced {alert.incident_id} onto {key} (+{age:.1f}s, folded: "
+                f"error_rate={alert.error_rate:.0%} severity={flight.ctx.alert.severity})",
+            )
+        else:
+            log(
+                "ORCHESTRATOR",
+                f"Coalesced {alert.incident_id} onto {key} (+{age:.1f}s, "
+                f"outside {self.fold_window_seconds:.0f}s fold window — sharing result only)",
+            )
+
+    async def _run(self, key: str, ctx: IncidentContext) -> IncidentContext:
+        # Shared run — capture its logs on the context rather than in
+        # whichever caller happened to arrive first
+        log_entries: list[dict] = []
+        try:
+            with capture(log_entries):
+                return await self.orchestrator.handle_alert(ctx.alert, ctx=ctx)
+        finally:
+            ctx.log_entries = log_entries
+            self._flights.pop(key, None)
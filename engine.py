@@ -0,0 +1,238 @@
+"""Concurrent multi-incident engine.
+
+Accepts many alerts at once and runs their MI Bridge pipelines concurrently,
+with a cap on in-flight incidents and a separate cap on in-flight LLM calls.
+Every incident gets its own IncidentContext and log sink; the LLM client and
+tool handles are shared. Alerts for an incident that is already queued or
+running are coalesced onto it instead of taking another worker.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Any
+
+from coalescer import AlertCoalescer, incident_key, merge_alerts
+from models import IncidentContext, RawAlert
+from orchestrator import MIBridgeOrchestrator
+from utils.incident_index import IncidentIndex
+from utils.llm_client import BoundedLLMClient, DryRunLLMClient, LLMClient
+from utils.logger import log
+
+_THROUGHPUT_WINDOW_S = 60.0
+
+
+class IncidentEngine:
+    """Bounded worker pool in front of MIBridgeOrchestrator.handle_alert.
+
+    Usage:
+        async with IncidentEngine(llm, tools, max_incidents=8) as engine:
+            contexts = await engine.run_batch(alerts)
+            print(engine.stats())
+    """
+
+    def __init__(
+        self,
+        llm: LLMClient | DryRunLLMClient,
+        tools: dict[str, Any],
+        max_incidents: int = 8,
+        max_llm_calls: int = 16,
+        print_briefs: bool = False,
+        fold_window_seconds: float = 30.0,
+        rca_map_reduce: bool = False,
+        incident_index: IncidentIndex | None = None,
+    ) -> None:
+        if max_incidents < 1:
+            raise ValueError("max_incidents must be >= 1")
+        self.llm = BoundedLLMClient(llm, max_llm_calls)
+        self.tools = tools
+        self.max_incidents = max_incidents
+        self.orchestrator = MIBridgeOrchestrator(
+            llm=self.llm,
+            tools=tools,
+            print_brief=print_briefs,
+            rca_map_reduce=rca_map_reduce,
+            incident_index=incident_index,
+        )
+        self.coalescer = AlertCoalescer(self.orchestrator, fold_window_seconds)
+
+        # Queue holds incident keys; the latest (merged) alert per key waits in
+        # _queued until a worker picks it up, and _pending maps each key to the
+        # future every duplicate submitter shares.
+        self._queue: asyncio.Queue[tuple[str, asyncio.Future[IncidentContext]]] = (
+            asyncio.Queue()
+        )
+        self._queued: dict[str, RawAlert] = {}
+        self._queued_dupes: dict[str, int] = {}
+        self._pending: dict[str, asyncio.Future[IncidentContext]] = {}
+        self._workers: list[asyncio.Task[None]] = []
+        self._started_at: float | None = None
+        self._completions: deque[float] = deque()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.coalesced = 0
+
+    # ── Lifecycle ────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        self._started_at = time.perf_counter()
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.max_incidents)
+        ]
+        log(
+            "ENGINE",
+            f"Started — max_incidents={self.max_incidents} "
+            f"max_llm_calls={self.llm.max_concurrent}",
+        )
+
+    async def stop(self) -> None:
+        """Drain the queue, then shut the workers down."""
+        await self._queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        log("ENGINE", f"Stopped — {self._format_stats()}")
+
+    async def __aenter__(self) -> IncidentEngine:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.stop()
+
+    # ── Submission ───────────────────────────────────────────────────────────
+
+    def submit(self, alert: RawAlert) -> asyncio.Future[IncidentContext]:
+        """Queue an alert; the returned future resolves to its IncidentContext.
+
+        A duplicate of a queued or running incident returns that incident's
+        future, folding the new alert fields in. One arriving after that run
+        has finished starts a new run.
+        """
+        if not self._workers:
+            raise RuntimeError("IncidentEngine.start() must be awaited before submit()")
+
+        key = incident_key(alert)
+        pending = self._pending.get(key)
+        if pending is not None and not pending.done():
+            if key in self._queued:
+                self._queued[key] = merge_alerts(self._queued[key], alert)
+                self._queued_dupes[key] = self._queued_dupes.get(key, 0) + 1
+                self.coalesced += 1
+                return pending
+            if self.coalescer.fold(alert):
+                self.coalesced += 1
+                return pending
+            # The run has finished but its result is not delivered yet: too
+            # late to join, so the alert gets a run of its own
+
+        future: asyncio.Future[IncidentContext] = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        self._queued[key] = alert
+        self._queue.put_nowait((key, future))
+        return future
+
+    async def run_batch(self, alerts: list[RawAlert]) -> list[IncidentContext]:
+        """Submit every alert at once and wait for all their contexts."""
+        futures = [self.submit(alert) for alert in alerts]
+        log(
+            "ENGINE",
+            f"Accepted {len(alerts)} alerts — queue_depth={self._queue.qsize()} "
+            f"coalesced={self.coalesced}",
+        )
+        return list(await asyncio.gather(*futures))
+
+    # ── Worker ───────────────────────────────────────────────────────────────
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            key, future = await self._queue.get()
+            alert = self._queued.pop(key)
+            dupes = self._queued_dupes.pop(key, 0)
+            try:
+                if not future.cancelled():
+                    await self._process(alert, future, dupes)
+            finally:
+                if self._pending.get(key) is future:
+                    del self._pending[key]
+                self._queue.task_done()
+
+    async def _process(
+        self, alert: RawAlert, future: asyncio.Future[IncidentContext], dupes: int
+    ) -> None:
+        # The coalescer runs each incident in its own task with its own log
+        # sink, so ctx.log_entries stays isolated from neighbouring incidents
+        self.in_flight += 1
+        t0 = time.perf_counter()
+        try:
+            ctx = await self.coalescer.handle_alert(alert)
+        except Exception as exc:
+            self.failed += 1
+            log("ERROR", f"Incident {alert.incident_id} failed: {exc}")
+            if not future.done():
+                future.set_exception(exc)
+            return
+        finally:
+            self.in_flight -= 1
+
+        # Duplicates merged while still queued never reached the coalescer
+        ctx.coalesced_alerts += dupes
+        self.completed += 1
+        self._completions.append(time.perf_counter())
+        log(
+            "ENGINE",
+            f"{alert.incident_id} done in {time.perf_counter() - t0:.2f}s "
+            f"(+{ctx.coalesced_alerts} coalesced) — {self._format_stats()}",
+        )
+        if not future.done():
+            future.set_result(ctx)
+
+    # ── Metrics ──────────────────────────────────────────────────────────────
+
+    def throughput_per_min(self) -> float:
+        """Incidents completed per minute over the last 60 s (or since start)."""
+        if self._started_at is None:
+            return 0.0
+        now = time.perf_counter()
+        while self._completions and now - self._completions[0] > _THROUGHPUT_WINDOW_S:
+            self._completions.popleft()
+        window = min(_THROUGHPUT_WINDOW_S, now - self._started_at)
+        if window <= 0:
+            return 0.0
+        return len(self._completions) / window * 60.0
+
+    def stats(self) -> dict[str, Any]:
+        limiter = self.llm.limiter
+        routes = getattr(self.llm, "routes", None)
+        return {
+            "queue_depth": self._queue.qsize(),
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "coalesced": self.coalesced,
+            "throughput_per_min": round(self.throughput_per_min(), 1),
+            "llm_in_flight": self.llm.in_flight,
+            "llm_waiting": self.llm.waiting,
+            "hedges_fired": sum(self.llm.hedges_fired.values()),
+            "hedges_won": sum(self.llm.hedges_won.values()),
+            "rate_limit": limiter.stats() if limiter is not None else None,
+            "json_replies": self.orchestrator.json_stats()["total"],
+            "routing": routes.stats() if routes is not None else None,
+            "tools": self.orchestrator.tools.stats(),
+        }
+
+    def _format_stats(self) -> str:
+        st = self.stats()
+        return (
+            f"queue={st['queue_depth']} in_flight={st['in_flight']} "
+            f"done={st['completed']} failed={st['failed']} coalesced={st['coalesced']} "
+            f"llm={st['llm_in_flight']}/{self.llm.max_concurrent} "
+            f"(waiting={st['llm_waiting']}) "
+            f"throughput={st['throughput_per_min']}/min"
+        )
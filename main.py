@@ -4,6 +4,16 @@ Usage:
     python main.py               # real LLM calls (requires ANTHROPIC_API_KEY)
     python main.py --dry-run     # full pipeline with pre-baked responses, no API key needed
     python main.py --check-key   # validate your ANTHROPIC_API_KEY and exit
+    python main.py --dry-run --storm 40   # 40 concurrent alerts through the incident engine
+    python main.py --llm-cache-dir .llm_cache   # persist LLM responses across runs
+    python main.py --no-llm-cache             # always call the LLM
+    python main.py --dry-run --storm 40 --llm-rpm 120   # rate-limit LLM calls (P1 first)
+    python main.py --structured-output        # tool-use structured output for agent replies
+    python main.py --llm-model claude-3-5-sonnet-20241022   # one model for every agent
+    python main.py --dry-run --storm 40 --no-llm-cache --dry-run-profile realistic --seed 7
+                                              # seeded lognormal latency + faults per agent
+    python main.py --dry-run --scenario large --seed 7   # generated 500-service incident
+    python main.py --dry-run --rca-map-reduce   # RCA as parallel sub-analyses + a synthesis call
 """
 
 from __future__ import annotations
@@ -17,11 +27,19 @@ from datetime import datetime, timezone
 # Ensure the project root is on sys.path so relative imports work
 sys.path.insert(0, os.path.dirname(__file__))
 
+from engine import IncidentEngine
 from models import RawAlert
 from orchestrator import MIBridgeOrchestrator
 from tools import mock_dynatrace, mock_splunk, mock_servicenow, mock_pagerduty
+from tools.synthetic_scenario import SCALES, SyntheticScenario
+from utils.dry_run_latency import REALISTIC_PROFILES, LatencySimulator
+from utils.incident_index import IncidentIndex
+from utils.llm_cache import CachedLLMClient
 from utils.llm_client import DryRunLLMClient, LLMClient
+from utils.llm_routing import Route, RoutingTable
 from utils.logger import log
+from utils.rate_limit import RateLimiter
+from utils.usage import process_usage
 
 _RST = "\033[0m"
 _BOLD = "\033[1m"
@@ -83,6 +101,84 @@ def _build_alert() -> RawAlert:
     )
 
 
+def _build_storm(count: int, base: RawAlert) -> list[RawAlert]:
+    """Clone `base` into `count` distinct incidents."""
+    return [
+        base.model_copy(
+            update={
+                "incident_id": f"{base.incident_id}-{i:03d}",
+                "raw_payload": {**base.raw_payload, "problem_id": f"{base.raw_payload['problem_id']}-{i:03d}"},
+            }
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def _arg_int(flag: str, default: int) -> int:
+    if flag not in sys.argv:
+        return default
+    idx = sys.argv.index(flag)
+    try:
+        return int(sys.argv[idx + 1])
+    except (IndexError, ValueError):
+        print(f"{_RED}ERROR{_RST}: {flag} requires an integer argument")
+        sys.exit(1)
+
+
+def _arg_str(flag: str) -> str | None:
+    if flag not in sys.argv:
+        return None
+    idx = sys.argv.index(flag)
+    if idx + 1 >= len(sys.argv):
+        print(f"{_RED}ERROR{_RST}: {flag} requires an argument")
+        sys.exit(1)
+    return sys.argv[idx + 1]
+
+
+def _build_latency(seed: int | None) -> LatencySimulator:
+    """--dry-run-profile: "realistic" or a JSON profile file; default fixed 0.5 s."""
+    profile = _arg_str("--dry-run-profile")
+    if profile is None:
+        return LatencySimulator(seed=seed)
+    if profile == "realistic":
+        return LatencySimulator(REALISTIC_PROFILES, seed=seed)
+    try:
+        return LatencySimulator.from_file(profile, seed=seed)
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        print(f"{_RED}ERROR{_RST}: cannot load dry-run profile {profile}: {exc}")
+        sys.exit(1)
+
+
+def _build_scenario(seed: int | None) -> SyntheticScenario | None:
+    """--scenario small|large: a generated incident in place of the flash-sale mocks."""
+    scale = _arg_str("--scenario")
+    if scale is None:
+        return None
+    if scale not in SCALES:
+        print(f"{_RED}ERROR{_RST}: --scenario must be one of {', '.join(SCALES)}")
+        sys.exit(1)
+    started = time.perf_counter()
+    scenario = SyntheticScenario(seed=seed or 0, **SCALES[scale])
+    log(
+        "ENGINE",
+        f"Generated {scale} scenario in {time.perf_counter() - started:.2f}s: {scenario.sizes()}",
+    )
+    log("ENGINE", f"Scenario ground truth: {scenario.ground_truth()}")
+    return scenario
+
+
+def _build_incident_index(scenario: SyntheticScenario) -> IncidentIndex:
+    """The scenario's incident archive, indexed once; searches keep it current."""
+    started = time.perf_counter()
+    index = IncidentIndex()
+    index.add_all(scenario.past_incidents())
+    log(
+        "ENGINE",
+        f"Indexed {len(index)} past incidents in {time.perf_counter() - started:.2f}s",
+    )
+    return index
+
+
 def _build_tools() -> dict:
     return {
         "dynatrace": mock_dynatrace,
@@ -115,6 +211,10 @@ async def _check_key(api_key: str) -> None:
 async def main() -> None:
     dry_run = "--dry-run" in sys.argv
     check_key_mode = "--check-key" in sys.argv
+    rpm = _arg_int("--llm-rpm", 0)
+    pinned_model = _arg_str("--llm-model")
+    # Per-agent routes by default; --llm-model sends every agent to one model
+    routes = RoutingTable({}, Route([pinned_model])) if pinned_model else RoutingTable()
 
     if dry_run:
         print(
@@ -124,7 +224,17 @@ async def main() -> None:
             f"The full pipeline — phased execution, parallelism, Pydantic validation, "
             f"MI Brief — runs as normal.{_RST}\n"
         )
-        llm: LLMClient | DryRunLLMClient = DryRunLLMClient()
+        # Dry runs are only rate limited on request, and only by request count
+        limiter = (
+            RateLimiter(rpm, input_tokens_per_min=None, output_tokens_per_min=None)
+            if rpm
+            else None
+        )
+        seed = _arg_int("--seed", 0) if "--seed" in sys.argv else None
+        latency = _build_latency(seed)
+        llm: LLMClient | DryRunLLMClient | CachedLLMClient = DryRunLLMClient(
+            limiter, routes, latency
+        )
     else:
         api_key = os.environ.get("ANTHROPIC_API_KEY", "").strip()
         if not api_key:
@@ -147,16 +257,57 @@ async def main() -> None:
                 f"Run 'python main.py --check-key' to validate before the full simulation.\n"
             )
 
-        llm = LLMClient(api_key=api_key)
+        limiter = RateLimiter(requests_per_min=rpm) if rpm else RateLimiter()
+        llm = LLMClient(
+            api_key=api_key,
+            limiter=limiter,
+            structured_output="--structured-output" in sys.argv,
+            routes=routes,
+        )
+
+    cached: CachedLLMClient | None = None
+    if "--no-llm-cache" not in sys.argv:
+        cached = CachedLLMClient(llm, disk_dir=_arg_str("--llm-cache-dir"))
+        llm = cached
 
-    alert = _build_alert()
-    tools = _build_tools()
-    orchestrator = MIBridgeOrchestrator(llm=llm, tools=tools)
+    scenario = _build_scenario(_arg_int("--seed", 0) if "--seed" in sys.argv else None)
+    tools = scenario.tools() if scenario else _build_tools()
+    alert = scenario.alert() if scenario else _build_alert()
+    incident_index = _build_incident_index(scenario) if scenario else None
+    storm = _arg_int("--storm", 0)
+    map_reduce = "--rca-map-reduce" in sys.argv
 
     wall_start = time.perf_counter()
-    await orchestrator.handle_alert(alert)
+    if storm:
+        async with IncidentEngine(
+            llm,
+            tools,
+            max_incidents=_arg_int("--max-incidents", 8),
+            max_llm_calls=_arg_int("--max-llm-calls", 16),
+            rca_map_reduce=map_reduce,
+            incident_index=incident_index,
+        ) as engine:
+            await engine.run_batch(_build_storm(storm, alert))
+        log("ENGINE", f"Storm stats: {engine.stats()}")
+        log("ENGINE", f"Tool gateway: {engine.orchestrator.tools.stats()}")
+    else:
+        orchestrator = MIBridgeOrchestrator(
+            llm=llm, tools=tools, rca_map_reduce=map_reduce, incident_index=incident_index
+        )
+        await orchestrator.handle_alert(alert)
+        log("ORCHESTRATOR", f"JSON replies: {orchestrator.json_stats()['total']}")
+        log("ORCHESTRATOR", f"Tool gateway: {orchestrator.tools.stats()}")
     wall_total = time.perf_counter() - wall_start
 
+    if cached is not None:
+        log("LLM_CACHE", f"Stats: {cached.cache_stats()}")
+    if limiter is not None:
+        log("ENGINE", f"Rate limiter: {limiter.stats()}")
+    log("ENGINE", f"Model routing: {routes.stats()}")
+    log("ENGINE", f"LLM usage (process): {process_usage.summary()}")
+    if dry_run:
+        log("ENGINE", f"Dry-run faults injected: {latency.injected}")
+
     mode_tag = " [dry-run]" if dry_run else ""
     log("ORCHESTRATOR", f"Simulation complete{mode_tag} — total wall time: {wall_total:.2f}s")
 
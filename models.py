@@ -61,6 +61,25 @@ class RCAOutput(BaseModel):
     evidence_trail: list[dict[str, Any]]
 
 
+class CRAuditOutput(BaseModel):
+    suspects: list[dict[str, Any]]
+    cleared: list[dict[str, Any]]
+    evidence_trail: list[dict[str, Any]]
+
+
+class LogAnalysisOutput(BaseModel):
+    dominant_failure: str
+    exception_patterns: list[dict[str, Any]]
+    config_clues: list[str]
+    evidence_trail: list[dict[str, Any]]
+
+
+class HistoryComparisonOutput(BaseModel):
+    matches: list[dict[str, Any]]
+    recurring_failure_mode: str | None
+    evidence_trail: list[dict[str, Any]]
+
+
 class IncidentContext(BaseModel):
     incident_id: str
     alert: RawAlert
@@ -68,8 +87,28 @@ class IncidentContext(BaseModel):
     similar_incidents: SimilarIncidentOutput | None = None
     mi_summary: MISummaryOutput | None = None
     rca: RCAOutput | None = None
+    # Rule-based RCA from known failure signatures, published before the LLM's
+    provisional_rca: RCAOutput | None = None
+    # Seconds after the incident opened at which provisional_rca was published
+    provisional_rca_at: float | None = None
     phase_timings: dict[str, float] = Field(default_factory=dict)
+    # Per-agent progress: pending | running | waiting | done | failed | timed_out
+    agent_status: dict[str, str] = Field(default_factory=dict)
+    # Seconds after the incident opened at which a partial brief was published
+    partial_brief_at: float | None = None
     created_at: datetime
+    # Duplicate alerts (same incident key) folded onto this run by AlertCoalescer
+    coalesced_alerts: int = 0
+    # Reply fields streamed out of LLM calls still in progress, keyed "AGENT.path"
+    early_fields: dict[str, Any] = Field(default_factory=dict)
+    # Estimated prompt tokens per agent: indented JSON vs the compact encoding sent
+    prompt_encoding: dict[str, dict[str, int]] = Field(default_factory=dict)
+    # Anthropic prompt-cache token counts and hit rate over this incident's LLM calls
+    prompt_cache: dict[str, Any] = Field(default_factory=dict)
+    # One record per LLM round-trip: agent, model, tokens, cache tokens, latency, retries, cost
+    llm_usage: list[dict[str, Any]] = Field(default_factory=list)
+    # llm_usage rolled up: {"total": {...}, "per_agent": {agent: {...}}}
+    usage_summary: dict[str, Any] = Field(default_factory=dict)
     # Captured log entries for web dashboard — each dict has {timestamp, agent, message, phase}
     log_entries: list[dict[str, Any]] = Field(default_factory=list)
 
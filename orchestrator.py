@@ -3,15 +3,23 @@ from __future__ import annotations
 import asyncio
 import time
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Mapping
 
+from agents.base_agent import BaseAgent
 from agents.impact_analysis_agent import ImpactAnalysisAgent
 from agents.mi_summarizer_agent import MISummarizerAgent
 from agents.rca_agent import RCAAgent
 from agents.similar_incident_agent import SimilarIncidentAgent
 from models import IncidentContext, RawAlert
-from utils.llm_client import LLMClient
-from utils.logger import log
+from utils import deadline
+from utils.deadline import DeadlineExceeded
+from utils.incident_index import IncidentIndex
+from utils.llm_cache import volatile_scope, volatile_values
+from utils.llm_client import LLMClient, collect_usage, prompt_cache_summary
+from utils.logger import emit, log
+from utils.rate_limit import SEVERITY_PRIORITY, priority_scope
+from utils.tool_gateway import ToolGateway
+from utils.usage import process_usage, summarize
 
 # ─── ANSI helpers for the MI Brief ──────────────────────────────────────────
 _RST = "\033[0m"
@@ -25,88 +33,313 @@ _RED = "\033[1;31m"
 
 
 class MIBridgeOrchestrator:
-    def __init__(self, llm: LLMClient, tools: dict[str, Any]) -> None:
+    """Runs the agents as a dependency graph over IncidentContext fields.
+
+    Every agent's gather step (tool calls) starts as soon as the alert
+    arrives. Its analyze step waits only for the agents that write the
+    fields it declares in ``reads``.
+
+    Deadlines: each gather/analyze step is bounded by its agent's timeout and
+    the whole run by ``incident_timeout_seconds``; both propagate to the LLM
+    and tool calls underneath. If the graph is still running after
+    ``brief_deadline_seconds``, a partial brief is published with pending /
+    timed-out markers and late results are streamed as they land.
+
+    With ``rca_map_reduce``, RCA runs its CR audit, log analysis and
+    historical comparison as concurrent LLM calls followed by a synthesis
+    call, instead of one large prompt.
+    """
+
+    def __init__(
+        self,
+        llm: LLMClient,
+        tools: Mapping[str, Any],
+        print_brief: bool = True,
+        agent_timeout_seconds: float | dict[str, float] | None = 60.0,
+        incident_timeout_seconds: float | None = 180.0,
+        brief_deadline_seconds: float | None = 30.0,
+        rca_map_reduce: bool = False,
+        incident_index: IncidentIndex | None = None,
+    ) -> None:
         self.llm = llm
-        self.tools = tools
-
-        self.impact_agent = ImpactAnalysisAgent(llm=llm, tools=tools)
-        self.similar_agent = SimilarIncidentAgent(llm=llm, tools=tools)
-        self.summarizer_agent = MISummarizerAgent(llm=llm, tools=tools)
-        self.rca_agent = RCAAgent(llm=llm, tools=tools)
+        # Agents share one gateway, so identical tool calls are made once
+        self.tools = tools if isinstance(tools, ToolGateway) else ToolGateway(tools)
+        self.print_brief = print_brief
+        self.agent_timeout_seconds = agent_timeout_seconds
+        self.incident_timeout_seconds = incident_timeout_seconds
+        self.brief_deadline_seconds = brief_deadline_seconds
+
+        self.impact_agent = ImpactAnalysisAgent(llm=llm, tools=self.tools)
+        self.similar_agent = SimilarIncidentAgent(llm=llm, tools=self.tools, index=incident_index)
+        self.summarizer_agent = MISummarizerAgent(llm=llm, tools=self.tools)
+        self.rca_agent = RCAAgent(llm=llm, tools=self.tools, map_reduce=rca_map_reduce)
+
+        self.agents: list[BaseAgent] = [
+            self.impact_agent,
+            self.similar_agent,
+            self.summarizer_agent,
+            self.rca_agent,
+        ]
+        self._deps = self._build_graph(self.agents)
+        self._levels = self._compute_levels(self._deps)
+
+    def phase_of(self, name: str) -> int | None:
+        """Depth in the agent graph of the agent logging as `name` ("RCA", or
+        one of its sub-calls such as "RCA.changes"); None for other lines."""
+        return self._levels.get(name.split(".", 1)[0].upper())
+
+    @staticmethod
+    def _build_graph(agents: list[BaseAgent]) -> dict[str, set[str]]:
+        """Map each agent name to the names of the agents whose output it reads."""
+        writers: dict[str, str] = {}
+        for agent in agents:
+            for field in agent.writes:
+                if field in writers:
+                    raise ValueError(
+                        f"IncidentContext.{field} is written by both "
+                        f"{writers[field]} and {agent.name}"
+                    )
+                writers[field] = agent.name
+
+        return {
+            agent.name: {writers[f] for f in agent.reads if f in writers} - {agent.name}
+            for agent in agents
+        }
+
+    @staticmethod
+    def _compute_levels(deps: dict[str, set[str]]) -> dict[str, int]:
+        """Longest-path depth of each node (1 = no upstream). Raises on cycles."""
+        levels: dict[str, int] = {}
+
+        def visit(name: str, path: tuple[str, ...]) -> int:
+            if name in levels:
+                return levels[name]
+            if name in path:
+                cycle = " → ".join(path[path.index(name):] + (name,))
+                raise ValueError(f"Agent dependency cycle: {cycle}")
+            level = 1 + max((visit(d, path + (name,)) for d in deps[name]), default=0)
+            levels[name] = level
+            return level
+
+        for name in deps:
+            visit(name, ())
+        return levels
+
+    @staticmethod
+    def new_context(alert: RawAlert) -> IncidentContext:
+        return IncidentContext(
+            incident_id=alert.incident_id,
+            alert=alert,
+            created_at=datetime.now(timezone.utc),
+        )
 
-    async def handle_alert(self, alert: RawAlert) -> IncidentContext:
+    async def handle_alert(
+        self, alert: RawAlert, ctx: IncidentContext | None = None
+    ) -> IncidentContext:
+        """Run every agent for the alert. Pass ctx to run into a context the
+        caller already holds (e.g. one that may have later alerts folded in)."""
         log(
             "ORCHESTRATOR",
             f"Incident opened: {alert.incident_id} | {alert.title} | {alert.severity}",
         )
 
-        ctx = IncidentContext(
-            incident_id=alert.incident_id,
-            alert=alert,
-            created_at=datetime.now(timezone.utc),
-        )
+        if ctx is None:
+            ctx = self.new_context(alert)
 
         total_start = time.perf_counter()
 
-        # ── PHASE 1: Parallel ──────────────────────────────────────────────
-        log("ORCHESTRATOR", "━━━  PHASE 1 START  ━━━  (ImpactAnalysis + SimilarIncident in parallel)")
-        t0 = time.perf_counter()
-
-        await asyncio.gather(
-            self._run_agent(self.impact_agent, ctx),
-            self._run_agent(self.similar_agent, ctx),
-        )
-
-        ctx.phase_timings["phase_1"] = time.perf_counter() - t0
         log(
             "ORCHESTRATOR",
-            f"━━━  PHASE 1 COMPLETE  ━━━  wall_time={ctx.phase_timings['phase_1']:.2f}s",
+            f"━━━  GRAPH START  ━━━  ({len(self.agents)} agents, tool gathering starts immediately)",
         )
+        for agent in self.agents:
+            ctx.agent_status[agent.name] = "pending"
+        finished = {agent.name: asyncio.Event() for agent in self.agents}
+        first_record = len(ctx.llm_usage)
+        # Node tasks are created inside the scope, so they inherit the incident
+        # deadline, this incident's LLM usage sink, its rate-limit priority and
+        # the timestamps kept out of LLM cache keys
+        priority = SEVERITY_PRIORITY[ctx.alert.severity]
+        volatile = volatile_values(ctx.alert.timestamp, ctx.created_at)
+        with deadline.scope(self.incident_timeout_seconds), collect_usage(ctx.llm_usage):
+            with priority_scope(priority), volatile_scope(volatile):
+                graph = asyncio.gather(
+                    *(self._run_agent(agent, ctx, finished, total_start) for agent in self.agents)
+                )
 
-        # ── PHASE 2: Sequential ────────────────────────────────────────────
-        log("ORCHESTRATOR", "━━━  PHASE 2 START  ━━━  (MISummarizer)")
-        t1 = time.perf_counter()
-
-        await self._run_agent(self.summarizer_agent, ctx)
+        try:
+            if self.brief_deadline_seconds is not None:
+                done, _ = await asyncio.wait({graph}, timeout=self.brief_deadline_seconds)
+                if not done:
+                    self._publish_partial(ctx, total_start)
+            await graph
+        except asyncio.CancelledError:
+            graph.cancel()
+            raise
 
-        ctx.phase_timings["phase_2"] = time.perf_counter() - t1
+        ctx.phase_timings["total"] = time.perf_counter() - total_start
+        self._record_phase_spans(ctx)
+        emit("phase_timings", dict(ctx.phase_timings))
         log(
             "ORCHESTRATOR",
-            f"━━━  PHASE 2 COMPLETE  ━━━  wall_time={ctx.phase_timings['phase_2']:.2f}s",
+            f"━━━  GRAPH COMPLETE  ━━━  wall_time={ctx.phase_timings['total']:.2f}s",
         )
-
-        # ── PHASE 3: Sequential ────────────────────────────────────────────
-        log("ORCHESTRATOR", "━━━  PHASE 3 START  ━━━  (RCA)")
-        t2 = time.perf_counter()
-
-        await self._run_agent(self.rca_agent, ctx)
-
-        ctx.phase_timings["phase_3"] = time.perf_counter() - t2
+        # Folded re-runs append to the same context; count only this run's calls
+        process_usage.add(ctx.incident_id, ctx.llm_usage[first_record:])
+        ctx.usage_summary = summarize(ctx.llm_usage)
+        total = ctx.usage_summary["total"]
         log(
             "ORCHESTRATOR",
-            f"━━━  PHASE 3 COMPLETE  ━━━  wall_time={ctx.phase_timings['phase_3']:.2f}s",
+            f"LLM usage: {total['calls']} calls  in={total['input_tokens']} "
+            f"out={total['output_tokens']} latency={total['latency_s']:.2f}s "
+            f"retries={total['retries']} cost=${total['cost_usd']:.4f}",
         )
-
-        ctx.phase_timings["total"] = time.perf_counter() - total_start
+        # Dry-run records carry estimates only and never touch the prompt cache
+        billed = [r for r in ctx.llm_usage if not r.get("estimated")]
+        if billed:
+            ctx.prompt_cache = prompt_cache_summary(billed)
+            pc = ctx.prompt_cache
+            log(
+                "ORCHESTRATOR",
+                f"Prompt cache: {pc['calls']} calls  read={pc['cache_read_tokens']} "
+                f"write={pc['cache_write_tokens']} uncached={pc['uncached_input_tokens']} "
+                f"hit_rate={pc['hit_rate']:.0%}",
+            )
 
         # ── PRINT MI BRIEF ─────────────────────────────────────────────────
-        self._print_mi_brief(ctx)
+        if self.print_brief:
+            self._print_mi_brief(ctx, "UPDATED" if ctx.partial_brief_at is not None else "")
 
         return ctx
 
-    async def _run_agent(self, agent: Any, ctx: IncidentContext) -> None:
+    def json_stats(self) -> dict[str, Any]:
+        """How agents' LLM replies were turned into JSON, per agent and in total."""
+        per_agent = {agent.name: dict(agent.json_stats) for agent in self.agents}
+        totals = {
+            key: sum(stats[key] for stats in per_agent.values())
+            for key in ("calls", "repaired", "retried", "failed")
+        }
+        calls = totals["calls"]
+        totals["repair_rate"] = round(totals["repaired"] / calls, 3) if calls else 0.0
+        totals["retry_rate"] = round(totals["retried"] / calls, 3) if calls else 0.0
+        return {"total": totals, "per_agent": per_agent}
+
+    def _agent_timeout(self, agent: BaseAgent) -> float | None:
+        if isinstance(self.agent_timeout_seconds, dict):
+            return self.agent_timeout_seconds.get(agent.name)
+        return self.agent_timeout_seconds
+
+    async def _run_agent(
+        self,
+        agent: BaseAgent,
+        ctx: IncidentContext,
+        finished: dict[str, asyncio.Event],
+        t0: float,
+    ) -> None:
+        node = agent.name.lower()
+        timeout = self._agent_timeout(agent)
         try:
-            await agent.run(ctx)
+            # Tool gathering never waits on upstream agents
+            ctx.agent_status[agent.name] = "running"
+            with deadline.scope(timeout):
+                evidence = await self._timed(ctx, f"{node}.gather", t0, agent.gather(ctx))
+
+            upstream = sorted(self._deps[agent.name])
+            if upstream:
+                pending = [u for u in upstream if not finished[u].is_set()]
+                if pending:
+                    ctx.agent_status[agent.name] = "waiting"
+                    log("ORCHESTRATOR", f"{agent.name} evidence ready — waiting on {', '.join(pending)}")
+                await asyncio.gather(*(finished[u].wait() for u in upstream))
+
+            ctx.agent_status[agent.name] = "running"
+            with deadline.scope(timeout):
+                await self._timed(ctx, f"{node}.analyze", t0, agent.analyze(ctx, evidence))
+            ctx.agent_status[agent.name] = "done"
+            if ctx.partial_brief_at is not None:
+                log("ORCHESTRATOR", f"Late result: {agent.name} landed after the partial brief")
+            self._publish_outputs(agent, ctx)
+        except DeadlineExceeded as exc:
+            ctx.agent_status[agent.name] = "timed_out"
+            log("ERROR", f"Agent {agent.name} timed out: {exc}")
         except Exception as exc:
+            ctx.agent_status[agent.name] = "failed"
             log("ERROR", f"Agent {agent.name} failed: {exc}")
             # Leave the relevant ctx field as None and continue
-
-    def _print_mi_brief(self, ctx: IncidentContext) -> None:
+        finally:
+            # Downstream agents proceed either way; a failed upstream reads as None
+            finished[agent.name].set()
+
+    def _publish_partial(self, ctx: IncidentContext, t0: float) -> None:
+        """Publish whatever the graph has produced so far, marking the rest."""
+        ctx.partial_brief_at = time.perf_counter() - t0
+        outstanding = [
+            f"{name}={status}"
+            for name, status in ctx.agent_status.items()
+            if status != "done"
+        ]
+        log(
+            "ORCHESTRATOR",
+            f"━━━  PARTIAL BRIEF  ━━━  at {ctx.partial_brief_at:.1f}s — "
+            f"outstanding: {', '.join(outstanding)}",
+        )
+        emit("partial_brief", ctx.model_dump(mode="json"))
+        if self.print_brief:
+            self._print_mi_brief(ctx, "PARTIAL")
+
+    @staticmethod
+    def _publish_outputs(agent: BaseAgent, ctx: IncidentContext) -> None:
+        """Stream each validated output the agent wrote as soon as it exists."""
+        for field in agent.writes:
+            value = getattr(ctx, field)
+            if value is not None:
+                emit(
+                    "agent_output",
+                    {"agent": agent.name, "field": field, "output": value.model_dump(mode="json")},
+                )
+
+    @staticmethod
+    async def _timed(ctx: IncidentContext, node: str, t0: float, coro: Any) -> Any:
+        """Await coro, recording node start/finish (seconds since incident start)."""
+        start = time.perf_counter() - t0
+        ctx.phase_timings[f"{node}.start"] = start
+        emit("timing", {"node": node, "status": "start", "start": start})
+        try:
+            return await coro
+        finally:
+            finish = time.perf_counter() - t0
+            ctx.phase_timings[f"{node}.finish"] = finish
+            emit("timing", {"node": node, "status": "finish", "start": start, "finish": finish})
+            log("TIMING", f"{node} {start:.2f}s → {finish:.2f}s")
+
+    def _record_phase_spans(self, ctx: IncidentContext) -> None:
+        """Derive phase_N spans from node finish times, grouped by graph depth.
+
+        phase_N is the critical-path time between the last depth N-1 analyze
+        step finishing and the last depth N one finishing, so the phases still
+        add up to the total wall time.
+        """
+        level_end: dict[int, float] = {}
+        for agent in self.agents:
+            level = self._levels[agent.name]
+            finish = ctx.phase_timings.get(f"{agent.name.lower()}.analyze.finish")
+            if finish is None:
+                finish = ctx.phase_timings.get(f"{agent.name.lower()}.gather.finish", 0.0)
+            level_end[level] = max(level_end.get(level, 0.0), finish)
+
+        previous = 0.0
+        for level in sorted(level_end):
+            end = max(level_end[level], previous)
+            ctx.phase_timings[f"phase_{level}"] = end - previous
+            previous = end
+
+    def _print_mi_brief(self, ctx: IncidentContext, label: str = "") -> None:
         alert = ctx.alert
         impact = ctx.impact_analysis
         similar = ctx.similar_incidents
         summary = ctx.mi_summary
         rca = ctx.rca
+        provisional = ctx.provisional_rca if rca is None else None
         pt = ctx.phase_timings
 
         width = 58
@@ -115,8 +348,20 @@ class MIBridgeOrchestrator:
         def section(icon: str, title: str) -> str:
             return f"\n{_BOLD}{icon}  {title}{_RST}"
 
+        def streamed(agent_name: str, path: str) -> Any:
+            return ctx.early_fields.get(f"{agent_name}.{path}")
+
+        def missing(agent_name: str, what: str) -> str:
+            status = ctx.agent_status.get(agent_name, "failed")
+            if status == "timed_out":
+                return f"   {_RED}({what} TIMED OUT){_RST}"
+            if status in ("pending", "running", "waiting"):
+                return f"   {_YLW}({what} PENDING — {agent_name} {status}){_RST}"
+            return f"   {_RED}({what} unavailable){_RST}"
+
         print(f"\n{_GREEN}╔{bar}╗")
-        title_line = f"  MI BRIEF  ·  {alert.severity}  ·  {alert.title}"
+        brief = f"MI BRIEF ({label})" if label else "MI BRIEF"
+        title_line = f"  {brief}  ·  {alert.severity}  ·  {alert.title}"
         print(f"║{title_line:<{width}}║")
         print(f"╚{bar}╝{_RST}")
 
@@ -126,7 +371,9 @@ class MIBridgeOrchestrator:
             print(f"   {_BOLD}{summary.headline}{_RST}")
             print(f"   {summary.narrative}")
         else:
-            print(f"   {_RED}(summary unavailable){_RST}")
+            if streamed("SUMMARIZER", "headline"):
+                print(f"   {_BOLD}{streamed('SUMMARIZER', 'headline')}{_RST}  {_DIM}(streamed){_RST}")
+            print(missing("SUMMARIZER", "summary"))
 
         # ── BLAST RADIUS ─────────────────────────────────────────────────
         print(section("💥", "BLAST RADIUS"))
@@ -139,7 +386,10 @@ class MIBridgeOrchestrator:
             print(f"   Revenue impact:  {impact.revenue_impact_per_minute}/min")
             print(f"   Confidence:      {impact.confidence * 100:.0f}%")
         else:
-            print(f"   {_RED}(impact analysis unavailable){_RST}")
+            if streamed("IMPACT", "blast_radius"):
+                blast = " → ".join(streamed("IMPACT", "blast_radius"))
+                print(f"   Services:        {blast}  {_DIM}(streamed){_RST}")
+            print(missing("IMPACT", "impact analysis"))
 
         # ── ROOT CAUSE ───────────────────────────────────────────────────
         print(section("🔍", "ROOT CAUSE"))
@@ -149,7 +399,16 @@ class MIBridgeOrchestrator:
             print(f"       Evidence:   {top.get('evidence', 'N/A')}")
             print(f"       Confidence: {top.get('confidence_pct', 'N/A')}%")
         else:
-            print(f"   {_RED}(RCA unavailable){_RST}")
+            top = streamed("RCA", "probable_root_causes[0]")
+            if isinstance(top, dict):
+                print(f"   #1  {top.get('cause', 'N/A')}  {_DIM}(streamed){_RST}")
+                print(f"       Confidence: {top.get('confidence_pct', 'N/A')}%")
+            elif provisional and provisional.probable_root_causes:
+                top = provisional.probable_root_causes[0]
+                print(f"   #1  {top.get('cause', 'N/A')}  {_DIM}(provisional — signature match){_RST}")
+                print(f"       Evidence:   {top.get('evidence', 'N/A')}")
+                print(f"       Confidence: {top.get('confidence_pct', 'N/A')}%")
+            print(missing("RCA", "RCA"))
 
         # ── CORRELATED CR ────────────────────────────────────────────────
         print(section("🔧", "CORRELATED CHANGE REQUEST"))
@@ -161,6 +420,14 @@ class MIBridgeOrchestrator:
             print(f"   Rollback candidate: {rollback_yn}")
         elif rca and rca.rollback_candidate:
             print(f"   Rollback candidate: {rca.rollback_candidate}")
+        elif provisional and provisional.rollback_candidate:
+            print(
+                f"   Rollback candidate: {provisional.rollback_candidate}  "
+                f"{_DIM}(provisional at {ctx.provisional_rca_at:.2f}s){_RST}"
+            )
+            print(missing("RCA", "LLM confirmation"))
+        elif not rca:
+            print(missing("RCA", "change request correlation"))
         else:
             print(f"   {_DIM}No correlated CRs identified{_RST}")
 
@@ -174,7 +441,7 @@ class MIBridgeOrchestrator:
                 print(f"   • {_BOLD}{team}{_RST} — {reason}")
                 print(f"     Contact: {contact}")
         else:
-            print(f"   {_RED}(team data unavailable){_RST}")
+            print(missing("SUMMARIZER", "team data"))
 
         # ── NEXT STEPS ───────────────────────────────────────────────────
         print(section("✅", "NEXT STEPS"))
@@ -182,7 +449,7 @@ class MIBridgeOrchestrator:
             for i, step in enumerate(summary.next_steps, 1):
                 print(f"   {i}. {step}")
         else:
-            print(f"   {_RED}(next steps unavailable){_RST}")
+            print(missing("SUMMARIZER", "next steps"))
 
         # ── SIMILAR PAST INCIDENT ────────────────────────────────────────
         print(section("🔁", "SIMILAR PAST INCIDENT"))
@@ -192,18 +459,47 @@ class MIBridgeOrchestrator:
             print(f"   Resolved in: {top.resolution_time_minutes} min")
             print(f"   How: {top.resolution}")
             print(f"   Suggested runbook: {similar.suggested_runbook}")
+        elif ctx.agent_status.get("SIMILAR") != "done":
+            print(missing("SIMILAR", "similar incidents"))
         else:
             print(f"   {_DIM}No similar incidents found{_RST}")
 
-        # ── PHASE TIMINGS ────────────────────────────────────────────────
-        print(section("⏱ ", "PHASE TIMINGS"))
-        phase1 = pt.get("phase_1", 0)
-        phase2 = pt.get("phase_2", 0)
-        phase3 = pt.get("phase_3", 0)
-        total = pt.get("total", phase1 + phase2 + phase3)
-        print(f"   {_DIM}Phase 1 (parallel):  {phase1:.2f}s")
-        print(f"   Phase 2 (summarize): {phase2:.2f}s")
-        print(f"   Phase 3 (RCA):       {phase3:.2f}s")
-        print(f"   Total:               {total:.2f}s{_RST}")
+        # ── NODE TIMINGS ─────────────────────────────────────────────────
+        print(section("⏱ ", "NODE TIMINGS"))
+        for agent in self.agents:
+            node = agent.name.lower()
+            cells = []
+            for step in ("gather", "analyze"):
+                start = pt.get(f"{node}.{step}.start")
+                finish = pt.get(f"{node}.{step}.finish")
+                if start is None or finish is None:
+                    cells.append(f"{step} —".ljust(22))
+                else:
+                    cells.append(f"{step} {start:.2f}→{finish:.2f}s".ljust(22))
+            print(f"   {_DIM}{agent.name:<11} {'  '.join(cells)}{_RST}")
+            # Map-reduce RCA's sub-calls, by duration
+            parts = [
+                f"{key.split('.', 1)[1]} {seconds:.2f}s"
+                for key, seconds in pt.items()
+                if key.startswith(f"{node}.") and key.count(".") == 1
+            ]
+            if parts:
+                print(f"   {_DIM}{'':<11} ↳ {'  '.join(parts)}{_RST}")
+        print(f"   {_DIM}Total:      {pt.get('total', 0):.2f}s{_RST}")
+
+        # ── LLM USAGE ────────────────────────────────────────────────────
+        usage = summarize(ctx.llm_usage)
+        if usage["total"]["calls"]:
+            estimated = any(r.get("estimated") for r in ctx.llm_usage)
+            print(section("💰", "LLM USAGE" + (" (estimated)" if estimated else "")))
+            rows = [*usage["per_agent"].items(), ("Total", usage["total"])]
+            for name, row in rows:
+                print(
+                    f"   {_DIM}{name:<13} calls={row['calls']:<2} "
+                    f"in={row['input_tokens']:<6} out={row['output_tokens']:<5} "
+                    f"cache_read={row['cache_read_input_tokens']:<6} "
+                    f"latency={row['latency_s']:.2f}s retries={row['retries']} "
+                    f"${row['cost_usd']:.4f}{_RST}"
+                )
 
         print(f"\n{_DIM}{'═' * width}{_RST}\n")
@@ -10,6 +10,8 @@ Then open: http://localhost:8000
 
 from __future__ import annotations
 
+import asyncio
+import json
 import os
 import sys
 import time
@@ -21,13 +23,16 @@ sys.path.insert(0, _HERE)
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 
+from coalescer import AlertCoalescer
 from models import RawAlert, IncidentContext
 from orchestrator import MIBridgeOrchestrator
 from tools import mock_dynatrace, mock_splunk, mock_servicenow, mock_pagerduty
+from utils.llm_cache import CachedLLMClient
 from utils.llm_client import DryRunLLMClient
-from utils.logger import _log_sink
+from utils.logger import capture
+from utils.usage import process_usage
 
 # ─── App setup ───────────────────────────────────────────────────────────────
 
@@ -42,35 +47,18 @@ app.add_middleware(
 
 # ─── Phase annotation ─────────────────────────────────────────────────────────
 
-_AGENT_PHASE: dict[str, int] = {
-    "IMPACT": 1,
-    "SIMILAR": 1,
-    "SUMMARIZER": 2,
-    "RCA": 3,
-}
+
+def _annotate_phase(entry: dict) -> dict:
+    """Assign a phase number (1/2/3) to a log entry so the frontend can
+    reveal it in the right phase section: the logging agent's depth in the
+    orchestrator's dependency graph, sub-calls such as "RCA.CHANGES"
+    included. Orchestrator and tool lines have none."""
+    return {**entry, "phase": _orchestrator.phase_of(entry["agent"])}
 
 
 def _annotate_phases(raw_logs: list[dict]) -> list[dict]:
-    """Assign a phase number (1/2/3) to each log entry so the frontend can
-    reveal them incrementally as the user steps through phases."""
-    annotated = []
-    for entry in raw_logs:
-        agent = entry["agent"]
-        phase = _AGENT_PHASE.get(agent)
-
-        # Orchestrator boundary messages — infer from text
-        if agent == "ORCHESTRATOR" and phase is None:
-            msg = entry["message"]
-            if "PHASE 1" in msg:
-                phase = 1
-            elif "PHASE 2" in msg:
-                phase = 2
-            elif "PHASE 3" in msg:
-                phase = 3
-            # else: None — pre-run / post-run orchestrator messages
-
-        annotated.append({**entry, "phase": phase})
-    return annotated
+    """Annotate every captured log entry with its phase number."""
+    return [_annotate_phase(entry) for entry in raw_logs]
 
 
 # ─── Alert + tools factory (mirrors main.py) ─────────────────────────────────
@@ -119,6 +107,16 @@ def _build_tools() -> dict:
     }
 
 
+# Shared across requests and both routes, so re-running the same evidence is
+# answered from the LLM response cache.
+_llm = CachedLLMClient(DryRunLLMClient())
+
+# Shared across requests so re-fired alerts for the same Dynatrace problem
+# join the run already in flight instead of starting another pipeline.
+_orchestrator = MIBridgeOrchestrator(llm=_llm, tools=_build_tools())
+_coalescer = AlertCoalescer(_orchestrator, fold_window_seconds=30.0)
+
+
 # ─── Routes ──────────────────────────────────────────────────────────────────
 
 @app.get("/")
@@ -132,37 +130,86 @@ async def health() -> dict:
     return {"status": "ok", "mode": "dry-run", "version": "1.0.0"}
 
 
+@app.get("/api/usage")
+async def llm_usage() -> dict:
+    """LLM calls, tokens, latency, retries and cost since the server started,
+    in total and per agent. Per-incident figures are in each run's
+    `usage_summary`."""
+    return process_usage.summary()
+
+
+def _build_result(ctx: IncidentContext, log_entries: list[dict], wall_total: float) -> dict:
+    # Serialize IncidentContext — Pydantic v2 handles datetime → ISO str, etc.
+    result = ctx.model_dump(mode="json")
+
+    # Attach annotated logs (phase field added so frontend can filter by phase)
+    result["log_entries"] = _annotate_phases(log_entries)
+    result["wall_total_seconds"] = round(wall_total, 3)
+    return result
+
+
 @app.post("/api/run")
 async def run_simulation() -> JSONResponse:
     """Run the full MI Bridge dry-run pipeline and return structured JSON.
 
     Returns the complete IncidentContext (all phase outputs + phase timings)
     plus a `log_entries` list of annotated agent log lines for the sidebar.
+    Concurrent requests for the same problem share one coalesced run.
     """
-    # Set up the log capture sink for this request
-    log_entries: list[dict] = []
-    token = _log_sink.set(log_entries)
-
     wall_start = time.perf_counter()
-    try:
-        alert = _build_alert()
-        tools = _build_tools()
-        llm = DryRunLLMClient()
-        orchestrator = MIBridgeOrchestrator(llm=llm, tools=tools)
-        ctx: IncidentContext = await orchestrator.handle_alert(alert)
-    finally:
-        _log_sink.reset(token)
-
+    ctx: IncidentContext = await _coalescer.handle_alert(_build_alert())
     wall_total = time.perf_counter() - wall_start
 
-    # Serialize IncidentContext — Pydantic v2 handles datetime → ISO str, etc.
-    result = ctx.model_dump(mode="json")
+    # The shared run captures its own logs onto the context
+    return JSONResponse(content=_build_result(ctx, ctx.log_entries, wall_total))
 
-    # Attach annotated logs (phase field added so frontend can filter by phase)
-    result["log_entries"] = _annotate_phases(log_entries)
-    result["wall_total_seconds"] = round(wall_total, 3)
 
-    return JSONResponse(content=result)
+@app.get("/api/run/stream")
+async def run_simulation_stream() -> StreamingResponse:
+    """Run the dry-run pipeline, streaming progress as Server-Sent Events.
+
+    Events: `log` (annotated log entry), `timing` (node start/finish),
+    `agent_field` (a key field streamed out of an LLM reply still in
+    progress), `provisional_rca` (RCA's signature-based result, published
+    before its LLM call), `agent_output` (validated agent output),
+    `partial_brief` (context snapshot with `agent_status` markers, if the
+    brief deadline passes first), `phase_timings`, then a final `complete` carrying the same payload as
+    POST /api/run (or `error`).
+    """
+    queue: asyncio.Queue[tuple[str, dict] | None] = asyncio.Queue()
+
+    async def pipeline() -> None:
+        log_entries: list[dict] = []
+        wall_start = time.perf_counter()
+        try:
+            with capture(log_entries, on_event=lambda event, data: queue.put_nowait((event, data))):
+                orchestrator = MIBridgeOrchestrator(llm=_llm, tools=_build_tools())
+                ctx = await orchestrator.handle_alert(_build_alert())
+            wall_total = time.perf_counter() - wall_start
+            queue.put_nowait(("complete", _build_result(ctx, log_entries, wall_total)))
+        except Exception as exc:
+            queue.put_nowait(("error", {"message": str(exc)}))
+        finally:
+            queue.put_nowait(None)
+
+    async def event_stream():
+        task = asyncio.create_task(pipeline())
+        try:
+            while (item := await queue.get()) is not None:
+                event, data = item
+                if event == "log":
+                    data = _annotate_phase(data)
+                yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        finally:
+            # Client disconnected mid-run — stop the pipeline
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # ─── Entry point ─────────────────────────────────────────────────────────────
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Ensure the project root is on sys.path so tests import it as main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
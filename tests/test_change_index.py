@@ -0,0 +1,71 @@
+from agents.rca_agent import RCAAgent
+from utils.change_index import ChangeRequestIndex, change_risk
+from utils.llm_client import DryRunLLMClient
+
+ONSET = "2024-01-15T14:00:00Z"
+
+
+def _cr(cr_id, service, deployed_at, **extra):
+    return {"cr_id": cr_id, "service": service, "deployed_at": deployed_at, "title": "", **extra}
+
+
+def _index():
+    return ChangeRequestIndex([
+        _cr("CR1", "inventory", "2024-01-15T12:00:00Z",
+            config_change={"parameter": "maximum-pool-size", "old_value": "20", "new_value": "10"}),
+        _cr("CR2", "gateway", "2024-01-15T08:00:00Z", title="Update CDN origin routing"),
+        _cr("CR3", "inventory", "2024-01-13T12:00:00Z"),
+        _cr("CR4", "orders", "2024-01-15T13:30:00Z", title="Add audit log field"),
+        _cr("CR5", "inventory", "2024-01-15T14:30:00Z"),
+    ])
+
+
+def test_window_is_inclusive_and_ordered_oldest_first():
+    index = _index()
+    assert len(index) == 5
+    found = index.window(["inventory", "gateway", "orders"], until=ONSET, hours=6)
+    assert [cr["cr_id"] for cr in found] == ["CR2", "CR1", "CR4"]
+    # Both ends are inclusive
+    assert [cr["cr_id"] for cr in index.window(["gateway"], until="2024-01-15T14:00:00Z", hours=6)] == ["CR2"]
+    assert [cr["cr_id"] for cr in index.window(["inventory"], until="2024-01-15T12:00:00Z", hours=0)] == ["CR1"]
+
+
+def test_window_without_bounds():
+    index = _index()
+    assert [cr["cr_id"] for cr in index.window(["inventory"])] == ["CR3", "CR1", "CR5"]
+    assert [cr["cr_id"] for cr in index.window(["inventory"], until=ONSET)] == ["CR3", "CR1"]
+    assert index.window(["unknown"], until=ONSET, hours=24) == []
+
+
+def test_add_keeps_each_service_sorted():
+    index = _index()
+    index.add(_cr("CR6", "inventory", "2024-01-14T12:00:00Z"))
+    assert [cr["cr_id"] for cr in index.window(["inventory"])] == ["CR3", "CR6", "CR1", "CR5"]
+
+
+def test_suspects_rank_recent_risky_nearby_changes_first():
+    index = _index()
+    suspects = index.suspects(
+        {"inventory": 0, "orders": 1, "gateway": 2}, ONSET, hours=24,
+        error_counts={"inventory": 90, "orders": 10},
+    )
+    assert [cr["cr_id"] for cr in suspects] == ["CR1", "CR4", "CR2"]
+    top = suspects[0]
+    assert top["hours_before_onset"] == 2.0
+    assert top["suspect_factors"] == {"recency": 0.5, "proximity": 1.0, "risk": 1.0, "errors": 1.0}
+    assert top["suspect_score"] == round(0.35 * 0.5 + 0.2 + 0.2 + 0.25, 3)
+    assert suspects[2]["suspect_factors"]["risk"] == change_risk(suspects[2]) == 0.2
+    # Scored copies; the indexed CRs are untouched
+    assert "suspect_score" not in index.window(["inventory"], until=ONSET, hours=3)[0]
+
+
+def test_change_fetch_covers_both_possible_onsets():
+    agent = RCAAgent(llm=DryRunLLMClient(), tools={})
+    alerted = "2024-01-15T14:00:00+00:00"
+    assert agent._change_windows(alerted, None) == [(alerted, 24)]
+    # Errors logged from half an hour before the alert: one span covering both
+    assert agent._change_windows(alerted, "2024-01-15T13:30:00Z") == [(alerted, 24.5)]
+    # Evidence far from the alert time: one window before each
+    assert agent._change_windows(alerted, "2024-01-10T09:00:00Z") == [
+        ("2024-01-10T09:00:00Z", 24), (alerted, 24),
+    ]
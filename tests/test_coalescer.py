@@ -0,0 +1,132 @@
+import asyncio
+
+from coalescer import AlertCoalescer, incident_key, merge_alerts
+from engine import IncidentEngine
+from main import _build_alert, _build_tools
+from orchestrator import MIBridgeOrchestrator
+from utils.dry_run_latency import AgentProfile, FixedLatency, LatencySimulator
+from utils.llm_client import DryRunLLMClient
+
+
+def _alert(**update):
+    return _build_alert().model_copy(update=update)
+
+
+class _GatedOrchestrator:
+    """Stands in for MIBridgeOrchestrator: each run waits for `release`."""
+
+    def __init__(self) -> None:
+        self.runs = 0
+        self.release = asyncio.Event()
+        self.seen = []
+
+    new_context = staticmethod(MIBridgeOrchestrator.new_context)
+
+    async def handle_alert(self, alert, ctx):
+        self.runs += 1
+        await self.release.wait()
+        self.seen.append(ctx.alert)
+        return ctx
+
+
+def test_merge_escalates_severity_and_unions_services():
+    base = _alert(severity="P2", affected_services=["a", "b"], error_rate=0.1)
+    update = _alert(
+        incident_id="INC-OTHER", severity="P1", affected_services=["b", "c"], error_rate=0.4,
+        raw_payload={"problem_id": "P-8821", "status": "OPEN", "extra": 1},
+    )
+    merged = merge_alerts(base, update)
+    assert merged.incident_id == base.incident_id
+    assert merged.timestamp == base.timestamp
+    assert merged.severity == "P1"
+    assert merged.affected_services == ["a", "b", "c"]
+    assert merged.error_rate == 0.4
+    assert merged.raw_payload["extra"] == 1 and "alert_events" in merged.raw_payload
+    # Lower severity never downgrades
+    assert merge_alerts(update, base).severity == "P1"
+
+
+def test_incident_key_prefers_the_source_problem_id():
+    assert incident_key(_alert()) == incident_key(_alert(incident_id="INC-REFIRED")) == "dynatrace:P-8821"
+    assert incident_key(_alert(raw_payload={})) == "incident:INC-2077-FLASHSALE"
+
+
+def test_duplicates_share_one_run_and_fold_into_the_alert():
+    async def run():
+        orchestrator = _GatedOrchestrator()
+        coalescer = AlertCoalescer(orchestrator, fold_window_seconds=30.0)
+        first = asyncio.create_task(coalescer.handle_alert(_alert(severity="P2", error_rate=0.2)))
+        second = asyncio.create_task(coalescer.handle_alert(_alert(severity="P1", error_rate=0.5)))
+        await asyncio.sleep(0)
+        assert coalescer.in_flight() == ["dynatrace:P-8821"]
+        assert coalescer.fold(_alert(affected_services=["search-service"], error_rate=0.6))
+        orchestrator.release.set()
+        ctx1, ctx2 = await asyncio.gather(first, second)
+        assert ctx1 is ctx2
+        assert orchestrator.runs == 1
+        assert ctx1.coalesced_alerts == 2
+        assert (ctx1.alert.severity, ctx1.alert.error_rate) == ("P1", 0.6)
+        assert "search-service" in ctx1.alert.affected_services
+        assert coalescer.stats() == {"in_flight": 0, "runs": 1, "coalesced": 2, "folded": 2}
+        # Nothing in flight any more
+        assert not coalescer.fold(_alert())
+
+    asyncio.run(run())
+
+
+def test_duplicates_outside_the_fold_window_share_the_result_only():
+    async def run():
+        orchestrator = _GatedOrchestrator()
+        coalescer = AlertCoalescer(orchestrator, fold_window_seconds=0.0)
+        first = asyncio.create_task(coalescer.handle_alert(_alert(error_rate=0.2)))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(coalescer.handle_alert(_alert(error_rate=0.9)))
+        await asyncio.sleep(0)
+        orchestrator.release.set()
+        ctx, _ = await asyncio.gather(first, second)
+        assert ctx.alert.error_rate == 0.2
+        assert coalescer.stats()["folded"] == 0 and ctx.coalesced_alerts == 1
+
+    asyncio.run(run())
+
+
+def _engine() -> IncidentEngine:
+    llm = DryRunLLMClient(latency=LatencySimulator(default=AgentProfile(FixedLatency(0.0))))
+    return IncidentEngine(llm, _build_tools(), max_incidents=2)
+
+
+def test_engine_runs_each_incident_once():
+    async def run():
+        async with _engine() as engine:
+            contexts = await engine.run_batch([
+                _alert(),
+                _alert(incident_id="INC-REFIRED", error_rate=0.5),
+                _alert(incident_id="INC-OTHER", raw_payload={}),
+            ])
+        assert contexts[0] is contexts[1]
+        assert contexts[2] is not contexts[0]
+        assert contexts[0].coalesced_alerts == 1
+        assert contexts[0].alert.error_rate == 0.5
+        assert engine.stats()["completed"] == 2
+        assert engine.coalesced == 1
+
+    asyncio.run(run())
+
+
+def test_engine_starts_a_new_run_for_a_duplicate_too_late_to_join():
+    async def run():
+        async with _engine() as engine:
+            key = incident_key(_alert())
+            # A run that has finished and left the coalescer, with its result
+            # not yet delivered to the submitters
+            undelivered = asyncio.get_running_loop().create_future()
+            engine._pending[key] = undelivered
+            late = engine.submit(_alert(incident_id="INC-LATE"))
+            assert late is not undelivered
+            assert engine.coalesced == 0
+            ctx = await late
+            undelivered.cancel()
+        assert ctx.incident_id == "INC-LATE"
+        assert engine.stats()["completed"] == 1
+
+    asyncio.run(run())
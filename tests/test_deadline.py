@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+from main import _build_alert, _build_tools
+from orchestrator import MIBridgeOrchestrator
+from utils import deadline
+from utils.deadline import DeadlineExceeded, run_with_deadline
+from utils.dry_run_latency import AgentProfile, FixedLatency, LatencySimulator
+from utils.llm_client import DryRunLLMClient
+from utils.logger import capture
+
+
+def test_scope_never_extends_an_outer_deadline():
+    assert deadline.remaining() is None
+    with deadline.scope(10.0):
+        outer = deadline.remaining()
+        with deadline.scope(60.0):
+            assert deadline.remaining() <= outer
+        with deadline.scope(0.5):
+            assert deadline.remaining() <= 0.5
+        with deadline.scope(None):
+            assert deadline.remaining() <= outer
+        assert deadline.timeout_kwargs()["timeout"] <= outer
+    assert deadline.remaining() is None
+    assert deadline.timeout_kwargs() == {}
+
+
+def test_run_with_deadline_returns_within_budget():
+    async def run() -> str:
+        with deadline.scope(1.0):
+            return await run_with_deadline(asyncio.sleep(0.01, result="ok"), "fast call")
+
+    assert asyncio.run(run()) == "ok"
+
+
+def test_run_with_deadline_cancels_work_past_the_deadline():
+    cancelled = []
+
+    async def slow() -> None:
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run() -> None:
+        with deadline.scope(0.05):
+            await run_with_deadline(slow(), "slow call")
+
+    started = time.perf_counter()
+    with pytest.raises(DeadlineExceeded, match="slow call"):
+        asyncio.run(run())
+    assert time.perf_counter() - started < 1
+    assert cancelled == [True]
+
+
+def test_run_with_deadline_fails_fast_once_the_deadline_has_passed():
+    async def run() -> None:
+        with deadline.scope(0.0):
+            await asyncio.sleep(0.01)
+            await run_with_deadline(asyncio.sleep(5), "late call")
+
+    with pytest.raises(DeadlineExceeded, match="already passed"):
+        asyncio.run(run())
+
+
+def _orchestrator(**kwargs) -> MIBridgeOrchestrator:
+    # Every agent answers at once except RCA
+    latency = LatencySimulator(
+        {"RCA": AgentProfile(FixedLatency(0.4))}, default=AgentProfile(FixedLatency(0.0))
+    )
+    return MIBridgeOrchestrator(
+        llm=DryRunLLMClient(latency=latency), tools=_build_tools(), print_brief=False, **kwargs
+    )
+
+
+def test_partial_brief_is_published_while_rca_is_still_running():
+    events: list[tuple[str, dict]] = []
+
+    async def run():
+        with capture(on_event=lambda event, data: events.append((event, data))):
+            return await _orchestrator(brief_deadline_seconds=0.2).handle_alert(_build_alert())
+
+    ctx = asyncio.run(run())
+    partial = [data for event, data in events if event == "partial_brief"]
+    assert len(partial) == 1
+    assert partial[0]["agent_status"]["RCA"] == "running"
+    assert partial[0]["impact_analysis"] is not None
+    assert partial[0]["rca"] is None
+    # The run carries on and the late result lands on the same context
+    assert ctx.partial_brief_at is not None and ctx.partial_brief_at >= 0.2
+    assert ctx.agent_status["RCA"] == "done" and ctx.rca is not None
+
+
+def test_agent_past_its_deadline_is_marked_timed_out():
+    ctx = asyncio.run(
+        _orchestrator(agent_timeout_seconds={"RCA": 0.1}, brief_deadline_seconds=None)
+        .handle_alert(_build_alert())
+    )
+    assert ctx.agent_status["RCA"] == "timed_out"
+    assert ctx.rca is None
+    assert ctx.partial_brief_at is None
+    assert {ctx.agent_status[name] for name in ("IMPACT", "SIMILAR", "SUMMARIZER")} == {"done"}
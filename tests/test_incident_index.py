@@ -0,0 +1,102 @@
+import math
+import random
+
+import pytest
+
+from main import _build_tools
+from orchestrator import MIBridgeOrchestrator
+from tools.synthetic_scenario import SyntheticScenario
+from utils.incident_index import TEXT_WEIGHT, IncidentIndex, tokenize
+from utils.llm_client import DryRunLLMClient
+
+
+def _unpruned(index: IncidentIndex, text: str, services, k: int) -> list[tuple[str, float]]:
+    """Every incident scored in full, in the same term order the search uses."""
+    n = len(index._docs)
+    terms = []
+    for term in set(tokenize(text)):
+        postings = index._postings.get(term)
+        if postings:
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            terms.append((idf, term))
+    terms.sort(key=lambda t: (-t[0], t[1]))
+    attainable = (sum(idf for idf, _ in terms) or 1.0) * (index.k1 + 1)
+    avg_length = index._total_length / n or 1.0
+    wanted = frozenset(services)
+
+    scores = {}
+    for incident_id in index._docs:
+        theirs = index._services[incident_id]
+        overlap = len(wanted & theirs) / len(wanted | theirs) if wanted & theirs else 0.0
+        score = (1 - TEXT_WEIGHT) * overlap
+        matched = bool(overlap)
+        for idf, term in terms:
+            tf = index._term_freqs[incident_id].get(term)
+            if tf:
+                part = idf * tf * (index.k1 + 1) / (
+                    tf + index.k1 * (1 - index.b + index.b * index._lengths[incident_id] / avg_length)
+                )
+                score += TEXT_WEIGHT * part / attainable
+                matched = True
+        if matched:
+            scores[incident_id] = score
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return ranked[:k]
+
+
+@pytest.fixture(scope="module")
+def world() -> tuple[SyntheticScenario, IncidentIndex]:
+    scenario = SyntheticScenario(
+        seed=11, services=60, log_lines=100, traces=10, past_incidents=3_000, change_requests=10
+    )
+    index = IncidentIndex()
+    index.add_all(scenario._incident(i) for i in range(len(scenario._incidents)))
+    return scenario, index
+
+
+def _queries(scenario: SyntheticScenario) -> list[tuple[str, list[str]]]:
+    rng = random.Random(4)
+    queries = [
+        ("connection pool timeout HikariCP", scenario.impacted),
+        ("inventory-service timeout cascade flash sale", []),
+        ("kafka consumer lag", [rng.choice(scenario.services)]),
+        ("", scenario.impacted[:2]),
+    ]
+    for i in rng.sample(range(len(scenario._incidents)), 20):
+        incident = scenario._incident(i)
+        queries.append((f"{incident['title']} {incident['symptoms']}", incident["affected_services"][:2]))
+    return queries
+
+
+@pytest.mark.parametrize("k", [1, 3, 5, 20])
+def test_pruned_search_matches_the_unpruned_ranking(world, k):
+    scenario, index = world
+    for text, services in _queries(scenario):
+        expected = _unpruned(index, text, services, k)
+        got = [(c.incident["incident_id"], c.score) for c in index.search(text, services, k=k)]
+        assert [incident_id for incident_id, _ in got] == [incident_id for incident_id, _ in expected]
+        assert [score for _, score in got] == pytest.approx([score for _, score in expected])
+
+
+def test_reindexing_an_incident_replaces_it():
+    index = IncidentIndex()
+    index.add_all([
+        {"incident_id": "INC-1", "title": "HikariCP pool exhausted", "affected_services": ["inventory"]},
+        {"incident_id": "INC-2", "title": "Kafka consumer lag", "affected_services": ["orders"]},
+    ])
+    assert not index.add({"incident_id": "INC-1", "title": "DNS outage", "affected_services": ["edge"]})
+
+    assert len(index) == 2
+    assert index.search("hikaricp pool", ["inventory"]) == []
+    (hit,) = index.search("dns", ["edge"])
+    assert hit.incident["incident_id"] == "INC-1"
+    assert hit.service_overlap == 1.0
+
+
+def test_orchestrators_do_not_share_an_index_unless_given_one():
+    def similar_index(**kwargs) -> IncidentIndex:
+        return MIBridgeOrchestrator(llm=DryRunLLMClient(), tools=_build_tools(), **kwargs).similar_agent.index
+
+    assert similar_index() is not similar_index()
+    shared = IncidentIndex()
+    assert similar_index(incident_index=shared) is shared
@@ -0,0 +1,49 @@
+import pytest
+
+from utils.json_repair import repair_json
+
+
+@pytest.mark.parametrize(
+    "raw, value, repairs",
+    [
+        ('{"a": 1}', {"a": 1}, []),
+        ('```json\n{"a": 1}\n```', {"a": 1}, ["fence"]),
+        # A fence cut off with the reply
+        ('```\n{"a": 1}', {"a": 1}, ["fence"]),
+        ('Here is the analysis: {"a": "x"} Let me know.', {"a": "x"}, ["surrounding_prose"]),
+        ('[1, 2, {"a": 3}] done', [1, 2, {"a": 3}], ["surrounding_prose"]),
+        ('{"a": [1, 2,],}', {"a": [1, 2]}, ["trailing_commas"]),
+        ('```json\n{"a": [1, 2,\n],\n}\n```', {"a": [1, 2]}, ["fence", "trailing_commas"]),
+    ],
+)
+def test_repairs_are_applied_and_reported(raw, value, repairs):
+    assert repair_json(raw) == (value, repairs)
+
+
+@pytest.mark.parametrize(
+    "raw, value",
+    [
+        # The last element may itself be cut short (3 of 30?) and is dropped
+        ('{"a": 1, "b": [1, 2, 3', {"a": 1, "b": [1, 2]}),
+        ('{"headline": "x", "steps": ["one", "tw', {"headline": "x", "steps": ["one"]}),
+        ('{"a": {"b": 1}, "c"', {"a": {"b": 1}}),
+        ('{"a": {"b": [true, {"c": 1}', {"a": {"b": [True, {"c": 1}]}}),
+    ],
+)
+def test_truncated_reply_is_cut_to_its_last_complete_value(raw, value):
+    assert repair_json(raw) == (value, ["truncated_tail"])
+
+
+def test_brackets_and_quotes_inside_strings_are_not_structure():
+    raw = 'Sure: {"cause": "pool {exhausted}, see [1]", "quote": "he said \\"stop, now\\""} end'
+    assert repair_json(raw) == (
+        {"cause": "pool {exhausted}, see [1]", "quote": 'he said "stop, now"'},
+        ["surrounding_prose"],
+    )
+    # Nor is a comma inside a string a place to cut a truncated reply
+    assert repair_json('{"a": "x, y", "b": "trunc') == ({"a": "x, y"}, ["truncated_tail"])
+
+
+def test_reply_without_json_raises():
+    with pytest.raises(ValueError):
+        repair_json("I could not determine the root cause.")
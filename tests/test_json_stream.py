@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from utils.dry_run_responses import RCA_RESPONSE
+from utils.json_stream import IncrementalJSONParser
+
+_DOC = (
+    '```json\n{"headline": "a \\"quoted\\" } brace", "n": 12, '
+    '"list": [1, {"x": [2]}, "s"], "obj": {"k": {"deep": 1}, "t": true}, "z": null}\n```'
+)
+
+
+def _feed(text: str, size: int, max_depth: int = 2) -> list[tuple[str, object]]:
+    parser = IncrementalJSONParser(max_depth=max_depth)
+    fields = []
+    for start in range(0, len(text), size):
+        fields.extend(parser.feed(text[start:start + size]))
+    assert parser.done
+    return fields
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, len(_DOC)])
+def test_reports_the_same_fields_however_the_reply_is_chunked(size):
+    assert _feed(_DOC, size) == [
+        ("headline", 'a "quoted" } brace'),
+        ("n", 12),
+        ("list[0]", 1),
+        ("list[1]", {"x": [2]}),
+        ("list[2]", "s"),
+        ("list", [1, {"x": [2]}, "s"]),
+        ("obj.k", {"deep": 1}),
+        ("obj.t", True),
+        ("obj", {"k": {"deep": 1}, "t": True}),
+        ("z", None),
+    ]
+
+
+def test_field_is_reported_once_its_last_character_arrives():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"headline": "pool exhausted') == []
+    assert parser.feed('", "confidence": 9') == [("headline", "pool exhausted")]
+    # A number is only complete once something follows it
+    assert parser.feed("4") == []
+    assert parser.feed("}") == [("confidence", 94)]
+    assert parser.done
+
+
+def test_max_depth_limits_reported_paths():
+    assert _feed(_DOC, 5, max_depth=1) == [
+        ("headline", 'a "quoted" } brace'),
+        ("n", 12),
+        ("list", [1, {"x": [2]}, "s"]),
+        ("obj", {"k": {"deep": 1}, "t": True}),
+        ("z", None),
+    ]
+
+
+def test_agent_reply_fields_match_a_full_parse():
+    fields = _feed(RCA_RESPONSE, 64)
+    top = {path: value for path, value in fields if "." not in path and "[" not in path}
+    assert top == json.loads(RCA_RESPONSE)
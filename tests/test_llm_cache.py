@@ -0,0 +1,69 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from main import _build_alert, _build_tools
+from orchestrator import MIBridgeOrchestrator
+from utils.dry_run_latency import AgentProfile, FixedLatency, LatencySimulator
+from utils.llm_cache import CachedLLMClient, volatile_scope, volatile_values
+from utils.llm_client import DryRunLLMClient
+
+
+def _instant_llm() -> DryRunLLMClient:
+    return DryRunLLMClient(latency=LatencySimulator(default=AgentProfile(FixedLatency(0.0))))
+
+
+def test_repeated_run_is_served_from_cache(tmp_path):
+    async def run_twice() -> tuple[dict, dict]:
+        stats = []
+        for _ in range(2):
+            # A fresh client each time, as a second process would have
+            llm = CachedLLMClient(_instant_llm(), disk_dir=tmp_path)
+            orchestrator = MIBridgeOrchestrator(llm=llm, tools=_build_tools())
+            # Each run's alert is stamped with the time it was built
+            ctx = await orchestrator.handle_alert(_build_alert())
+            assert ctx.rca is not None
+            stats.append(llm.cache_stats())
+        return stats[0], stats[1]
+
+    first, second = asyncio.run(run_twice())
+    assert first["misses"] == 4 and first["disk_hits"] == 0
+    assert second["misses"] == 0 and second["disk_hits"] == 4
+    assert len(list(tmp_path.glob("*.json"))) == 4
+
+
+def test_key_masks_volatile_values_only():
+    llm = CachedLLMClient(_instant_llm())
+    earlier = datetime(2024, 1, 15, 14, 2, tzinfo=timezone.utc)
+    later = earlier + timedelta(minutes=5)
+
+    def key(stamp: datetime, error_rate: float) -> str:
+        with volatile_scope(volatile_values(stamp)):
+            user = f'{{"timestamp":"{stamp.isoformat().replace("+00:00", "Z")}","error_rate":{error_rate}}}'
+            return llm.key_for("system", user, agent_name="RCA")
+
+    assert key(earlier, 0.42) == key(later, 0.42)
+    assert key(earlier, 0.42) != key(earlier, 0.43)
+    # Outside an incident nothing is masked
+    assert llm.key_for("system", earlier.isoformat()) != llm.key_for("system", later.isoformat())
+
+
+def test_cache_hits_and_shared_requests_report_fields():
+    async def scenario() -> tuple[list, list, list]:
+        llm = CachedLLMClient(_instant_llm())
+        streamed: list = []
+        joined: list = []
+        # The second caller joins the first one's in-flight request
+        await asyncio.gather(
+            llm.complete("system", "user", "RCA", on_field=lambda p, v: streamed.append(p)),
+            llm.complete("system", "user", "RCA", on_field=lambda p, v: joined.append(p)),
+        )
+        assert llm.shared == 1
+        hit: list = []
+        await llm.complete("system", "user", "RCA", on_field=lambda p, v: hit.append(p))
+        assert llm.hits == 1
+        return streamed, joined, hit
+
+    streamed, joined, hit = asyncio.run(scenario())
+    assert "probable_root_causes[0]" in streamed
+    assert joined == streamed
+    assert hit == streamed
@@ -0,0 +1,75 @@
+import asyncio
+
+from utils.llm_client import BoundedLLMClient, _HedgedCompletion, _add_wait
+
+
+class _ScriptedClient(_HedgedCompletion):
+    """Replies after the next scripted delay; optionally reports some of it as queueing."""
+
+    def __init__(self, delays: list[float], queued: float = 0.0) -> None:
+        self._init_hedging()
+        self.delays = list(delays)
+        self.queued = queued
+        self.bound: BoundedLLMClient | None = None
+        self.peak_in_flight = 0
+
+    async def _request(self, system, user, agent_name, cache_prefix="", on_field=None, output_schema=None):
+        delay = self.delays.pop(0)
+        if self.queued:
+            await asyncio.sleep(self.queued)
+            _add_wait(self.queued)
+        if self.bound is not None:
+            self.peak_in_flight = max(self.peak_in_flight, self.bound.in_flight)
+        await asyncio.sleep(delay)
+        return '{"ok": true}'
+
+
+def test_hedge_won_records_what_the_caller_waited():
+    # History puts the hedge trigger at 0.05s; the primary would take 0.5s
+    # and the hedge answers 0.02s after it fires
+    llm = _ScriptedClient([0.5, 0.02])
+    llm._latencies["IMPACT"].extend([0.05] * 10)
+
+    async def run() -> str:
+        return await llm.complete("system", "user", "IMPACT", hedge=True)
+
+    assert asyncio.run(run()) == '{"ok": true}'
+    assert llm.hedges_won["IMPACT"] == 1
+    # One sample for the call, measured from its start rather than from the
+    # hedge firing
+    samples = list(llm._latencies["IMPACT"])
+    assert len(samples) == 11
+    assert 0.07 <= samples[-1] < 0.5
+
+
+def test_queueing_is_kept_out_of_latency_samples():
+    llm = _ScriptedClient([0.02], queued=0.2)
+
+    async def run() -> None:
+        await llm.complete("system", "user", "IMPACT")
+
+    asyncio.run(run())
+    (sample,) = llm._latencies["IMPACT"]
+    assert 0.02 <= sample < 0.1
+
+
+def test_bound_counts_each_hedged_request():
+    async def run(max_concurrent: int) -> _ScriptedClient:
+        llm = _ScriptedClient([0.3, 0.02])
+        llm._latencies["IMPACT"].extend([0.05] * 10)
+        llm.bound = BoundedLLMClient(llm, max_concurrent)
+        await llm.bound.complete("system", "user", "IMPACT", hedge=True)
+        # The losing request gives its slot back once its cancellation runs
+        await asyncio.sleep(0)
+        assert llm.bound.in_flight == 0
+        return llm
+
+    # With room for both, the hedge runs alongside the primary and wins
+    roomy = asyncio.run(run(2))
+    assert roomy.peak_in_flight == 2
+    assert roomy.hedges_won["IMPACT"] == 1
+    # With one slot, the hedge waits for it and the primary answers first
+    tight = asyncio.run(run(1))
+    assert tight.peak_in_flight == 1
+    assert tight.hedges_fired["IMPACT"] == 1
+    assert tight.hedges_won["IMPACT"] == 0
@@ -0,0 +1,128 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils.llm_client import DryRunLLMClient, LLMClient, _FallBack, collect_usage
+from utils.llm_routing import HAIKU, SONNET, Route, RoutingTable
+
+
+def _response(text: str = '{"ok": true}') -> SimpleNamespace:
+    return SimpleNamespace(
+        content=[SimpleNamespace(type="text", text=text)],
+        usage=SimpleNamespace(
+            input_tokens=120,
+            output_tokens=30,
+            cache_creation_input_tokens=None,
+            cache_read_input_tokens=None,
+        ),
+    )
+
+
+class _ScriptedSend:
+    """Stands in for LLMClient._send: falls back on the models in `overloaded`."""
+
+    def __init__(self, overloaded: set[str]) -> None:
+        self.overloaded = overloaded
+        self.calls: list[tuple[str, float | None, bool]] = []
+
+    async def __call__(self, request, agent_name, prompt, on_field, slow_after_s, can_fall_back):
+        model = request["model"]
+        self.calls.append((model, slow_after_s, can_fall_back))
+        if model in self.overloaded and can_fall_back:
+            raise _FallBack("overloaded (529)", 2)
+        return _response(), None, 0.25, 1
+
+
+def _client(routes: RoutingTable, send: _ScriptedSend) -> LLMClient:
+    llm = LLMClient(api_key="sk-ant-test", routes=routes)
+    llm._send = send
+    return llm
+
+
+def test_route_needs_a_model():
+    with pytest.raises(ValueError):
+        Route([])
+
+
+def test_unrouted_agent_gets_the_default():
+    routes = RoutingTable({"RCA": Route([SONNET, HAIKU])}, default=Route([HAIKU]))
+
+    assert routes.route_for("RCA").models == (SONNET, HAIKU)
+    assert routes.route_for("RCA").model == SONNET
+    assert routes.route_for("IMPACT").models == (HAIKU,)
+
+
+def test_stats_per_agent_and_model():
+    routes = RoutingTable({})
+    routes.record("RCA", SONNET, latency_s=1.0, input_tokens=100, output_tokens=10)
+    routes.record("RCA", SONNET, latency_s=3.0, input_tokens=200, output_tokens=20)
+    routes.record_fallback("RCA", SONNET, "overloaded (529)", HAIKU)
+    routes.record("RCA", HAIKU, latency_s=0.5, input_tokens=100, output_tokens=10, fallback=True)
+
+    stats = routes.stats()["RCA"]
+    assert stats[SONNET] == {
+        "calls": 2,
+        "fallbacks_from": 1,
+        "mean_latency_s": 2.0,
+        "input_tokens": 300,
+        "output_tokens": 30,
+    }
+    assert stats[HAIKU]["calls"] == 1
+    assert stats[HAIKU]["fallbacks_from"] == 0
+
+
+def test_primary_answers_without_fallback():
+    routes = RoutingTable({"IMPACT": Route([HAIKU, SONNET], slow_after_s=20.0)})
+    send = _ScriptedSend(overloaded=set())
+    llm = _client(routes, send)
+
+    assert asyncio.run(llm.complete("system", "user", "IMPACT")) == '{"ok": true}'
+    # Only a model with another behind it may be abandoned for slowness
+    assert send.calls == [(HAIKU, 20.0, True)]
+    assert routes.stats()["IMPACT"][HAIKU]["calls"] == 1
+
+
+def test_overloaded_primary_falls_back_to_the_next_model():
+    routes = RoutingTable({"RCA": Route([SONNET, HAIKU], slow_after_s=45.0)})
+    send = _ScriptedSend(overloaded={SONNET})
+    llm = _client(routes, send)
+    usage: list[dict] = []
+
+    async def run() -> str:
+        with collect_usage(usage):
+            return await llm.complete("system", "user", "RCA")
+
+    assert asyncio.run(run()) == '{"ok": true}'
+    # The last model in the chain is waited on without a slowness cut-off
+    assert send.calls == [(SONNET, 45.0, True), (HAIKU, None, False)]
+    stats = routes.stats()["RCA"]
+    assert stats[SONNET] == {
+        "calls": 0,
+        "fallbacks_from": 1,
+        "mean_latency_s": None,
+        "input_tokens": 0,
+        "output_tokens": 0,
+    }
+    assert stats[HAIKU]["calls"] == 1
+    # The reply is booked on the model that served it, with the abandoned attempts as retries
+    assert [(r["model"], r["retries"]) for r in usage] == [(HAIKU, 2)]
+
+
+def test_last_model_is_never_abandoned():
+    routes = RoutingTable({"RCA": Route([SONNET])})
+    send = _ScriptedSend(overloaded={SONNET})
+    llm = _client(routes, send)
+
+    assert asyncio.run(llm.complete("system", "user", "RCA")) == '{"ok": true}'
+    assert send.calls == [(SONNET, None, False)]
+    assert routes.stats()["RCA"][SONNET]["fallbacks_from"] == 0
+
+
+def test_dry_run_books_calls_on_the_routed_model():
+    routes = RoutingTable({"IMPACT": Route([HAIKU, SONNET])})
+    llm = DryRunLLMClient(routes=routes)
+
+    asyncio.run(llm.complete("system", "user", "IMPACT"))
+
+    assert list(routes.stats()["IMPACT"]) == [HAIKU]
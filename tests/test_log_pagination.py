@@ -0,0 +1,139 @@
+import asyncio
+import json
+from array import array
+from collections import Counter
+
+import pytest
+
+from tools import mock_splunk
+from tools.synthetic_scenario import SyntheticScenario
+
+_SERVICES = ["inventory-service", "order-service"]
+
+
+def _entry(n: int, timestamp: str, service: str) -> dict:
+    return {"id": n, "timestamp": timestamp, "service": service, "message": f"entry {n}"}
+
+
+# Runs of entries sharing a timestamp, longer and shorter than the page sizes,
+# with entries for an unrequested service mixed into them
+_SHARED_TIMESTAMPS = [
+    _entry(n, ts, svc)
+    for n, (ts, svc) in enumerate(
+        [("2024-01-15T14:00:00.000Z", "inventory-service")] * 4
+        + [("2024-01-15T14:00:00.000Z", "payment-service")]
+        + [("2024-01-15T14:00:00.000Z", "order-service")] * 2
+        + [("2024-01-15T14:00:01.000Z", "inventory-service")]
+        + [("2024-01-15T14:00:02.000Z", "payment-service")] * 3
+        + [("2024-01-15T14:00:03.000Z", "order-service")] * 5
+        + [("2024-01-15T14:00:03.000Z", "payment-service")]
+        + [("2024-01-15T14:00:04.000Z", "inventory-service")] * 3
+    )
+]
+
+
+async def _collect(pages, limit: int) -> list[list[dict]]:
+    """Pages from a stream, failing instead of hanging if a cursor stops advancing."""
+    collected = []
+    async for page in pages:
+        collected.append(page)
+        assert len(collected) <= limit, "cursor is not advancing"
+    return collected
+
+
+async def _stream(splunk, page_size: int, **window) -> list[list[dict]]:
+    pages = splunk.stream_error_logs(_SERVICES, page_size=page_size, **window)
+    return await _collect(pages, len(_SHARED_TIMESTAMPS))
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 3])
+def test_mock_stream_returns_every_entry_once(monkeypatch, page_size):
+    monkeypatch.setattr(mock_splunk, "_ERROR_LOGS", _SHARED_TIMESTAMPS)
+    pages = asyncio.run(_stream(mock_splunk, page_size))
+
+    assert all(len(page) <= page_size for page in pages)
+    streamed = [entry["id"] for page in pages for entry in page]
+    expected = [entry["id"] for entry in _SHARED_TIMESTAMPS if entry["service"] in _SERVICES]
+    assert streamed == expected
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 3])
+def test_mock_stream_respects_the_window(monkeypatch, page_size):
+    monkeypatch.setattr(mock_splunk, "_ERROR_LOGS", _SHARED_TIMESTAMPS)
+    window = {"earliest": "2024-01-15T14:00:01.000Z", "latest": "2024-01-15T14:00:04.000Z"}
+    pages = asyncio.run(_stream(mock_splunk, page_size, **window))
+
+    streamed = [entry["id"] for page in pages for entry in page]
+    expected = [
+        entry["id"]
+        for entry in _SHARED_TIMESTAMPS
+        if entry["service"] in _SERVICES
+        and window["earliest"] <= entry["timestamp"] < window["latest"]
+    ]
+    assert streamed == expected
+
+
+@pytest.fixture(scope="module")
+def clustered_scenario() -> SyntheticScenario:
+    scenario = SyntheticScenario(
+        seed=3, services=8, log_lines=400, traces=10, past_incidents=10, change_requests=10
+    )
+    # Round every log line down to its minute: still sorted, now in shared-timestamp runs
+    scenario._log_ts = array("q", (ts - ts % 60_000 for ts in scenario._log_ts))
+    return scenario
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 3])
+def test_synthetic_stream_returns_every_entry_once(clustered_scenario, page_size):
+    scenario = clustered_scenario
+    services = [scenario.root_service, *scenario._impacted_mid]
+    wanted = {scenario._index[svc] for svc in services}
+    expected = [
+        scenario._log_entry(i) for i in range(len(scenario._log_ts)) if scenario._log_svc[i] in wanted
+    ]
+    assert len({e["timestamp"] for e in expected}) < len(expected)
+
+    async def stream() -> list[list[dict]]:
+        splunk = scenario.tools()["splunk"]
+        return await _collect(splunk.stream_error_logs(services, page_size=page_size), len(expected))
+
+    pages = asyncio.run(stream())
+    assert all(len(page) <= page_size for page in pages)
+    streamed = [entry for page in pages for entry in page]
+    assert [e["timestamp"] for e in streamed] == [e["timestamp"] for e in expected]
+
+    def key(entry: dict) -> str:
+        return json.dumps(entry, sort_keys=True)
+
+    assert Counter(map(key, streamed)) == Counter(map(key, expected))
+
+
+class _CountingLog(list):
+    """A log list that counts the entries read, by index or by iteration."""
+
+    reads = 0
+
+    def __getitem__(self, index):
+        self.reads += 1
+        return super().__getitem__(index)
+
+    def __iter__(self):
+        for entry in super().__iter__():
+            self.reads += 1
+            yield entry
+
+
+def test_mock_page_seeks_to_the_cursor(monkeypatch):
+    log = _CountingLog(
+        _entry(n, f"2024-01-15T14:{n // 60:02d}:{n % 60:02d}.000Z", "inventory-service")
+        for n in range(3_000)
+    )
+    monkeypatch.setattr(mock_splunk, "_ERROR_LOGS", log)
+
+    page = asyncio.run(
+        mock_splunk.query_error_logs_page(_SERVICES, cursor="2024-01-15T14:40:00.000Z#1", page_size=5)
+    )
+
+    assert [entry["id"] for entry in page["entries"]] == [2401, 2402, 2403, 2404, 2405]
+    # A binary search to the cursor, then the page: nothing before it is scanned
+    assert log.reads < 30
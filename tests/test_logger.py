@@ -0,0 +1,44 @@
+import asyncio
+
+from utils.logger import capture, emit, log
+
+
+def test_capture_collects_logs_and_events_in_scope_only():
+    entries: list[dict] = []
+    events: list[tuple[str, dict]] = []
+
+    async def run() -> None:
+        with capture(entries, on_event=lambda event, data: events.append((event, data))):
+            log("RCA", "inside")
+            emit("timing", {"agent": "RCA"})
+            # Tasks started inside inherit the capture
+            await asyncio.create_task(_log_later())
+        log("RCA", "outside")
+
+    async def _log_later() -> None:
+        log("IMPACT", "from a task")
+
+    asyncio.run(run())
+    assert [(e["agent"], e["message"]) for e in entries] == [("RCA", "inside"), ("IMPACT", "from a task")]
+    assert [event for event, _ in events] == ["log", "timing", "log"]
+
+
+def test_nested_capture_restores_the_outer_one():
+    outer: list[dict] = []
+    inner: list[dict] = []
+    with capture(outer):
+        with capture(inner):
+            log("RCA", "inner")
+        log("RCA", "outer")
+    assert [e["message"] for e in inner] == ["inner"]
+    assert [e["message"] for e in outer] == ["outer"]
+
+
+def test_sub_calls_take_their_agent_colour(capsys):
+    log("RCA.changes", "sub-call")
+    log("RCA", "agent")
+    log("UNKNOWN.x", "no colour")
+    sub, agent, unknown = capsys.readouterr().out.splitlines()
+    assert "\033[35mRCA.CHANGES" in sub
+    assert "\033[35mRCA " in agent
+    assert "│  UNKNOWN.X" in unknown
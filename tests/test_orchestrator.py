@@ -0,0 +1,14 @@
+from main import _build_tools
+from orchestrator import MIBridgeOrchestrator
+from utils.llm_client import DryRunLLMClient
+
+
+def test_phase_of_agents_and_their_sub_calls():
+    orchestrator = MIBridgeOrchestrator(llm=DryRunLLMClient(), tools=_build_tools())
+    assert orchestrator.phase_of("IMPACT") == orchestrator.phase_of("SIMILAR") == 1
+    assert orchestrator.phase_of("SUMMARIZER") == 2
+    assert orchestrator.phase_of("RCA") == 3
+    # Map-reduce sub-calls log under the agent's name plus a suffix
+    assert orchestrator.phase_of("RCA.CHANGES") == orchestrator.phase_of("RCA.synthesis") == 3
+    assert orchestrator.phase_of("ORCHESTRATOR") is None
+    assert orchestrator.phase_of("TOOLS") is None
@@ -0,0 +1,58 @@
+import json
+
+from models import RCAOutput, SimilarIncident, SimilarIncidentOutput
+from utils.prompt_encoding import PromptEncoder, encode
+
+
+def _rca(**overrides) -> RCAOutput:
+    fields = {
+        "probable_root_causes": [{"cause": "pool exhausted", "confidence": 80}],
+        "correlated_change_requests": [],
+        "recommended_resolution": "Roll back CR2077",
+        "rollback_candidate": None,
+        "remediation_steps": ["Roll back CR2077"],
+        "evidence_trail": [],
+    }
+    return RCAOutput(**{**fields, **overrides})
+
+
+def test_model_keeps_the_null_and_empty_fields_its_schema_names():
+    text = PromptEncoder().encode(_rca())
+
+    data = json.loads(text)
+    assert data["rollback_candidate"] is None
+    assert data["correlated_change_requests"] == []
+    assert data["evidence_trail"] == []
+    assert "left out" not in text
+
+
+def test_nested_model_fields_are_kept():
+    incident = SimilarIncident(
+        incident_id="INC-1",
+        title="Pool exhaustion",
+        similarity_score=0.9,
+        root_cause="",
+        resolution="Raised the pool size",
+        resolution_time_minutes=30,
+    )
+    output = SimilarIncidentOutput(
+        incidents=[incident], top_match=incident, suggested_runbook="", reasoning="close match"
+    )
+
+    data = json.loads(PromptEncoder().encode(output).split("\n")[0])
+    assert data["suggested_runbook"] == ""
+    assert data["incidents"][0]["root_cause"] == ""
+
+
+def test_plain_payload_drops_empty_fields_and_says_so():
+    text = encode({"service": "inventory-service", "upstream": None, "tags": [], "count": 0})
+
+    body, legend = text.split("\n")
+    assert json.loads(body) == {"service": "inventory-service", "count": 0}
+    assert "fields left out are null or empty" in legend
+
+
+def test_keep_names_fields_to_write_even_when_empty():
+    text = encode([{"cr_id": "CR1", "rollback_plan": None}], keep={"rollback_plan"})
+
+    assert json.loads(text) == [{"cr_id": "CR1", "rollback_plan": None}]
@@ -0,0 +1,82 @@
+import asyncio
+import random
+import time
+
+from utils.rate_limit import RateLimiter, _Bucket, backoff_delay, priority_scope
+
+
+def test_bucket_refills_continuously_up_to_capacity():
+    bucket = _Bucket(per_minute=60)   # one per second
+    start = bucket.updated
+    bucket.level = 0
+    bucket.refill(start + 1.5)
+    assert bucket.level == 1.5
+    assert bucket.wait_for(3) == 1.5
+    assert bucket.wait_for(1) == 0.0
+    bucket.refill(start + 600)
+    assert bucket.level == 60
+    # More than a minute's worth waits for a full bucket, not forever
+    bucket.level = 0
+    assert bucket.wait_for(1_000) == 60
+
+
+def test_waiters_are_granted_in_priority_order():
+    async def run() -> list[str]:
+        limiter = RateLimiter(requests_per_min=600, input_tokens_per_min=None, output_tokens_per_min=None)
+        limiter.pause(0.05)
+        granted: list[str] = []
+
+        async def call(name: str, priority: int) -> None:
+            with priority_scope(priority):
+                await limiter.acquire(input_tokens=100, output_tokens=100)
+            granted.append(name)
+
+        tasks = []
+        for name, priority in (("P3-first", 3), ("P1", 1), ("P3-second", 3), ("P2", 2)):
+            tasks.append(asyncio.create_task(call(name, priority)))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        assert limiter.stats()["throttled"] >= 1
+        return granted
+
+    assert asyncio.run(run()) == ["P1", "P2", "P3-first", "P3-second"]
+
+
+def test_pause_holds_every_caller_back():
+    async def run() -> float:
+        limiter = RateLimiter()
+        limiter.pause(0.1)
+        limiter.pause(0.05)   # never shortens an existing pause
+        res = await limiter.acquire(input_tokens=10, output_tokens=10)
+        assert limiter.stats()["rate_limited"] == 2
+        return res.waited
+
+    assert asyncio.run(run()) >= 0.09
+
+
+def test_token_buckets_throttle_and_settle_books_the_difference():
+    async def run() -> None:
+        limiter = RateLimiter(requests_per_min=None, input_tokens_per_min=6_000, output_tokens_per_min=None)
+        res = await limiter.acquire(input_tokens=5_900, output_tokens=0)
+        assert res.waited < 0.05
+        # Actual usage came in under the estimate: 900 tokens are handed back
+        limiter.settle(res, input_tokens=5_000, output_tokens=0)
+        started = time.monotonic()
+        await limiter.acquire(input_tokens=1_000, output_tokens=0)
+        assert time.monotonic() - started < 0.05
+        # The bucket is now empty; 100 more tokens take about a second (100/s)
+        started = time.monotonic()
+        await limiter.acquire(input_tokens=50, output_tokens=0)
+        assert 0.3 < time.monotonic() - started < 1.0
+
+    asyncio.run(run())
+
+
+def test_backoff_is_jittered_exponential_and_respects_retry_after():
+    random.seed(7)
+    for attempt in range(6):
+        for _ in range(50):
+            assert 0 <= backoff_delay(attempt, base=1.0, cap=8.0) <= min(8.0, 2 ** attempt)
+    for _ in range(50):
+        delay = backoff_delay(0, retry_after=5.0)
+        assert 5.0 <= delay <= 5.5
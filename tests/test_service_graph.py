@@ -0,0 +1,77 @@
+import asyncio
+import types
+
+from main import _build_alert, _build_tools
+from agents.rca_agent import RCAAgent
+from orchestrator import MIBridgeOrchestrator
+from utils.llm_client import DryRunLLMClient
+from utils.service_graph import ServiceGraph
+
+
+def _trace(trace_id, *calls):
+    """A trace with one span per service and a child span for each (caller, callee)."""
+    services = dict.fromkeys(service for call in calls for service in call)
+    parents = {callee: caller for caller, callee in calls}
+    spans = [
+        {"span_id": f"{trace_id}-{service}", "service": service}
+        | ({"parent_span_id": f"{trace_id}-{parents[service]}"} if service in parents else {})
+        for service in services
+    ]
+    return {"trace_id": trace_id, "spans": spans}
+
+
+def _graph() -> ServiceGraph:
+    graph = ServiceGraph()
+    graph.add_traces([
+        _trace("T1", ("gateway", "orders"), ("orders", "inventory"), ("inventory", "db")),
+        _trace("T2", ("mobile", "orders"), ("orders", "payments")),
+    ])
+    return graph
+
+
+def test_dependencies_are_downstream_at_their_fewest_hops():
+    graph = _graph()
+    assert graph.dependencies(["orders"]) == {"orders": 0, "inventory": 1, "payments": 1, "db": 2}
+    # A service reachable from several inputs keeps its nearest distance
+    assert graph.dependencies(["gateway", "inventory"]) == {
+        "gateway": 0, "inventory": 0, "orders": 1, "db": 1, "payments": 2,
+    }
+
+
+def test_blast_radius_is_upstream_nearest_first():
+    graph = _graph()
+    assert graph.blast_radius(["inventory"]) == {"inventory": 0, "orders": 1, "gateway": 2, "mobile": 2}
+    assert graph.blast_radius(["unknown-service"]) == {"unknown-service": 0}
+
+
+def test_new_edges_invalidate_memoized_reach():
+    graph = _graph()
+    assert "search" not in graph.blast_radius(["inventory"])
+    assert graph.add_trace(_trace("T3", ("search", "inventory"))) == 1
+    assert graph.blast_radius(["inventory"])["search"] == 1
+
+
+def test_seen_traces_are_skipped_and_bounded():
+    graph = ServiceGraph(max_seen_traces=2)
+    trace = _trace("T1", ("a", "b"))
+    graph.add_trace(trace)
+    graph.add_trace(trace)
+    assert graph.calls[("a", "b")] == 1
+    graph.add_traces([_trace("T2", ("a", "c")), _trace("T3", ("a", "d"))])
+    assert list(graph._seen_traces) == ["T2", "T3"]
+
+
+def test_rca_falls_back_to_affected_services_without_traces():
+    async def no_traces(services):
+        raise TimeoutError("dynatrace timed out")
+
+    tools = {**_build_tools(), "dynatrace": types.SimpleNamespace(get_distributed_traces=no_traces)}
+    agent = RCAAgent(llm=DryRunLLMClient(), tools=tools, graph=ServiceGraph())
+    ctx = MIBridgeOrchestrator.new_context(_build_alert())
+
+    evidence = asyncio.run(agent.gather(ctx))
+    services = set(ctx.alert.affected_services)
+    assert evidence["change_requests"]
+    assert {cr["service"] for cr in evidence["change_requests"]} <= services
+    assert {cr["suspect_factors"]["proximity"] for cr in evidence["change_requests"]} == {1.0}
+    assert evidence["error_logs"]["total_entries"] > 0
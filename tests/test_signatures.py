@@ -0,0 +1,127 @@
+import asyncio
+import types
+
+from agents.rca_agent import RCAAgent
+from models import RCAOutput
+from orchestrator import MIBridgeOrchestrator
+from main import _build_alert
+from utils.llm_client import DryRunLLMClient
+from utils.log_aggregation import ErrorLogAggregator
+from utils.service_graph import ServiceGraph
+from utils.signatures import match_signatures, provisional_rca
+
+_POOL_TIMEOUT = "com.zaxxer.hikari.pool.HikariPool$PoolTimeoutException"
+
+
+def _pool_cr(old="20", new="10", hours=2.0):
+    return {
+        "cr_id": "CR1",
+        "title": "Tune HikariCP pool",
+        "service": "inventory",
+        "deployed_at": "2024-01-15T12:00:00Z",
+        "deployed_by": "dev@example.com",
+        "rollback_plan": "Revert maximum-pool-size",
+        "hours_before_onset": hours,
+        "config_change": {"parameter": "spring.datasource.hikari.maximum-pool-size", "old_value": old, "new_value": new},
+    }
+
+
+def _logs(saturated=True, pool_max=10):
+    logs = ErrorLogAggregator()
+    for pending in (0, 40):
+        logs.add({
+            "timestamp": "2024-01-15T14:02:00Z",
+            "service": "inventory",
+            "exception_class": _POOL_TIMEOUT,
+            "hikaricp": {
+                "pool_name": "HikariPool-1",
+                "max_pool_size": pool_max,
+                "active_connections": pool_max if saturated else 3,
+                "pending_threads": pending if saturated else 0,
+            },
+        })
+    return logs
+
+
+def _confidence(cr, logs):
+    matches = [m for m in match_signatures(logs, [cr]) if m.signature.name == "connection-pool-shrunk"]
+    return matches[0].confidence_pct if matches else None
+
+
+def test_parameter_must_move_in_the_signature_direction():
+    logs = _logs()
+    assert _confidence(_pool_cr("20", "10"), logs) is not None
+    assert _confidence(_pool_cr("10", "20"), logs) is None
+    assert _confidence(_pool_cr("10", "10"), logs) is None
+    assert _confidence(_pool_cr("small", "smaller"), logs) is None
+
+
+def test_symptoms_are_required():
+    logs = ErrorLogAggregator()
+    logs.add({"service": "inventory", "exception_class": "java.lang.IllegalStateException"})
+    assert match_signatures(logs, [_pool_cr()]) == []
+
+
+def test_pool_saturation_raises_or_lowers_confidence():
+    # 85 base, +10 when the saturated pool's max equals the CR's new value
+    assert _confidence(_pool_cr(), _logs(pool_max=10)) == 95
+    assert _confidence(_pool_cr(), _logs(pool_max=12)) == 85
+    assert _confidence(_pool_cr(), _logs(saturated=False)) == 65
+    # A change long before onset matches with less confidence
+    assert _confidence(_pool_cr(hours=10.0), _logs()) == 80
+
+
+def test_provisional_rca_is_a_valid_rca_output():
+    assert provisional_rca([]) is None
+    provisional = provisional_rca(match_signatures(_logs(), [_pool_cr()]))
+    rca = RCAOutput(**provisional)
+    assert rca.rollback_candidate == "CR1"
+    assert rca.probable_root_causes[0]["rank"] == 1
+    assert rca.probable_root_causes[0]["confidence_pct"] == 95
+    assert rca.correlated_change_requests[0]["cr_id"] == "CR1"
+    assert "maximum-pool-size to 20 on inventory" in rca.remediation_steps[0]
+    # Each CR once, under its most confident signature
+    assert len(rca.probable_root_causes) == len({c["cr_id"] for c in rca.correlated_change_requests})
+
+
+def test_signatures_are_rechecked_on_new_exceptions_or_periodically():
+    classes = {30: "java.lang.OutOfMemoryError"}
+
+    async def stream_error_logs(services, page_size):
+        for n in range(1, 61):
+            await asyncio.sleep(0)
+            yield [{
+                "timestamp": f"2024-01-15T14:{n // 60:02d}:{n % 60:02d}Z",
+                "service": "inventory",
+                "exception_class": classes.get(n, _POOL_TIMEOUT),
+            }]
+
+    async def no_changes(services, until=None, hours=None):
+        return []
+
+    async def nothing(*args, **kwargs):
+        return []
+
+    tools = {
+        "splunk": types.SimpleNamespace(stream_error_logs=stream_error_logs),
+        "servicenow": types.SimpleNamespace(
+            get_active_change_requests=no_changes, search_past_incidents=nothing
+        ),
+        "dynatrace": types.SimpleNamespace(get_distributed_traces=nothing),
+    }
+    checked_at = []
+
+    class CountingRCA(RCAAgent):
+        def _check_signatures(self, ctx, logs, distances, index):
+            checked_at.append(logs.total)
+            return super()._check_signatures(ctx, logs, distances, index)
+
+    agent = CountingRCA(llm=DryRunLLMClient(), tools=tools, graph=ServiceGraph())
+    ctx = MIBridgeOrchestrator.new_context(_build_alert())
+    asyncio.run(agent.gather(ctx))
+
+    first = checked_at[0]
+    assert first <= 5
+    # Periodic checks, one when the new class arrived, and the final one
+    expected = [first, first + 20, 30, 50, 60]
+    assert checked_at == expected
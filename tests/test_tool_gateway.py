@@ -0,0 +1,113 @@
+import asyncio
+import types
+
+import pytest
+
+from utils.tool_gateway import ToolGateway
+
+
+def _backend() -> tuple[types.SimpleNamespace, list[tuple[str, ...]]]:
+    calls: list[tuple[str, ...]] = []
+
+    async def get_service_metrics(services: list[str]) -> dict:
+        calls.append(tuple(services))
+        await asyncio.sleep(0.01)
+        return {service: {"error_rate_pct": 1.0} for service in services}
+
+    return types.SimpleNamespace(get_service_metrics=get_service_metrics), calls
+
+
+def test_results_are_memoized_until_the_ttl_expires():
+    async def run() -> None:
+        backend, calls = _backend()
+        tools = ToolGateway({"dynatrace": backend}, ttls={"dynatrace.get_service_metrics": 0.05})
+        first = await tools["dynatrace"].get_service_metrics(["b", "a"])
+        # Same services in another order are the same call
+        assert await tools["dynatrace"].get_service_metrics(["a", "b", "a"]) is first
+        assert len(calls) == 1
+        await asyncio.sleep(0.06)
+        await tools["dynatrace"].get_service_metrics(["a", "b"])
+        assert len(calls) == 2
+        stats = tools.stats()["dynatrace.get_service_metrics"]
+        assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 2, 1)
+
+    asyncio.run(run())
+
+
+def test_concurrent_identical_calls_share_one_request():
+    async def run() -> None:
+        backend, calls = _backend()
+        tools = ToolGateway({"dynatrace": backend})
+        results = await asyncio.gather(
+            *(tools["dynatrace"].get_service_metrics(["a"]) for _ in range(5))
+        )
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+        assert tools.stats()["dynatrace.get_service_metrics"]["shared"] == 4
+
+    asyncio.run(run())
+
+
+def test_invalidate_drops_one_function_or_all():
+    async def run() -> None:
+        backend, calls = _backend()
+        tools = ToolGateway({"dynatrace": backend, "other": backend})
+        await tools["dynatrace"].get_service_metrics(["a"])
+        await tools["other"].get_service_metrics(["a"])
+        assert tools.invalidate("dynatrace.get_service_metrics") == 1
+        await tools["dynatrace"].get_service_metrics(["a"])
+        await tools["other"].get_service_metrics(["a"])
+        assert len(calls) == 3
+        assert tools.invalidate() == 2
+
+    asyncio.run(run())
+
+
+def test_results_are_bounded_least_recently_used_first():
+    async def run() -> None:
+        backend, calls = _backend()
+        tools = ToolGateway({"dynatrace": backend}, max_entries=2)
+        metrics = tools["dynatrace"].get_service_metrics
+        await metrics(["a"])
+        await metrics(["b"])
+        await metrics(["a"])  # hit: "a" is now the most recently used
+        await metrics(["c"])  # evicts "b"
+        assert len(tools._results) == 2
+        await metrics(["a"])
+        assert len(calls) == 3
+        await metrics(["b"])
+        assert len(calls) == 4
+        assert tools.stats()["dynatrace.get_service_metrics"]["evictions"] == 2
+
+    asyncio.run(run())
+
+
+def test_expired_results_are_dropped_when_any_call_completes():
+    async def run() -> None:
+        backend, _ = _backend()
+        tools = ToolGateway({"dynatrace": backend}, ttls={"dynatrace.get_service_metrics": 0.01})
+        await tools["dynatrace"].get_service_metrics(["a"])
+        await asyncio.sleep(0.02)
+        # A different call: "a" is never looked up again, but still goes
+        await tools["dynatrace"].get_service_metrics(["b"])
+        assert [key[1] for key in tools._results] == ['[[["b"]], {}]']
+
+    asyncio.run(run())
+
+
+def test_failed_calls_are_not_cached():
+    async def run() -> None:
+        attempts = []
+
+        async def get_service_metrics(services: list[str]) -> dict:
+            attempts.append(services)
+            raise TimeoutError("dynatrace timed out")
+
+        tools = ToolGateway({"dynatrace": types.SimpleNamespace(get_service_metrics=get_service_metrics)})
+        for _ in range(2):
+            with pytest.raises(TimeoutError):
+                await tools["dynatrace"].get_service_metrics(["a"])
+        assert len(attempts) == 2
+        assert tools.stats()["dynatrace.get_service_metrics"]["errors"] == 2
+
+    asyncio.run(run())
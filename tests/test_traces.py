@@ -0,0 +1,98 @@
+from utils.traces import Trace, TraceIndex
+
+
+def _span(span_id, service, start, duration, parent=None, **extra):
+    raw = {"span_id": span_id, "service": service, "start_offset_ms": start, "duration_ms": duration}
+    if parent is not None:
+        raw["parent_span_id"] = parent
+    return {**raw, **extra}
+
+
+def _trace(*spans, trace_id="T1", total=None):
+    duration = total if total is not None else max(s["start_offset_ms"] + s["duration_ms"] for s in spans)
+    return {"trace_id": trace_id, "total_duration_ms": duration, "spans": list(spans)}
+
+
+def _path(trace):
+    return [(span.span_id, ms) for span, ms in trace.critical_path]
+
+
+def test_sequential_children_split_the_path_with_their_parent():
+    trace = Trace(_trace(
+        _span("root", "gateway", 0, 100),
+        _span("a", "orders", 10, 30, parent="root"),
+        _span("b", "inventory", 50, 40, parent="root"),
+    ))
+    # The root owns the three gaps: 0-10, 40-50 and 90-100
+    assert _path(trace) == [("root", 30), ("a", 30), ("b", 40)]
+    assert {span.span_id: span.self_ms for span in trace.spans} == {"root": 30, "a": 30, "b": 40}
+
+
+def test_overlapped_child_is_off_the_path():
+    trace = Trace(_trace(
+        _span("root", "gateway", 0, 100),
+        _span("slow", "inventory", 0, 80, parent="root"),
+        _span("fast", "pricing", 10, 50, parent="root"),
+    ))
+    # "fast" runs entirely under "slow", which finishes last
+    assert _path(trace) == [("slow", 80), ("root", 20)]
+    # Overlapping children are counted once in the parent's self time
+    assert trace.spans[0].self_ms == 20
+
+
+def test_nested_path_sums_to_the_root_duration():
+    trace = Trace(_trace(
+        _span("root", "gateway", 0, 100),
+        _span("mid", "orders", 10, 80, parent="root"),
+        _span("leaf", "inventory", 20, 60, parent="mid"),
+        _span("side", "audit", 12, 3, parent="root"),
+    ))
+    assert _path(trace) == [("root", 20), ("mid", 20), ("leaf", 60)]
+    assert sum(ms for _, ms in trace.critical_path) == 100
+
+
+def test_child_outliving_its_parent_is_cut_at_the_parent_end():
+    trace = Trace(_trace(
+        _span("root", "gateway", 0, 100),
+        _span("async", "notifier", 90, 30, parent="root"),
+    ))
+    assert _path(trace) == [("root", 90), ("async", 10)]
+
+
+def test_span_with_unsampled_parent_is_a_root():
+    trace = Trace(_trace(
+        _span("root", "gateway", 0, 50),
+        _span("orphan", "inventory", 10, 70, parent="missing"),
+    ))
+    assert [span.span_id for span in trace.roots] == ["root", "orphan"]
+    # The root finishing last determines the end-to-end latency
+    assert _path(trace) == [("orphan", 70)]
+
+
+def test_index_summary_attributes_critical_time_per_service():
+    index = TraceIndex()
+    index.add_all([
+        _trace(
+            _span("root", "gateway", 0, 100),
+            _span("db", "inventory", 10, 85, parent="root",
+                  tags={"hikaricp.pool_status": "pool_exhausted"}, status="ERROR"),
+            trace_id="T1",
+        ),
+        _trace(
+            _span("root", "gateway", 0, 40),
+            _span("db", "inventory", 5, 30, parent="root"),
+            trace_id="T2",
+        ),
+    ])
+    summary = index.summary(flag_tags=[("hikaricp.pool_status", "pool_exhausted")])
+
+    per_service = summary["per_service"]
+    assert list(per_service) == ["inventory", "gateway"]
+    assert per_service["inventory"]["critical_path_ms"] == 115
+    assert per_service["gateway"]["critical_path_ms"] == 25
+    assert per_service["inventory"]["critical_path_share"] == round(115 / 140, 3)
+    assert per_service["inventory"]["errors"] == 1
+    assert [p["trace_id"] for p in summary["slowest_critical_paths"]] == ["T1", "T2"]
+    flagged = summary["flagged_spans"]["hikaricp.pool_status=pool_exhausted"]
+    assert flagged["count"] == 1
+    assert flagged["examples"][0]["trace_id"] == "T1"
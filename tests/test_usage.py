@@ -0,0 +1,56 @@
+import pytest
+
+from utils.usage import UsageLedger, cost_usd, summarize
+
+
+def _record(agent: str, **usage: float) -> dict:
+    return {"agent": agent, "model": "claude-3-5-sonnet-20241022", **usage}
+
+
+def test_cost_prices_each_token_kind():
+    # 1M of each kind at $3 / $15 / $3.75 / $0.30
+    assert cost_usd("claude-3-5-sonnet-20241022", 1_000_000, 1_000_000, 1_000_000, 1_000_000) == pytest.approx(22.05)
+    assert cost_usd("claude-3-5-haiku-20241022", 2_000, 500) == pytest.approx(0.0036)
+
+
+def test_unpriced_models_cost_nothing():
+    assert cost_usd("dry-run", 10_000, 10_000) == 0.0
+
+
+def test_summarize_totals_and_per_agent():
+    summary = summarize([
+        _record("RCA", input_tokens=100, output_tokens=10, latency_s=0.1234, cost_usd=0.0001),
+        _record("RCA", input_tokens=50, retries=1, latency_s=0.2),
+        _record("IMPACT", input_tokens=30, output_tokens=5, cache_read_input_tokens=20),
+    ])
+    assert list(summary["per_agent"]) == ["IMPACT", "RCA"]
+    rca = summary["per_agent"]["RCA"]
+    assert (rca["calls"], rca["input_tokens"], rca["retries"], rca["latency_s"]) == (2, 150, 1, 0.323)
+    total = summary["total"]
+    assert (total["calls"], total["input_tokens"], total["output_tokens"]) == (3, 180, 15)
+    assert total["cache_read_input_tokens"] == 20
+    assert summarize([]) == {"total": dict.fromkeys(total, 0), "per_agent": {}}
+
+
+def test_ledger_matches_summarize_without_keeping_records():
+    first = [_record("RCA", input_tokens=100, latency_s=0.5), _record("IMPACT", output_tokens=7)]
+    rerun = [_record("RCA", input_tokens=40, latency_s=0.25)]
+    ledger = UsageLedger()
+    ledger.add("INC-1", first)
+    ledger.add("INC-2", [])
+    # A folded re-run of INC-1 adds its calls, not another incident
+    ledger.add("INC-1", rerun)
+    summary = ledger.summary()
+    assert summary == {"incidents": 2, **summarize(first + rerun)}
+    assert not hasattr(ledger, "records")
+    # summary() hands out copies of the running totals
+    summary["per_agent"]["RCA"]["calls"] = 99
+    assert ledger.summary()["per_agent"]["RCA"]["calls"] == 2
+
+
+def test_ledger_remembers_only_recent_incident_ids():
+    ledger = UsageLedger(recent_incidents=2)
+    for incident_id in ("INC-1", "INC-2", "INC-3", "INC-1"):
+        ledger.add(incident_id, [])
+    assert ledger.incidents == 4
+    assert len(ledger._recent) == 2
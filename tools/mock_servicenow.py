@@ -4,9 +4,61 @@ from __future__ import annotations
 
 import asyncio
 
+from utils.change_index import ChangeRequestIndex
 
-async def get_active_change_requests(services: list[str]) -> list[dict]:
-    """Return change requests deployed or in-flight within the past 24 hours.
+
+# Indexed by service and deployment time; get_active_change_requests() is a
+# binary search per service rather than a scan
+_CHANGE_REQUESTS: list[dict] = [
+    {
+        "cr_id": "CR2077",
+        "title": "Tune HikariCP connection pool settings for inventory-service",
+        "description": (
+            "Reduce maximumPoolSize from 20 to 10 and set minimumIdle to 2 "
+            "to reduce idle connection overhead and lower DB memory pressure. "
+            "Tested under normal load — p99 latency unchanged at <200ms."
+        ),
+        "service": "inventory-service",
+        "component": "hikaricp-config",
+        "config_change": {
+            "parameter": "spring.datasource.hikari.maximum-pool-size",
+            "old_value": "20",
+            "new_value": "10",
+        },
+        "environment": "production",
+        "status": "Deployed",
+        "deployed_at": "2024-01-15T12:04:33Z",
+        "deployed_by": "james.wu@company.com",
+        "approved_by": "sarah.chen@company.com",
+        "ticket_url": "https://company.service-now.com/change/CR2077",
+        "rollback_plan": "Revert spring.datasource.hikari.maximum-pool-size to 20 via config map update and rolling restart",
+    },
+    {
+        "cr_id": "CR2081",
+        "title": "Update CDN origin routing rules for api-gateway",
+        "description": (
+            "Update CloudFront origin groups to add eu-west-2 as secondary origin. "
+            "No application code changes. Purely infrastructure-level routing."
+        ),
+        "service": "api-gateway",
+        "component": "cdn-routing",
+        "environment": "production",
+        "status": "Deployed",
+        "deployed_at": "2024-01-15T08:17:45Z",
+        "deployed_by": "priya.nair@company.com",
+        "approved_by": "tom.bradley@company.com",
+        "ticket_url": "https://company.service-now.com/change/CR2081",
+        "rollback_plan": "Revert CloudFront distribution config to previous snapshot",
+    },
+]
+_CHANGE_INDEX = ChangeRequestIndex(_CHANGE_REQUESTS)
+
+
+async def get_active_change_requests(
+    services: list[str], until: str | None = None, hours: float | None = None
+) -> list[dict]:
+    """Return change requests on `services` deployed in the `hours` before `until`
+    (ISO timestamp), oldest first; without them, every CR on those services.
 
     CR2077 is the key suspect: it reduced HikariCP max-pool-size from 20 → 10
     on inventory-service, deployed exactly 2 hours before the incident.
@@ -14,57 +66,14 @@ async def get_active_change_requests(services: list[str]) -> list[dict]:
     """
     await asyncio.sleep(0)
 
-    all_crs = [
-        {
-            "cr_id": "CR2077",
-            "title": "Tune HikariCP connection pool settings for inventory-service",
-            "description": (
-                "Reduce maximumPoolSize from 20 to 10 and set minimumIdle to 2 "
-                "to reduce idle connection overhead and lower DB memory pressure. "
-                "Tested under normal load — p99 latency unchanged at <200ms."
-            ),
-            "service": "inventory-service",
-            "component": "hikaricp-config",
-            "config_change": {
-                "parameter": "spring.datasource.hikari.maximum-pool-size",
-                "old_value": "20",
-                "new_value": "10",
-            },
-            "environment": "production",
-            "status": "Deployed",
-            "deployed_at": "2024-01-15T12:04:33Z",
-            "deployed_by": "james.wu@company.com",
-            "approved_by": "sarah.chen@company.com",
-            "ticket_url": "https://company.service-now.com/change/CR2077",
-            "rollback_plan": "Revert spring.datasource.hikari.maximum-pool-size to 20 via config map update and rolling restart",
-        },
-        {
-            "cr_id": "CR2081",
-            "title": "Update CDN origin routing rules for api-gateway",
-            "description": (
-                "Update CloudFront origin groups to add eu-west-2 as secondary origin. "
-                "No application code changes. Purely infrastructure-level routing."
-            ),
-            "service": "api-gateway",
-            "component": "cdn-routing",
-            "environment": "production",
-            "status": "Deployed",
-            "deployed_at": "2024-01-15T08:17:45Z",
-            "deployed_by": "priya.nair@company.com",
-            "approved_by": "tom.bradley@company.com",
-            "ticket_url": "https://company.service-now.com/change/CR2081",
-            "rollback_plan": "Revert CloudFront distribution config to previous snapshot",
-        },
-    ]
-
-    return [cr for cr in all_crs if cr["service"] in services]
+    return _CHANGE_INDEX.window(services, until, hours)
 
 
-async def search_past_incidents(keywords: list[str]) -> list[dict]:
-    """Return past resolved incidents relevant to the given keywords."""
+async def search_past_incidents(keywords: list[str], limit: int = 20) -> list[dict]:
+    """Return up to `limit` past resolved incidents relevant to the given keywords."""
     await asyncio.sleep(0)
 
-    return [
+    incidents = [
         {
             "incident_id": "INC-1843",
             "title": "inventory-service degradation during Black Friday flash sale",
@@ -124,3 +133,5 @@ async def search_past_incidents(keywords: list[str]) -> list[dict]:
             "tags": ["connection-pool", "redis", "circuit-breaker", "api-gateway"],
         },
     ]
+
+    return incidents[:limit]
@@ -3,6 +3,122 @@
 from __future__ import annotations
 
 import asyncio
+from typing import AsyncIterator
+
+# Largest page the search API returns, mirroring Splunk's per-request cap
+MAX_PAGE_SIZE = 1_000
+
+# Sorted by timestamp — pagination cursors rely on it
+_ERROR_LOGS: list[dict] = [
+    {
+        "timestamp": "2024-01-15T14:02:11.334Z",
+        "service": "inventory-service",
+        "level": "ERROR",
+        "thread": "http-nio-8080-exec-47",
+        "logger": "com.acme.inventory.service.InventoryService",
+        "message": "HikariPool-1 connection is not available, request timed out after 30000ms",
+        "exception_class": "com.zaxxer.hikari.pool.HikariPool$PoolTimeoutException",
+        "stack_trace_snippet": (
+            "com.zaxxer.hikari.pool.HikariPool$PoolTimeoutException: "
+            "HikariPool-1 connection is not available, request timed out after 30000ms\n"
+            "\tat com.zaxxer.hikari.pool.HikariPool.getConnection(HikariPool.java:213)\n"
+            "\tat com.zaxxer.hikari.pool.HikariPool.getConnection(HikariPool.java:163)\n"
+            "\tat com.acme.inventory.repository.InventoryRepository.findBySkuForUpdate(InventoryRepository.java:88)\n"
+            "\tat com.acme.inventory.service.InventoryService.reserveStock(InventoryService.java:142)"
+        ),
+        "hikaricp": {
+            "pool_name": "HikariPool-1",
+            "max_pool_size": 10,
+            "active_connections": 10,
+            "idle_connections": 0,
+            "pending_threads": 143,
+        },
+    },
+    {
+        "timestamp": "2024-01-15T14:02:14.891Z",
+        "service": "inventory-service",
+        "level": "ERROR",
+        "thread": "http-nio-8080-exec-51",
+        "logger": "com.acme.inventory.service.InventoryService",
+        "message": "HikariPool-1 connection is not available, request timed out after 30000ms",
+        "exception_class": "com.zaxxer.hikari.pool.HikariPool$PoolTimeoutException",
+        "stack_trace_snippet": (
+            "com.zaxxer.hikari.pool.HikariPool$PoolTimeoutException: "
+            "HikariPool-1 connection is not available, request timed out after 30000ms\n"
+            "\tat com.zaxxer.hikari.pool.HikariPool.getConnection(HikariPool.java:213)\n"
+            "\tat com.acme.inventory.service.InventoryService.reserveStock(InventoryService.java:142)"
+        ),
+        "hikaricp": {
+            "pool_name": "HikariPool-1",
+            "max_pool_size": 10,
+            "active_connections": 10,
+            "idle_connections": 0,
+            "pending_threads": 167,
+        },
+    },
+    {
+        "timestamp": "2024-01-15T14:02:18.112Z",
+        "service": "order-service",
+        "level": "ERROR",
+        "thread": "http-nio-8081-exec-22",
+        "logger": "com.acme.order.service.OrderService",
+        "message": "Upstream call to inventory-service failed: timeout after 18340ms",
+        "exception_class": "feign.RetryableException",
+        "stack_trace_snippet": (
+            "feign.RetryableException: timeout after 18340ms\n"
+            "\tat feign.FeignException.errorStatus(FeignException.java:92)\n"
+            "\tat com.acme.order.client.InventoryClient.reserveStock(InventoryClient.java:54)\n"
+            "\tat com.acme.order.service.OrderService.createOrder(OrderService.java:211)"
+        ),
+        "upstream_service": "inventory-service",
+        "timeout_ms": 18_340,
+    },
+    {
+        "timestamp": "2024-01-15T14:02:21.445Z",
+        "service": "inventory-service",
+        "level": "ERROR",
+        "thread": "http-nio-8080-exec-58",
+        "logger": "com.acme.inventory.service.InventoryService",
+        "message": "Pool exhausted — pool size max=10 active=10 idle=0 waiting=189 threads. "
+                   "Consider increasing maximumPoolSize or reducing connection hold time.",
+        "exception_class": "com.zaxxer.hikari.pool.HikariPool$PoolTimeoutException",
+        "stack_trace_snippet": (
+            "com.zaxxer.hikari.pool.HikariPool$PoolTimeoutException: "
+            "connection is not available, request timed out after 30000ms\n"
+            "\tat com.zaxxer.hikari.pool.HikariPool.getConnection(HikariPool.java:213)"
+        ),
+        "hikaricp": {
+            "pool_name": "HikariPool-1",
+            "max_pool_size": 10,
+            "active_connections": 10,
+            "idle_connections": 0,
+            "pending_threads": 189,
+            "connection_timeout_ms": 30_000,
+        },
+    },
+    {
+        "timestamp": "2024-01-15T14:02:29.007Z",
+        "service": "api-gateway",
+        "level": "ERROR",
+        "thread": "reactor-http-nio-3",
+        "logger": "com.acme.gateway.filter.CircuitBreakerFilter",
+        "message": "Circuit breaker OPEN for route inventory-service — "
+                   "failure rate 42.1% exceeds threshold 40%",
+        "exception_class": "io.github.resilience4j.circuitbreaker.CallNotPermittedException",
+        "stack_trace_snippet": (
+            "io.github.resilience4j.circuitbreaker.CallNotPermittedException: "
+            "CircuitBreaker 'inventory-service' is OPEN and does not permit further calls\n"
+            "\tat io.github.resilience4j.circuitbreaker.CircuitBreaker.lambda$decorateSupplier"
+        ),
+        "circuit_breaker": {
+            "name": "inventory-service",
+            "state": "OPEN",
+            "failure_rate_pct": 42.1,
+            "threshold_pct": 40,
+            "slow_call_duration_threshold_ms": 5_000,
+        },
+    },
+]
 
 
 async def query_error_logs(services: list[str]) -> list[dict]:
@@ -10,118 +126,87 @@ async def query_error_logs(services: list[str]) -> list[dict]:
 
     inventory-service logs repeatedly show HikariCP connection pool exhaustion,
     which is the key error pattern linking to the DB pool config change in CR2077.
+    Materialises the full result set; prefer stream_error_logs() for anything
+    larger than a handful of entries.
     """
     await asyncio.sleep(0)
 
-    all_logs = [
-        {
-            "timestamp": "2024-01-15T14:02:11.334Z",
-            "service": "inventory-service",
-            "level": "ERROR",
-            "thread": "http-nio-8080-exec-47",
-            "logger": "com.acme.inventory.service.InventoryService",
-            "message": "HikariPool-1 connection is not available, request timed out after 30000ms",
-            "exception_class": "com.zaxxer.hikari.pool.HikariPool$PoolTimeoutException",
-            "stack_trace_snippet": (
-                "com.zaxxer.hikari.pool.HikariPool$PoolTimeoutException: "
-                "HikariPool-1 connection is not available, request timed out after 30000ms\n"
-                "\tat com.zaxxer.hikari.pool.HikariPool.getConnection(HikariPool.java:213)\n"
-                "\tat com.zaxxer.hikari.pool.HikariPool.getConnection(HikariPool.java:163)\n"
-                "\tat com.acme.inventory.repository.InventoryRepository.findBySkuForUpdate(InventoryRepository.java:88)\n"
-                "\tat com.acme.inventory.service.InventoryService.reserveStock(InventoryService.java:142)"
-            ),
-            "hikaricp": {
-                "pool_name": "HikariPool-1",
-                "max_pool_size": 10,
-                "active_connections": 10,
-                "idle_connections": 0,
-                "pending_threads": 143,
-            },
-        },
-        {
-            "timestamp": "2024-01-15T14:02:14.891Z",
-            "service": "inventory-service",
-            "level": "ERROR",
-            "thread": "http-nio-8080-exec-51",
-            "logger": "com.acme.inventory.service.InventoryService",
-            "message": "HikariPool-1 connection is not available, request timed out after 30000ms",
-            "exception_class": "com.zaxxer.hikari.pool.HikariPool$PoolTimeoutException",
-            "stack_trace_snippet": (
-                "com.zaxxer.hikari.pool.HikariPool$PoolTimeoutException: "
-                "HikariPool-1 connection is not available, request timed out after 30000ms\n"
-                "\tat com.zaxxer.hikari.pool.HikariPool.getConnection(HikariPool.java:213)\n"
-                "\tat com.acme.inventory.service.InventoryService.reserveStock(InventoryService.java:142)"
-            ),
-            "hikaricp": {
-                "pool_name": "HikariPool-1",
-                "max_pool_size": 10,
-                "active_connections": 10,
-                "idle_connections": 0,
-                "pending_threads": 167,
-            },
-        },
-        {
-            "timestamp": "2024-01-15T14:02:18.112Z",
-            "service": "order-service",
-            "level": "ERROR",
-            "thread": "http-nio-8081-exec-22",
-            "logger": "com.acme.order.service.OrderService",
-            "message": "Upstream call to inventory-service failed: timeout after 18340ms",
-            "exception_class": "feign.RetryableException",
-            "stack_trace_snippet": (
-                "feign.RetryableException: timeout after 18340ms\n"
-                "\tat feign.FeignException.errorStatus(FeignException.java:92)\n"
-                "\tat com.acme.order.client.InventoryClient.reserveStock(InventoryClient.java:54)\n"
-                "\tat com.acme.order.service.OrderService.createOrder(OrderService.java:211)"
-            ),
-            "upstream_service": "inventory-service",
-            "timeout_ms": 18_340,
-        },
-        {
-            "timestamp": "2024-01-15T14:02:21.445Z",
-            "service": "inventory-service",
-            "level": "ERROR",
-            "thread": "http-nio-8080-exec-58",
-            "logger": "com.acme.inventory.service.InventoryService",
-            "message": "Pool exhausted — pool size max=10 active=10 idle=0 waiting=189 threads. "
-                       "Consider increasing maximumPoolSize or reducing connection hold time.",
-            "exception_class": "com.zaxxer.hikari.pool.HikariPool$PoolTimeoutException",
-            "stack_trace_snippet": (
-                "com.zaxxer.hikari.pool.HikariPool$PoolTimeoutException: "
-                "connection is not available, request timed out after 30000ms\n"
-                "\tat com.zaxxer.hikari.pool.HikariPool.getConnection(HikariPool.java:213)"
-            ),
-            "hikaricp": {
-                "pool_name": "HikariPool-1",
-                "max_pool_size": 10,
-                "active_connections": 10,
-                "idle_connections": 0,
-                "pending_threads": 189,
-                "connection_timeout_ms": 30_000,
-            },
-        },
-        {
-            "timestamp": "2024-01-15T14:02:29.007Z",
-            "service": "api-gateway",
-            "level": "ERROR",
-            "thread": "reactor-http-nio-3",
-            "logger": "com.acme.gateway.filter.CircuitBreakerFilter",
-            "message": "Circuit breaker OPEN for route inventory-service — "
-                       "failure rate 42.1% exceeds threshold 40%",
-            "exception_class": "io.github.resilience4j.circuitbreaker.CallNotPermittedException",
-            "stack_trace_snippet": (
-                "io.github.resilience4j.circuitbreaker.CallNotPermittedException: "
-                "CircuitBreaker 'inventory-service' is OPEN and does not permit further calls\n"
-                "\tat io.github.resilience4j.circuitbreaker.CircuitBreaker.lambda$decorateSupplier"
-            ),
-            "circuit_breaker": {
-                "name": "inventory-service",
-                "state": "OPEN",
-                "failure_rate_pct": 42.1,
-                "threshold_pct": 40,
-                "slow_call_duration_threshold_ms": 5_000,
-            },
-        },
-    ]
+    return [entry for entry in _ERROR_LOGS if entry["service"] in services]
+
 
-    return [entry for entry in all_logs if entry["service"] in services]
+async def query_error_logs_page(
+    services: list[str],
+    earliest: str | None = None,
+    latest: str | None = None,
+    cursor: str | None = None,
+    page_size: int = 200,
+) -> dict:
+    """Return one page of error logs in [earliest, latest), oldest first.
+
+    The cursor is a time-window cursor, "<timestamp>#<n>": the page resumes
+    after the first n entries at that timestamp. Returns
+    {"entries": [...], "next_cursor": str | None}.
+    """
+    await asyncio.sleep(0)
+
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    after, skip = None, 0
+    if cursor:
+        after, _, count = cursor.rpartition("#")
+        skip = int(count)
+    skipped = skip
+    bounds = [t for t in (earliest, after) if t is not None]
+
+    entries: list[dict] = []
+    for i in range(_first_at_or_after(max(bounds)) if bounds else 0, len(_ERROR_LOGS)):
+        entry = _ERROR_LOGS[i]
+        ts = entry["timestamp"]
+        if latest is not None and ts >= latest:
+            break
+        if entry["service"] not in services:
+            continue
+        if ts == after and skip:
+            skip -= 1
+            continue
+        if len(entries) == page_size:
+            last = entries[-1]["timestamp"]
+            # The cursor's own entries at this timestamp were skipped, not returned
+            seen = sum(1 for e in entries if e["timestamp"] == last) + (
+                skipped if last == after else 0
+            )
+            return {"entries": entries, "next_cursor": f"{last}#{seen}"}
+        entries.append(entry)
+    return {"entries": entries, "next_cursor": None}
+
+
+def _first_at_or_after(timestamp: str) -> int:
+    """Index of the first log entry stamped at or after `timestamp` (binary search)."""
+    lo, hi = 0, len(_ERROR_LOGS)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _ERROR_LOGS[mid]["timestamp"] < timestamp:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+async def stream_error_logs(
+    services: list[str],
+    earliest: str | None = None,
+    latest: str | None = None,
+    page_size: int = 200,
+) -> AsyncIterator[list[dict]]:
+    """Yield pages of error logs, following cursors until the window is exhausted.
+
+    Only one page is held at a time, so callers that aggregate as they go
+    use flat memory however large the result set is.
+    """
+    cursor: str | None = None
+    while True:
+        page = await query_error_logs_page(services, earliest, latest, cursor, page_size)
+        if page["entries"]:
+            yield page["entries"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
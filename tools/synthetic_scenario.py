@@ -0,0 +1,1005 @@
+"""Seeded, large-scale synthetic incident served through the mock tool APIs.
+
+The hand-written mocks (mock_dynatrace, mock_splunk, mock_servicenow,
+mock_pagerduty) describe one flash-sale incident with a handful of records.
+SyntheticScenario generates a consistent world of any size from a seed: a
+layered service call graph, error logs, distributed traces, change requests,
+past incidents and on-call data, all sharing one topology and one timeline.
+Exactly one root cause is planted — a change request that shrank a
+mid-tier service's HikariCP pool two hours before the incident — and
+ground_truth() says what the pipeline should find.
+
+Bulk data stays compact until a tool returns it: log lines are stored as
+columns, change requests and past incidents as index tuples, and traces are
+regenerated per call from their own seeds, so a million log lines cost tens
+of megabytes rather than gigabytes.
+
+Usage:
+    scenario = SyntheticScenario(seed=7, **SCALES["large"])
+    orchestrator = MIBridgeOrchestrator(llm=llm, tools=scenario.tools())
+    await orchestrator.handle_alert(scenario.alert())
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import heapq
+import random
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Iterator
+
+from models import RawAlert
+from tools.mock_splunk import MAX_PAGE_SIZE
+from utils.change_index import ChangeRequestIndex
+
+SCALES: dict[str, dict[str, int]] = {
+    "small": {
+        "services": 40,
+        "log_lines": 20_000,
+        "traces": 500,
+        "past_incidents": 2_000,
+        "change_requests": 200,
+    },
+    "large": {
+        "services": 500,
+        "log_lines": 1_000_000,
+        "traces": 10_000,
+        "past_incidents": 50_000,
+        "change_requests": 5_000,
+    },
+}
+
+_DOMAINS = [
+    "inventory", "order", "payment", "cart", "catalog", "pricing", "search", "user",
+    "auth", "shipping", "notification", "review", "recommendation", "loyalty", "tax",
+    "fraud", "ledger", "invoice", "promotion", "media", "warehouse", "returns",
+    "subscription", "wishlist", "checkout", "identity", "analytics", "billing",
+]
+_QUALIFIERS = [
+    "reservation", "query", "sync", "events", "export", "import", "cache", "rules",
+    "scheduler", "indexer", "gateway", "audit", "reporting", "pricing", "batch",
+    "stream", "history", "admin", "policy", "quota",
+]
+_EDGES = ["api-gateway", "mobile-bff", "web-bff", "partner-api", "admin-gateway"]
+_ENDPOINTS = [
+    "POST /checkout", "GET /cart", "GET /product/{id}", "GET /search", "POST /login",
+    "GET /orders", "POST /returns", "GET /account",
+]
+_FIRST = [
+    "James", "Sarah", "Anika", "Raj", "Marcus", "Elena", "Lena", "David", "Priya", "Tom",
+    "Mei", "Omar", "Sofia", "Kenji", "Amara", "Lucas", "Nina", "Ivan", "Grace", "Tariq",
+]
+_LAST = [
+    "Wu", "Chen", "Patel", "Gupta", "Johnson", "Rodriguez", "Fischer", "Kim", "Nair",
+    "Bradley", "Lin", "Haddad", "Rossi", "Tanaka", "Okafor", "Silva", "Novak", "Petrov",
+    "Hughes", "Aziz",
+]
+
+# Share of the log window before the incident starts, and how much busier
+# error logging is once it has
+_PRE_ONSET_MINUTES = 60
+_POST_ONSET_MINUTES = 30
+_ONSET_RATE_MULTIPLIER = 8
+
+# Log line kinds stored in the kind column: the planted failure's four, then noise
+_POOL_TIMEOUT, _POOL_EXHAUSTED, _UPSTREAM_TIMEOUT, _CIRCUIT_OPEN = range(4)
+_NOISE_ERRORS = [
+    ("java.net.SocketException", "Connection reset by peer while calling {dep} after {a}ms"),
+    ("org.postgresql.util.PSQLException",
+     "ERROR: deadlock detected; transaction {a} rolled back after {b}ms"),
+    ("io.lettuce.core.RedisCommandTimeoutException",
+     "Command timed out after {a}ms on redis shard {b}"),
+    ("javax.validation.ConstraintViolationException",
+     "Validation failed for request {a}: field 'sku' must not be null"),
+    ("org.apache.kafka.common.errors.TimeoutException",
+     "Consumer lag {a} exceeds threshold on partition {b}"),
+    ("java.util.concurrent.RejectedExecutionException",
+     "Task rejected from executor: pool size {b}, queued tasks {a}"),
+]
+
+# Past-incident failure modes: (tags, title, symptoms, root cause, resolution).
+# The first is the planted incident's own mode.
+_INCIDENT_MODES = [
+    (
+        ["hikaricp", "connection-pool", "timeout"],
+        "{svc} degradation — DB connection pool exhaustion",
+        "{b}% error rate, p99 latency >{a}s on {svc}",
+        "DB connection pool starvation: maximumPoolSize was {p}, too small for peak traffic. "
+        "Requests queued for a connection until they timed out.",
+        "Increased HikariCP maximumPoolSize from {p} to {q} via ConfigMap update and "
+        "rolling restart of {svc}.",
+    ),
+    (
+        ["deadlock", "database", "index"],
+        "{svc} latency spike — DB deadlock storm",
+        "p99 latency {a}s, {b}% error rate, transaction rollback errors in logs",
+        "Missing index caused full table scans under concurrent writes, leading to "
+        "row-level lock contention.",
+        "Added a composite index; latency normalized within minutes.",
+    ),
+    (
+        ["redis", "connection-pool", "cache"],
+        "{svc} 503 storm — Redis pool exhaustion",
+        "{b}% HTTP 503s, {svc} unresponsive",
+        "{svc} Redis connection pool exhausted during a promotional campaign; callers' "
+        "circuit breakers opened.",
+        "Scaled the Redis connection pool from {p} to {q} and reset circuit breakers.",
+    ),
+    (
+        ["memory", "gc", "oom"],
+        "{svc} pods OOMKilled after memory leak",
+        "Pod restarts every {a} minutes, {b}% error rate during restarts",
+        "Unbounded in-process cache grew until the heap was exhausted.",
+        "Rolled back to the previous release and bounded the cache.",
+    ),
+    (
+        ["dns", "network", "timeout"],
+        "{svc} intermittent timeouts — DNS resolution failures",
+        "{b}% of outbound calls timing out after {a}s",
+        "CoreDNS pods were CPU-throttled, so name lookups timed out under load.",
+        "Raised CoreDNS CPU limits and enabled node-local DNS caching.",
+    ),
+    (
+        ["tls", "certificate", "expiry"],
+        "{svc} handshake failures — expired certificate",
+        "{b}% of requests failing TLS handshake",
+        "An internal certificate expired; automated rotation had been disabled.",
+        "Rotated the certificate and re-enabled rotation alerts.",
+    ),
+    (
+        ["deployment", "rollback", "regression"],
+        "{svc} error spike after release",
+        "Error rate jumped to {b}% within {a} minutes of deployment",
+        "A regression in the new release broke request validation.",
+        "Rolled back the deployment via ArgoCD.",
+    ),
+    (
+        ["kafka", "consumer-lag", "queue"],
+        "{svc} processing delays — Kafka consumer lag",
+        "Consumer lag above {a}k messages, downstream data {b} minutes stale",
+        "A consumer group rebalance loop stalled processing.",
+        "Raised max.poll.interval.ms and restarted consumers.",
+    ),
+    (
+        ["thread-pool", "timeout", "saturation"],
+        "{svc} request timeouts — worker thread pool saturation",
+        "p99 latency {a}s, {b}% timeouts",
+        "A slow downstream call held all worker threads.",
+        "Added a bulkhead and a tighter client timeout on the downstream call.",
+    ),
+]
+_SEVERITIES = ["P1", "P2", "P2", "P3", "P3", "P3", "P4"]
+
+# Change-request templates: (title, description, component)
+_CR_TEMPLATES = [
+    ("Bump {svc} HTTP client library to 4.{a}.{b}", "Dependency upgrade; no configuration "
+     "changes.", "dependencies"),
+    ("Scale {svc} replicas from {a} to {b}", "Horizontal scaling ahead of forecast traffic.",
+     "k8s-deployment"),
+    ("Enable feature flag for {svc} on {b}% of traffic", "Gradual rollout behind a flag.",
+     "feature-flags"),
+    ("Rotate TLS certificates for {svc}", "Scheduled certificate rotation.", "tls"),
+    ("Tune JVM heap for {svc} (-Xmx{a}g)", "Reduce GC pause frequency.", "jvm-config"),
+    ("Update log retention for {svc} to {b} days", "Storage cost reduction.", "logging"),
+]
+
+_WORD = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+class SyntheticScenario:
+    """One generated incident world; tools() serves it with the mock tools' API.
+
+    Sizes default to SCALES["small"]. Two scenarios with the same seed and
+    sizes are identical.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        services: int = 40,
+        log_lines: int = 20_000,
+        traces: int = 500,
+        past_incidents: int = 2_000,
+        change_requests: int = 200,
+        incident_at: datetime = datetime(2024, 1, 15, 14, 2, tzinfo=timezone.utc),
+    ) -> None:
+        if services < 8:
+            raise ValueError("a scenario needs at least 8 services")
+        self.seed = seed
+        self.incident_at = incident_at
+        self.trace_count = traces
+        self._onset_ms = int(incident_at.timestamp() * 1000)
+
+        self._build_topology(services)
+        self._build_logs(log_lines)
+        self._build_change_requests(change_requests)
+        self._build_incidents(past_incidents)
+
+    def _rng(self, *scope: Any) -> random.Random:
+        # Independent stream per part of the world, so resizing one dataset
+        # does not reshuffle the others
+        return random.Random(":".join(map(str, (self.seed, *scope))))
+
+    # ── Topology ─────────────────────────────────────────────────────────────
+
+    def _build_topology(self, count: int) -> None:
+        rng = self._rng("topology")
+        edges = _EDGES[: max(1, min(len(_EDGES), count // 100))]
+        names = [f"{d}-service" for d in _DOMAINS] + [
+            f"{d}-{q}-service" for d in _DOMAINS for q in _QUALIFIERS if q != d
+        ]
+        if count - len(edges) > len(names):
+            raise ValueError(f"at most {len(names) + len(edges)} services are supported")
+        inner = names[: len(_DOMAINS)] + rng.sample(
+            names[len(_DOMAINS):], max(0, count - len(edges) - len(_DOMAINS))
+        )
+        inner = inner[: count - len(edges)]
+        rng.shuffle(inner)
+
+        # Edges, then three tiers of internal services: 25% / 40% / 35%
+        cut1, cut2 = len(inner) // 4, len(inner) * 65 // 100
+        tiers = [edges, inner[:cut1], inner[cut1:cut2], inner[cut2:]]
+        self.services: list[str] = [s for tier in tiers for s in tier]
+        self._index = {name: i for i, name in enumerate(self.services)}
+        self.tier = {s: t for t, tier in enumerate(tiers) for s in tier}
+
+        self._edges = edges
+        self.calls: dict[str, list[str]] = {s: [] for s in self.services}
+        self.callers: dict[str, list[str]] = {s: [] for s in self.services}
+        callers = self.callers
+        for upper, lower in zip(tiers, tiers[1:]):
+            fan_out = (3, 8) if upper is edges else (1, 3)
+            for svc in upper:
+                for callee in rng.sample(lower, min(len(lower), rng.randint(*fan_out))):
+                    self.calls[svc].append(callee)
+                    callers[callee].append(svc)
+            for svc in lower:
+                if not callers[svc]:
+                    caller = rng.choice(upper)
+                    self.calls[caller].append(svc)
+                    callers[svc].append(caller)
+
+        # The planted root cause sits in the middle of the graph
+        self.root_service: str = rng.choice(tiers[2])
+        self.pool_before, self.pool_after = rng.choice([(20, 10), (30, 12), (24, 8), (40, 16)])
+
+        # Everything upstream of the root, nearest first; next_hop leads back to it
+        self.distance = {self.root_service: 0}
+        self.next_hop: dict[str, str] = {}
+        queue = deque([self.root_service])
+        while queue:
+            svc = queue.popleft()
+            for caller in sorted(callers[svc]):
+                if caller not in self.distance:
+                    self.distance[caller] = self.distance[svc] + 1
+                    self.next_hop[caller] = svc
+                    queue.append(caller)
+        self.impacted = sorted(self.distance, key=lambda s: (self.distance[s], s))
+        self._impacted_edges = [s for s in self.impacted if self.tier[s] == 0]
+        self._impacted_mid = [s for s in self.impacted[1:] if self.tier[s] > 0]
+
+    # ── Error logs ───────────────────────────────────────────────────────────
+
+    def _build_logs(self, count: int) -> None:
+        rng = self._rng("logs")
+        before = _PRE_ONSET_MINUTES
+        after = _POST_ONSET_MINUTES * _ONSET_RATE_MULTIPLIER
+        n_before = count * before // (before + after)
+        start = self._onset_ms - _PRE_ONSET_MINUTES * 60_000
+        post_ms = _POST_ONSET_MINUTES * 60_000
+
+        self._log_ts = array("q")
+        self._log_svc = array("H")
+        self._log_kind = array("B")
+        self._log_a = array("i")
+        self._log_b = array("i")
+        root = self._index[self.root_service]
+        mid = [self._index[s] for s in self._impacted_mid] or [root]
+        edges = [self._index[s] for s in self._impacted_edges]
+        n_services = len(self.services)
+        n_noise = len(_NOISE_ERRORS)
+        # random() scaled by hand: randint/choice cost several times more per draw
+        draw = rng.random
+
+        for segment, (n, t0, span) in enumerate(
+            [(n_before, start, self._onset_ms - start), (count - n_before, self._onset_ms, post_ms)]
+        ):
+            step = span / max(n, 1)
+            for i in range(n):
+                ts = t0 + int((i + draw()) * step)
+                roll = draw()
+                if segment == 1 and roll < 0.85:
+                    roll /= 0.85
+                    if roll < 0.5:
+                        svc = root
+                        kind = _POOL_TIMEOUT if roll < 0.4 else _POOL_EXHAUSTED
+                        progress = (ts - self._onset_ms) / post_ms
+                        a = int(40 + 200 * progress + 30 * draw())
+                    elif roll < 0.9 or not edges:
+                        svc = mid[int(draw() * len(mid))]
+                        kind, a = _UPSTREAM_TIMEOUT, 5_000 + int(25_000 * draw())
+                    else:
+                        svc = edges[int(draw() * len(edges))]
+                        kind, a = _CIRCUIT_OPEN, 400 + int(120 * draw())
+                else:
+                    svc = int(draw() * n_services)
+                    kind = 4 + int(draw() * n_noise)
+                    a = 100 + int(9_900 * draw())
+                self._log_ts.append(ts)
+                self._log_svc.append(svc)
+                self._log_kind.append(kind)
+                self._log_a.append(a)
+                self._log_b.append(1 + int(200 * draw()))
+
+    def _log_entry(self, i: int) -> dict[str, Any]:
+        service = self.services[self._log_svc[i]]
+        kind, a, b = self._log_kind[i], self._log_a[i], self._log_b[i]
+        pkg, cls = _package(service), _class_name(service)
+        entry: dict[str, Any] = {
+            "timestamp": _iso_ms(self._log_ts[i]),
+            "service": service,
+            "level": "ERROR",
+            "thread": f"http-nio-{8080 + self._log_svc[i] % 20}-exec-{b}",
+            "logger": f"com.acme.{pkg}.service.{cls}",
+        }
+        if kind in (_POOL_TIMEOUT, _POOL_EXHAUSTED):
+            exc = "com.zaxxer.hikari.pool.HikariPool$PoolTimeoutException"
+            if kind == _POOL_TIMEOUT:
+                message = "HikariPool-1 connection is not available, request timed out after 30000ms"
+            else:
+                message = (
+                    f"Pool exhausted — pool size max={self.pool_after} active={self.pool_after} "
+                    f"idle=0 waiting={a} threads. Consider increasing maximumPoolSize or "
+                    "reducing connection hold time."
+                )
+            entry.update(
+                message=message,
+                exception_class=exc,
+                stack_trace_snippet=(
+                    f"{exc}: HikariPool-1 connection is not available, request timed out after 30000ms\n"
+                    "\tat com.zaxxer.hikari.pool.HikariPool.getConnection(HikariPool.java:213)\n"
+                    f"\tat com.acme.{pkg}.repository.{cls[:-7]}Repository.findForUpdate"
+                ),
+                hikaricp={
+                    "pool_name": "HikariPool-1",
+                    "max_pool_size": self.pool_after,
+                    "active_connections": self.pool_after,
+                    "idle_connections": 0,
+                    "pending_threads": a,
+                    "connection_timeout_ms": 30_000,
+                },
+            )
+        elif kind == _UPSTREAM_TIMEOUT:
+            upstream = self.next_hop.get(service, self.root_service)
+            entry.update(
+                message=f"Upstream call to {upstream} failed: timeout after {a}ms",
+                exception_class="feign.RetryableException",
+                stack_trace_snippet=(
+                    f"feign.RetryableException: timeout after {a}ms\n"
+                    f"\tat com.acme.{pkg}.client.{_class_name(upstream)[:-7]}Client.call"
+                ),
+                upstream_service=upstream,
+                timeout_ms=a,
+            )
+        elif kind == _CIRCUIT_OPEN:
+            route = self.next_hop.get(service, self.root_service)
+            rate = a / 10
+            entry.update(
+                message=f"Circuit breaker OPEN for route {route} — "
+                        f"failure rate {rate:.1f}% exceeds threshold 40%",
+                exception_class="io.github.resilience4j.circuitbreaker.CallNotPermittedException",
+                circuit_breaker={
+                    "name": route,
+                    "state": "OPEN",
+                    "failure_rate_pct": rate,
+                    "threshold_pct": 40,
+                },
+            )
+        else:
+            exc, fmt = _NOISE_ERRORS[kind - 4]
+            callees = self.calls[service]
+            dep = callees[a % len(callees)] if callees else "postgres-primary"
+            entry.update(message=fmt.format(a=a, b=b, dep=dep), exception_class=exc)
+        return entry
+
+    # ── Traces ───────────────────────────────────────────────────────────────
+
+    def _trace(self, i: int) -> dict[str, Any]:
+        rng = self._rng("trace", i)
+        trace_id = f"TRC-{i:06d}"
+        window = (_PRE_ONSET_MINUTES + _POST_ONSET_MINUTES) * 60_000
+        started = self._onset_ms - _PRE_ONSET_MINUTES * 60_000 + rng.randrange(window)
+        # Half the traces after onset run through the failing path
+        hot = started >= self._onset_ms and rng.random() < 0.5
+        if hot:
+            edge, endpoint = rng.choice(self._impacted_edges), "POST /checkout"
+        else:
+            edge, endpoint = rng.choice(self._edges), rng.choice(_ENDPOINTS)
+
+        spans: list[dict[str, Any]] = []
+
+        def build(service: str, parent: str | None, start: int, depth: int) -> tuple[int, str]:
+            span_id = f"SPN-{i:06d}-{len(spans) + 1:02d}"
+            span: dict[str, Any] = {
+                "span_id": span_id,
+                "service": service,
+                "operation": endpoint if parent is None else f"{_class_name(service)}.handle",
+                "start_offset_ms": start,
+                "duration_ms": 0,
+                "status": "OK",
+            }
+            if parent is not None:
+                span["parent_span_id"] = parent
+            spans.append(span)
+            cursor = start + rng.randint(1, 5)
+
+            if hot and service == self.root_service:
+                wait = rng.randint(5_000, 30_000)
+                cursor += wait
+                span["status"] = "TIMEOUT" if wait >= 29_000 else "ERROR"
+                span["tags"] = {
+                    "db.type": "postgresql",
+                    "hikaricp.pool": "HikariPool-1",
+                    "hikaricp.connection_wait_ms": wait,
+                    "hikaricp.pool_status": "pool_exhausted",
+                    "hikaricp.pool_size_max": self.pool_after,
+                    "hikaricp.pool_size_idle": 0,
+                }
+                span["error"] = (
+                    "HikariPool$ConnectionTimeout: HikariPool-1 connection is not available"
+                )
+            else:
+                hop = self.next_hop.get(service) if hot else None
+                others = [c for c in self.calls[service] if c != hop]
+                width = rng.randint(0, 2) if depth < 4 and len(spans) < 20 else 0
+                children = ([hop] if hop else []) + rng.sample(others, min(width, len(others)))
+                failed = False
+                for callee in children:
+                    if failed:
+                        # Work after a failed dependency is abandoned
+                        spans.append({
+                            "span_id": f"SPN-{i:06d}-{len(spans) + 1:02d}",
+                            "parent_span_id": span_id,
+                            "service": callee,
+                            "operation": f"{_class_name(callee)}.handle",
+                            "start_offset_ms": cursor,
+                            "duration_ms": 0,
+                            "status": "SKIPPED",
+                        })
+                        continue
+                    end, status = build(callee, span_id, cursor, depth + 1)
+                    cursor = end + rng.randint(0, 3)
+                    if status != "OK" and callee == hop:
+                        failed = True
+                        span["status"] = "ERROR"
+                cursor += rng.randint(2, 40)
+                if span["status"] == "OK" and rng.random() < 0.01:
+                    span["status"] = "ERROR"
+            span["duration_ms"] = cursor - start
+            return cursor, span["status"]
+
+        end, status = build(edge, None, 0, 0)
+        return {
+            "trace_id": trace_id,
+            "root_service": edge,
+            "endpoint": endpoint,
+            "started_at": _iso_ms(started),
+            "total_duration_ms": end,
+            "status": status,
+            "spans": spans,
+        }
+
+    # ── Change requests ──────────────────────────────────────────────────────
+
+    def _build_change_requests(self, count: int) -> None:
+        rng = self._rng("change_requests")
+        day_ms = 24 * 3_600_000
+        # (service, template, deployed_at ms, status, a, b, deployer, approver)
+        rows: list[tuple[int, int, int, str, int, int, int, int]] = []
+        for _ in range(count):
+            in_flight = rng.random() < 0.05
+            deployed = self._onset_ms + (
+                rng.randrange(3_600_000) if in_flight else -rng.randrange(day_ms)
+            )
+            rows.append((
+                rng.randrange(len(self.services)),
+                rng.randrange(len(_CR_TEMPLATES)),
+                deployed,
+                "Scheduled" if in_flight else "Deployed",
+                rng.randint(2, 12),
+                rng.randint(5, 90),
+                rng.randrange(len(_FIRST) * len(_LAST)),
+                rng.randrange(len(_FIRST) * len(_LAST)),
+            ))
+        rows.sort(key=lambda r: r[2])
+        self._crs = rows
+        self._cr_base = 10_000 + rng.randrange(50_000)
+
+        # The planted change, two hours before onset, and a red herring on an edge
+        self.planted_cr = self._cr_id(rng.randrange(count + 1))
+        self._planted_cr_at = self._onset_ms - 2 * 3_600_000 + rng.randrange(-600_000, 600_000)
+        self.red_herring_cr = f"CR{self._cr_base + count + 1}"
+        self._herring_edge = rng.choice(self._impacted_edges)
+        self._herring_at = self._onset_ms - 6 * 3_600_000 + rng.randrange(-3_600_000, 3_600_000)
+
+        self.change_index = ChangeRequestIndex(self._change_requests())
+
+    def _cr_id(self, idx: int) -> str:
+        return f"CR{self._cr_base + idx}"
+
+    def _change_requests(self) -> Iterator[dict[str, Any]]:
+        planted_idx = int(self.planted_cr[2:]) - self._cr_base
+        for idx, (svc, tpl, at, status, a, b, by, ok) in enumerate(self._crs):
+            service = self.services[svc]
+            title, description, component = _CR_TEMPLATES[tpl]
+            # Ids skip the planted change's number
+            cr_id = self._cr_id(idx if idx < planted_idx else idx + 1)
+            cr = {
+                "cr_id": cr_id,
+                "title": title.format(svc=service, a=a, b=b),
+                "description": description,
+                "service": service,
+                "component": component,
+                "environment": "production",
+                "status": status,
+                "deployed_at": _iso_s(at),
+                "deployed_by": _email(by),
+                "approved_by": _email(ok),
+                "ticket_url": f"https://company.service-now.com/change/{cr_id}",
+                "rollback_plan": "Redeploy the previous release via ArgoCD",
+            }
+            if tpl == 1:
+                cr["config_change"] = {
+                    "parameter": "spec.replicas", "old_value": str(a), "new_value": str(a + b % 5 + 1)
+                }
+            yield cr
+        yield self._planted_change_request()
+        service = self._herring_edge
+        yield {
+            "cr_id": self.red_herring_cr,
+            "title": f"Update CDN origin routing rules for {service}",
+            "description": (
+                "Add eu-west-2 as a secondary CloudFront origin. No application code "
+                "changes. Purely infrastructure-level routing."
+            ),
+            "service": service,
+            "component": "cdn-routing",
+            "environment": "production",
+            "status": "Deployed",
+            "deployed_at": _iso_s(self._herring_at),
+            "deployed_by": _email(7),
+            "approved_by": _email(23),
+            "ticket_url": f"https://company.service-now.com/change/{self.red_herring_cr}",
+            "rollback_plan": "Revert CloudFront distribution config to previous snapshot",
+        }
+
+    def _planted_change_request(self) -> dict[str, Any]:
+        svc = self.root_service
+        return {
+            "cr_id": self.planted_cr,
+            "title": f"Tune HikariCP connection pool settings for {svc}",
+            "description": (
+                f"Reduce maximumPoolSize from {self.pool_before} to {self.pool_after} and set "
+                "minimumIdle to 2 to reduce idle connection overhead and lower DB memory "
+                "pressure. Tested under normal load — p99 latency unchanged at <200ms."
+            ),
+            "service": svc,
+            "component": "hikaricp-config",
+            "config_change": {
+                "parameter": "spring.datasource.hikari.maximum-pool-size",
+                "old_value": str(self.pool_before),
+                "new_value": str(self.pool_after),
+            },
+            "environment": "production",
+            "status": "Deployed",
+            "deployed_at": _iso_s(self._planted_cr_at),
+            "deployed_by": _email(self._index[svc] * 7),
+            "approved_by": _email(self._index[svc] * 7 + 1),
+            "ticket_url": f"https://company.service-now.com/change/{self.planted_cr}",
+            "rollback_plan": (
+                f"Revert spring.datasource.hikari.maximum-pool-size to {self.pool_before} "
+                "via config map update and rolling restart"
+            ),
+        }
+
+    # ── Past incidents ───────────────────────────────────────────────────────
+
+    def _build_incidents(self, count: int) -> None:
+        rng = self._rng("past_incidents")
+        # (mode, services, days ago, severity, minutes to resolve, a, b)
+        rows: list[tuple[int, tuple[int, ...], int, str, int, int, int]] = []
+        for _ in range(count):
+            svc = rng.choice(self.services)
+            chain = [svc]
+            while self.callers[chain[-1]] and len(chain) < 4 and rng.random() < 0.6:
+                chain.append(rng.choice(self.callers[chain[-1]]))
+            rows.append((
+                rng.randrange(len(_INCIDENT_MODES)),
+                tuple(self._index[s] for s in chain),
+                rng.randint(1, 3 * 365),
+                rng.choice(_SEVERITIES),
+                rng.randint(5, 240),
+                rng.randint(2, 30),
+                rng.randint(3, 60),
+            ))
+        # A few true matches: the same failure on the same part of the graph
+        path = [self._index[s] for s in self.impacted[:3]]
+        self.similar_incidents: list[str] = []
+        for idx in rng.sample(range(count), min(count, max(3, count // 10_000))):
+            rows[idx] = (0, tuple(path), rng.randint(30, 3 * 365), "P1", rng.randint(15, 60),
+                         rng.randint(12, 25), rng.randint(30, 50))
+            self.similar_incidents.append(self._incident_id(idx))
+        self._incidents = rows
+
+        # Inverted index: service name or tag → incidents carrying it
+        self._incident_terms: dict[str, list[int]] = {}
+        for idx, (mode, services, *_rest) in enumerate(rows):
+            for term in [*_INCIDENT_MODES[mode][0], *(self.services[s] for s in services)]:
+                self._incident_terms.setdefault(term, []).append(idx)
+
+    def _incident_id(self, idx: int) -> str:
+        return f"INC-{100_000 + idx}"
+
+    def _incident(self, idx: int) -> dict[str, Any]:
+        mode, services, days_ago, severity, minutes, a, b = self._incidents[idx]
+        tags, title, symptoms, cause, resolution = _INCIDENT_MODES[mode]
+        names = [self.services[s] for s in services]
+        svc = names[0]
+        fields = {"svc": svc, "a": a, "b": b, "p": 10 if mode == 0 else 5, "q": 30 if mode == 0 else 25}
+        return {
+            "incident_id": self._incident_id(idx),
+            "title": title.format(**fields),
+            "date": (self.incident_at - timedelta(days=days_ago)).strftime("%Y-%m-%d"),
+            "environment": "production",
+            "severity": severity,
+            "affected_services": names,
+            "symptoms": symptoms.format(**fields),
+            "root_cause": cause.format(**fields),
+            "resolution": resolution.format(**fields),
+            "resolution_time_minutes": minutes,
+            "post_mortem_url": f"https://wiki.company.com/post-mortem/{self._incident_id(idx)}",
+            "tags": [*tags, svc],
+        }
+
+    def _search_incidents(self, keywords: list[str], limit: int) -> list[dict[str, Any]]:
+        terms: set[str] = set()
+        for keyword in keywords:
+            text = keyword.lower()
+            terms.update((text, text.replace(" ", "-"), *_WORD.findall(text)))
+        scores: Counter[int] = Counter()
+        for term in terms:
+            for idx in self._incident_terms.get(term, ()):
+                scores[idx] += 1
+        best = heapq.nlargest(
+            limit, scores.items(), key=lambda item: (item[1], -self._incidents[item[0]][2])
+        )
+        return [self._incident(idx) for idx, _ in best]
+
+    # ── Metrics and ownership ────────────────────────────────────────────────
+
+    def _metrics(self, service: str) -> dict[str, Any]:
+        rng = self._rng("metrics", service)
+        p50 = rng.randint(20, 120)
+        m = {
+            "response_time_p50_ms": p50,
+            "response_time_p95_ms": p50 * rng.randint(3, 5),
+            "response_time_p99_ms": p50 * rng.randint(6, 10),
+            "error_rate_pct": round(rng.uniform(0.1, 1.5), 1),
+            "throughput_rps": rng.randint(50, 400) * (4 - self.tier[service]),
+            "cpu_pct": rng.randint(15, 55),
+            "memory_pct": rng.randint(30, 70),
+            "db_connection_wait_ms": rng.randint(0, 25),
+            "db_pool_active": rng.randint(2, 8),
+            "db_pool_idle": rng.randint(4, 12),
+            "db_pool_max": 20,
+        }
+        if self.tier[service] == 0:
+            m.update(db_connection_wait_ms=0, db_pool_active=0, db_pool_idle=0, db_pool_max=0)
+        if service == self.root_service:
+            m.update(
+                response_time_p50_ms=rng.randint(3_000, 5_000),
+                response_time_p95_ms=rng.randint(11_000, 14_000),
+                response_time_p99_ms=rng.randint(17_000, 20_000),
+                error_rate_pct=round(rng.uniform(36, 45), 1),
+                db_connection_wait_ms=rng.randint(14_000, 17_000),
+                db_pool_active=self.pool_after,
+                db_pool_idle=0,
+                db_pool_max=self.pool_after,
+            )
+        elif service in self.distance:
+            # Callers queue behind the root: slow tails, errors fading with distance
+            decay = 0.9 ** self.distance[service]
+            m.update(
+                response_time_p95_ms=int(rng.randint(15_000, 19_000) * decay),
+                response_time_p99_ms=int(rng.randint(20_000, 25_000) * decay),
+                error_rate_pct=round(rng.uniform(34, 42) * decay, 1),
+            )
+        return m
+
+    def _team(self, service: str) -> dict[str, Any]:
+        domain = "platform" if self.tier[service] == 0 else service.split("-")[0]
+        rng = self._rng("team", domain)
+        people = rng.sample(range(len(_FIRST) * len(_LAST)), 3)
+        return {
+            "name": "Platform Engineering" if domain == "platform"
+            else f"{domain.title()} {rng.choice(['Platform', 'Core', 'Services', 'Experience'])}",
+            "slack": f"#{domain}-incidents",
+            "people": [_person(p) for p in people],
+        }
+
+    def _roster(self, service: str) -> dict[str, Any]:
+        team = self._team(service)
+        oncall, manager = team["people"][0], team["people"][1]
+        handle = _handle(oncall)
+        return {
+            "team_name": team["name"],
+            "oncall_engineer": oncall,
+            "slack_handle": f"@{handle}",
+            "email": f"{handle}@company.com",
+            "phone": f"+1-415-555-{self._index[service] % 10_000:04d}",
+            "escalation_1": f"{manager} (Eng Manager)",
+            "escalation_1_slack": f"@{_handle(manager)}",
+        }
+
+    def _ownership(self, service: str) -> dict[str, Any]:
+        team = self._team(service)
+        rng = self._rng("slo", service)
+        target = rng.choice([99.9, 99.95, 99.99])
+        current = round(rng.uniform(55, 65), 1) if service in self.distance else target
+        return {
+            "owning_team": team["name"],
+            "slack_channel": team["slack"],
+            "runbook_url": f"https://wiki.company.com/runbooks/{service}",
+            "escalation_path": [
+                f"{team['people'][0]} (on-call)", f"{team['people'][1]} (EM)", "CTO bridge"
+            ],
+            "slo_target_pct": target,
+            "slo_current_pct": current,
+            "repo": f"github.com/company/{service}",
+            "deployment_method": "Kubernetes rolling update via ArgoCD",
+        }
+
+    # ── Public surface ───────────────────────────────────────────────────────
+
+    def alert(self) -> RawAlert:
+        """The P1 alert the scenario's monitoring would raise at onset."""
+        root = self._metrics(self.root_service)
+        return RawAlert(
+            incident_id=f"INC-SYN-{self.seed}",
+            source="dynatrace",
+            severity="P1",
+            title=f"{self.root_service} Timeout Cascade — Checkout Failures",
+            affected_services=self.impacted,
+            environment="production",
+            timestamp=self.incident_at,
+            error_rate=round(root["error_rate_pct"] / 100, 3),
+            raw_payload={
+                "source_system": "Dynatrace",
+                "management_zone": "Production — E-Commerce",
+                "problem_id": f"P-SYN-{self.seed}",
+                "status": "OPEN",
+                "impact": "APPLICATION",
+                "affected_entities": self.impacted,
+                "triggered_by": "Response time anomaly on /checkout",
+                "alert_events": [
+                    {
+                        "name": "Response time degraded",
+                        "service": self.root_service,
+                        "value": f"{root['response_time_p99_ms']}ms p99",
+                        "threshold": "500ms",
+                    },
+                    {
+                        "name": "Error rate anomaly",
+                        "service": self.root_service,
+                        "value": f"{root['error_rate_pct']}%",
+                        "threshold": "5%",
+                    },
+                ],
+            },
+        )
+
+    def ground_truth(self) -> dict[str, Any]:
+        """What a correct analysis should conclude."""
+        return {
+            "root_service": self.root_service,
+            "root_cause_cr": self.planted_cr,
+            "change": f"maximum-pool-size {self.pool_before} → {self.pool_after}",
+            "red_herring_cr": self.red_herring_cr,
+            "impacted_services": self.impacted,
+            "similar_incidents": sorted(self.similar_incidents),
+        }
+
+    def past_incidents(self) -> Iterator[dict[str, Any]]:
+        """The whole incident archive, oldest id first — a bulk export, not a search."""
+        return (self._incident(idx) for idx in range(len(self._incidents)))
+
+    def sizes(self) -> dict[str, int]:
+        return {
+            "services": len(self.services),
+            "log_lines": len(self._log_ts),
+            "traces": self.trace_count,
+            "past_incidents": len(self._incidents),
+            "change_requests": len(self._crs) + 2,
+        }
+
+    def tools(self) -> dict[str, Any]:
+        """Tool backends with the same functions as the mock modules."""
+        return {
+            "dynatrace": SyntheticDynatrace(self),
+            "splunk": SyntheticSplunk(self),
+            "servicenow": SyntheticServiceNow(self),
+            "pagerduty": SyntheticPagerDuty(self),
+        }
+
+
+# ── Tool backends ────────────────────────────────────────────────────────────
+
+
+class SyntheticDynatrace:
+    def __init__(self, scenario: SyntheticScenario) -> None:
+        self._s = scenario
+
+    async def get_service_metrics(self, services: list[str]) -> dict:
+        await asyncio.sleep(0)
+        return {svc: self._s._metrics(svc) for svc in services if svc in self._s.tier}
+
+    async def get_distributed_traces(self, services: list[str]) -> list[dict]:
+        """Every trace touching one of `services`, regenerated from its seed."""
+        wanted = set(services)
+        traces = []
+        for i in range(self._s.trace_count):
+            if i % 500 == 0:
+                await asyncio.sleep(0)
+            trace = self._s._trace(i)
+            if any(span["service"] in wanted for span in trace["spans"]):
+                traces.append(trace)
+        return traces
+
+
+class SyntheticSplunk:
+    def __init__(self, scenario: SyntheticScenario) -> None:
+        self._s = scenario
+
+    async def query_error_logs(self, services: list[str]) -> list[dict]:
+        """Materialises every matching entry — prefer stream_error_logs()."""
+        entries: list[dict] = []
+        async for page in self.stream_error_logs(services, page_size=MAX_PAGE_SIZE):
+            entries.extend(page)
+        return entries
+
+    async def query_error_logs_page(
+        self,
+        services: list[str],
+        earliest: str | None = None,
+        latest: str | None = None,
+        cursor: str | None = None,
+        page_size: int = 200,
+    ) -> dict:
+        """Same contract as mock_splunk.query_error_logs_page, over the log columns."""
+        await asyncio.sleep(0)
+        s = self._s
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        wanted = {s._index[svc] for svc in services if svc in s._index}
+        after, skip = None, 0
+        if cursor:
+            stamp, _, count = cursor.rpartition("#")
+            after, skip = _parse_ms(stamp), int(count)
+        skipped = skip
+        bounds = [t for t in (_parse_ms(earliest) if earliest else None, after) if t is not None]
+        upper = _parse_ms(latest) if latest else None
+
+        ts, svc_col = s._log_ts, s._log_svc
+        rows: list[int] = []
+        for i in range(bisect_left(ts, max(bounds)) if bounds else 0, len(ts)):
+            t = ts[i]
+            if upper is not None and t >= upper:
+                break
+            if svc_col[i] not in wanted:
+                continue
+            if t == after and skip:
+                skip -= 1
+                continue
+            if len(rows) == page_size:
+                last = ts[rows[-1]]
+                seen = sum(1 for r in rows if ts[r] == last) + (skipped if last == after else 0)
+                return {
+                    "entries": [s._log_entry(r) for r in rows],
+                    "next_cursor": f"{_iso_ms(last)}#{seen}",
+                }
+            rows.append(i)
+        return {"entries": [s._log_entry(r) for r in rows], "next_cursor": None}
+
+    async def stream_error_logs(
+        self,
+        services: list[str],
+        earliest: str | None = None,
+        latest: str | None = None,
+        page_size: int = 200,
+    ) -> AsyncIterator[list[dict]]:
+        cursor: str | None = None
+        while True:
+            page = await self.query_error_logs_page(services, earliest, latest, cursor, page_size)
+            if page["entries"]:
+                yield page["entries"]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return
+
+
+class SyntheticServiceNow:
+    def __init__(self, scenario: SyntheticScenario) -> None:
+        self._s = scenario
+
+    async def get_active_change_requests(
+        self, services: list[str], until: str | None = None, hours: float | None = None
+    ) -> list[dict]:
+        await asyncio.sleep(0)
+        return self._s.change_index.window(services, until, hours)
+
+    async def search_past_incidents(self, keywords: list[str], limit: int = 20) -> list[dict]:
+        """The `limit` incidents matching the most keywords (service names or tags), newest first on ties."""
+        await asyncio.sleep(0)
+        return self._s._search_incidents(keywords, limit)
+
+
+class SyntheticPagerDuty:
+    def __init__(self, scenario: SyntheticScenario) -> None:
+        self._s = scenario
+
+    async def get_oncall_roster(self, services: list[str]) -> dict:
+        await asyncio.sleep(0)
+        return {svc: self._s._roster(svc) for svc in services if svc in self._s.tier}
+
+    async def get_service_ownership(self, services: list[str]) -> dict:
+        await asyncio.sleep(0)
+        return {svc: self._s._ownership(svc) for svc in services if svc in self._s.tier}
+
+
+# ── Formatting helpers ───────────────────────────────────────────────────────
+
+
+def _iso_ms(ms: int) -> str:
+    return f"{_iso_second(ms // 1000)}.{ms % 1000:03d}Z"
+
+
+def _iso_s(ms: int) -> str:
+    return f"{_iso_second(ms // 1000)}Z"
+
+
+@functools.lru_cache(maxsize=4096)
+def _iso_second(seconds: int) -> str:
+    return f"{datetime.fromtimestamp(seconds, timezone.utc):%Y-%m-%dT%H:%M:%S}"
+
+
+def _parse_ms(stamp: str) -> int:
+    dt = datetime.fromisoformat(stamp.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return round(dt.timestamp() * 1000)
+
+
+@functools.lru_cache(maxsize=None)
+def _package(service: str) -> str:
+    return service.removesuffix("-service").replace("-", "")
+
+
+@functools.lru_cache(maxsize=None)
+def _class_name(service: str) -> str:
+    return "".join(part.title() for part in service.removesuffix("-service").split("-")) + "Service"
+
+
+def _person(n: int) -> str:
+    return f"{_FIRST[n % len(_FIRST)]} {_LAST[n // len(_FIRST) % len(_LAST)]}"
+
+
+def _handle(name: str) -> str:
+    return name.lower().replace(" ", ".")
+
+
+def _email(n: int) -> str:
+    return f"{_handle(_person(n))}@company.com"
@@ -0,0 +1,146 @@
+"""Change requests indexed by service and deployment time, with suspect scores.
+
+ChangeRequestIndex keeps each service's change requests sorted by deployment
+time, so "what changed on these services in the N hours before T" is one
+binary search per service rather than a scan of every CR. suspects() then
+scores each CR in the window before anything reaches the LLM: how recently it
+deployed, how close its service is to the affected ones, how risky the kind
+of change is, and how much of the error volume its service produces.
+
+Usage:
+    index = ChangeRequestIndex(change_requests)
+    index.window(["inventory-service"], until="2024-01-15T14:02:00Z", hours=3)
+    index.suspects({"inventory-service": 0, "order-service": 1}, until, hours=24,
+                   error_counts=logs.service_counts)
+"""
+
+from __future__ import annotations
+
+import bisect
+import re
+from datetime import datetime, timezone
+from typing import Any, Iterable, Mapping
+
+# Weights of the suspect score's factors; they sum to 1
+_WEIGHTS = {"recency": 0.35, "proximity": 0.2, "risk": 0.2, "errors": 0.25}
+
+# A CR deployed this many hours before onset gets half the recency of one
+# deployed at onset
+_RECENCY_HALF_LIFE_H = 2.0
+
+# Change kinds that commonly cause incidents, and ones that rarely do
+_RISKY = re.compile(
+    r"pool|connection|timeout|limit|quota|heap|memory|thread|schema|migration",
+    re.IGNORECASE,
+)
+_BENIGN = re.compile(
+    r"no application code|log retention|documentation|cdn|certificate rotation", re.IGNORECASE
+)
+
+
+def to_epoch(stamp: str | datetime) -> float:
+    """Seconds since the epoch for an ISO-8601 string ("Z" accepted) or a datetime."""
+    dt = stamp if isinstance(stamp, datetime) else datetime.fromisoformat(stamp.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def change_risk(cr: dict[str, Any]) -> float:
+    """0–1 prior that a change of this kind breaks production."""
+    text = " ".join(str(cr.get(k, "")) for k in ("title", "description", "component"))
+    if "config_change" in cr:
+        parameter = cr["config_change"].get("parameter", "")
+        return 1.0 if _RISKY.search(parameter) else 0.8
+    if _BENIGN.search(text):
+        return 0.2
+    return 0.6 if _RISKY.search(text) else 0.4
+
+
+class ChangeRequestIndex:
+    """Per-service sorted deployment times over a set of change requests."""
+
+    def __init__(self, change_requests: Iterable[dict[str, Any]] = ()) -> None:
+        # service → (sorted deployment times, CRs in the same order)
+        self._by_service: dict[str, tuple[list[float], list[dict[str, Any]]]] = {}
+        self._count = 0
+        self.add_all(change_requests)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add_all(self, change_requests: Iterable[dict[str, Any]]) -> None:
+        grouped: dict[str, list[tuple[float, dict[str, Any]]]] = {}
+        for cr in change_requests:
+            grouped.setdefault(cr["service"], []).append((to_epoch(cr["deployed_at"]), cr))
+        for service, entries in grouped.items():
+            times, crs = self._by_service.setdefault(service, ([], []))
+            merged = sorted(
+                [*zip(times, crs), *entries], key=lambda e: (e[0], e[1]["cr_id"])
+            )
+            times[:] = [t for t, _ in merged]
+            crs[:] = [cr for _, cr in merged]
+            self._count += len(entries)
+
+    def add(self, cr: dict[str, Any]) -> None:
+        at = to_epoch(cr["deployed_at"])
+        times, crs = self._by_service.setdefault(cr["service"], ([], []))
+        pos = bisect.bisect_right(times, at)
+        times.insert(pos, at)
+        crs.insert(pos, cr)
+        self._count += 1
+
+    def window(
+        self,
+        services: Iterable[str],
+        until: str | datetime | None = None,
+        hours: float | None = None,
+    ) -> list[dict[str, Any]]:
+        """CRs on `services` deployed in [until - hours, until], oldest first.
+
+        No `until` means no upper bound; no `hours` means no lower bound.
+        """
+        end = to_epoch(until) if until is not None else None
+        start = end - hours * 3600 if end is not None and hours is not None else None
+        found: list[tuple[float, dict[str, Any]]] = []
+        for service in dict.fromkeys(services):
+            entry = self._by_service.get(service)
+            if entry is None:
+                continue
+            times, crs = entry
+            lo = bisect.bisect_left(times, start) if start is not None else 0
+            hi = bisect.bisect_right(times, end) if end is not None else len(times)
+            found.extend(zip(times[lo:hi], crs[lo:hi]))
+        found.sort(key=lambda e: (e[0], e[1]["cr_id"]))
+        return [cr for _, cr in found]
+
+    def suspects(
+        self,
+        distances: Mapping[str, int],
+        until: str | datetime,
+        hours: float = 24.0,
+        error_counts: Mapping[str, int] | None = None,
+    ) -> list[dict[str, Any]]:
+        """CRs in the window on any service in `distances` (service → hops
+        from the affected set, 0 for affected services), each copied with a
+        "suspect_score" and its "suspect_factors", highest score first."""
+        onset = to_epoch(until)
+        busiest = max(error_counts.values(), default=0) if error_counts else 0
+        scored = []
+        for cr in self.window(distances, until, hours):
+            age_h = (onset - to_epoch(cr["deployed_at"])) / 3600
+            factors = {
+                "recency": 0.5 ** (age_h / _RECENCY_HALF_LIFE_H),
+                "proximity": 1 / (1 + distances[cr["service"]]),
+                "risk": change_risk(cr),
+                "errors": (error_counts or {}).get(cr["service"], 0) / busiest if busiest else 0.0,
+            }
+            score = sum(_WEIGHTS[name] * value for name, value in factors.items())
+            scored.append({
+                **cr,
+                "hours_before_onset": round(age_h, 2),
+                "suspect_score": round(score, 3),
+                "suspect_factors": {name: round(value, 3) for name, value in factors.items()},
+            })
+        scored.sort(key=lambda cr: (-cr["suspect_score"], cr["cr_id"]))
+        return scored
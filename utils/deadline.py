@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import time
+from typing import Any, Awaitable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+# Absolute deadline (time.monotonic()) for the current task, None when
+# unbounded. Tasks inherit it on creation, so an incident-wide deadline set by
+# the orchestrator reaches every agent, LLM call and tool call beneath it.
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "_deadline", default=None
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when work runs past the deadline of its enclosing scope."""
+
+
+def remaining() -> float | None:
+    """Seconds left before the current deadline, or None when unbounded."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+@contextlib.contextmanager
+def scope(seconds: float | None) -> Iterator[None]:
+    """Bound the enclosed work to `seconds`; never extends an outer deadline."""
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+async def run_with_deadline(awaitable: Awaitable[T], what: str) -> T:
+    """Await `awaitable`, cancelling it if the current deadline expires first."""
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded(f"{what}: deadline already passed")
+    try:
+        return await asyncio.wait_for(awaitable, left)
+    except DeadlineExceeded:
+        raise
+    except asyncio.TimeoutError as exc:
+        raise DeadlineExceeded(f"{what}: exceeded {left:.1f}s remaining budget") from exc
+
+
+def timeout_kwargs() -> dict[str, Any]:
+    """Per-request `timeout=` for SDK calls, derived from the current deadline."""
+    left = remaining()
+    return {} if left is None else {"timeout": max(left, 0.001)}
@@ -0,0 +1,237 @@
+"""Simulated LLM latency and faults for DryRunLLMClient.
+
+A LatencySimulator gives each agent a latency distribution — fixed,
+lognormal, or empirical samples loaded from a file — plus an optional delay
+per output token and injected failures and timeouts. Every agent draws from
+its own random stream derived from the seed, so a seeded run reproduces the
+same latencies and faults however the agents' calls interleave.
+
+Profiles can be loaded from JSON:
+
+    {
+      "seed": 7,
+      "default": {"latency": {"kind": "lognormal", "median_s": 1.5, "sigma": 0.5}},
+      "RCA": {
+        "latency": {"kind": "empirical", "file": "rca_latencies.txt"},
+        "seconds_per_output_token": 0.004,
+        "failure_rate": 0.02,
+        "timeout_rate": 0.01
+      }
+    }
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import random
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Sequence
+
+
+class SimulatedLLMError(RuntimeError):
+    """Failure injected by the latency simulator in place of an API error."""
+
+
+class LatencyModel(ABC):
+    @abstractmethod
+    def sample(self, rng: random.Random) -> float:
+        """One request latency in seconds, before any per-token delay."""
+
+
+class FixedLatency(LatencyModel):
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+
+    def sample(self, rng: random.Random) -> float:
+        return self.seconds
+
+    def __repr__(self) -> str:
+        return f"fixed({self.seconds:g}s)"
+
+
+class LogNormalLatency(LatencyModel):
+    """Right-skewed latency: median `median_s`, tail width `sigma` (log space)."""
+
+    def __init__(self, median_s: float, sigma: float = 0.5, max_s: float | None = None) -> None:
+        if median_s <= 0:
+            raise ValueError("median_s must be > 0")
+        self.median_s = median_s
+        self.sigma = sigma
+        self.max_s = max_s
+
+    def sample(self, rng: random.Random) -> float:
+        value = rng.lognormvariate(math.log(self.median_s), self.sigma)
+        return min(value, self.max_s) if self.max_s is not None else value
+
+    def __repr__(self) -> str:
+        return f"lognormal(median={self.median_s:g}s, sigma={self.sigma:g})"
+
+
+class EmpiricalLatency(LatencyModel):
+    """Draws uniformly from observed latencies, e.g. exported from production logs."""
+
+    def __init__(self, samples: Sequence[float]) -> None:
+        if not samples:
+            raise ValueError("empirical latency needs at least one sample")
+        self.samples = [float(s) for s in samples]
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> EmpiricalLatency:
+        """Load a JSON list of seconds, or one value per line (blank lines and # ignored)."""
+        text = Path(path).read_text(encoding="utf-8")
+        if text.lstrip().startswith("["):
+            return cls(json.loads(text))
+        return cls(
+            [
+                float(line.split(",")[0])
+                for line in text.splitlines()
+                if line.strip() and not line.lstrip().startswith("#")
+            ]
+        )
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.choice(self.samples)
+
+    def __repr__(self) -> str:
+        return f"empirical({len(self.samples)} samples)"
+
+
+class AgentProfile:
+    """Latency and fault behaviour of one agent's simulated LLM calls.
+
+    `timeout_rate` calls stall for `timeout_s` and then raise TimeoutError
+    (an enclosing deadline cuts them short first); `failure_rate` calls
+    raise SimulatedLLMError after their normal latency.
+    """
+
+    def __init__(
+        self,
+        latency: LatencyModel,
+        seconds_per_output_token: float = 0.0,
+        failure_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        timeout_s: float = 60.0,
+    ) -> None:
+        if not 0 <= failure_rate + timeout_rate <= 1:
+            raise ValueError("failure_rate + timeout_rate must be within [0, 1]")
+        self.latency = latency
+        self.seconds_per_output_token = seconds_per_output_token
+        self.failure_rate = failure_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_s = timeout_s
+
+
+class Plan:
+    """What one simulated call does: wait `delay_s`, then succeed or fail."""
+
+    __slots__ = ("delay_s", "outcome")
+
+    def __init__(self, delay_s: float, outcome: str) -> None:
+        self.delay_s = delay_s
+        self.outcome = outcome   # "ok" | "error" | "timeout"
+
+
+# Real-model shapes: a fast Haiku-sized phase 1/2 and a long-tailed RCA
+REALISTIC_PROFILES: dict[str, AgentProfile] = {
+    "IMPACT": AgentProfile(LogNormalLatency(1.2, 0.45), seconds_per_output_token=0.002),
+    "SIMILAR": AgentProfile(LogNormalLatency(1.0, 0.45), seconds_per_output_token=0.002),
+    "SUMMARIZER": AgentProfile(LogNormalLatency(1.5, 0.5), seconds_per_output_token=0.002),
+    "RCA": AgentProfile(
+        LogNormalLatency(3.0, 0.6, max_s=45.0),
+        seconds_per_output_token=0.006,
+        failure_rate=0.01,
+    ),
+    "RCA.changes": AgentProfile(LogNormalLatency(1.2, 0.45), seconds_per_output_token=0.002),
+    "RCA.logs": AgentProfile(LogNormalLatency(1.4, 0.45), seconds_per_output_token=0.002),
+    "RCA.history": AgentProfile(LogNormalLatency(1.0, 0.45), seconds_per_output_token=0.002),
+    "RCA.synthesis": AgentProfile(
+        LogNormalLatency(2.0, 0.5, max_s=30.0),
+        seconds_per_output_token=0.006,
+        failure_rate=0.01,
+    ),
+}
+
+
+class LatencySimulator:
+    """Per-agent latency and fault plans, reproducible with a seed.
+
+    Usage:
+        sim = LatencySimulator(REALISTIC_PROFILES, seed=7)
+        llm = DryRunLLMClient(latency=sim)
+    """
+
+    def __init__(
+        self,
+        profiles: dict[str, AgentProfile] | None = None,
+        default: AgentProfile | None = None,
+        seed: int | None = None,
+    ) -> None:
+        self.profiles = dict(profiles or {})
+        self.default = default if default is not None else AgentProfile(FixedLatency(0.5))
+        self.seed = seed
+        self._rngs: dict[str, random.Random] = {}
+        self.injected = {"error": 0, "timeout": 0}
+
+    def profile_for(self, agent_name: str) -> AgentProfile:
+        return self.profiles.get(agent_name, self.default)
+
+    def plan(self, agent_name: str, output_tokens: int) -> Plan:
+        profile = self.profile_for(agent_name)
+        rng = self._rng(agent_name)
+        # Always draw both values so the stream stays aligned across outcomes
+        roll = rng.random()
+        delay = profile.latency.sample(rng) + output_tokens * profile.seconds_per_output_token
+        if roll < profile.timeout_rate:
+            self.injected["timeout"] += 1
+            return Plan(profile.timeout_s, "timeout")
+        if roll < profile.timeout_rate + profile.failure_rate:
+            self.injected["error"] += 1
+            return Plan(delay, "error")
+        return Plan(delay, "ok")
+
+    def _rng(self, agent_name: str) -> random.Random:
+        rng = self._rngs.get(agent_name)
+        if rng is None:
+            # One stream per agent: draws do not depend on how agents interleave
+            rng = random.Random(None if self.seed is None else f"{self.seed}:{agent_name}")
+            self._rngs[agent_name] = rng
+        return rng
+
+    @classmethod
+    def from_file(cls, path: str | Path, seed: int | None = None) -> LatencySimulator:
+        """Load profiles from JSON (see module docstring); `seed` overrides the file's."""
+        path = Path(path)
+        data = json.loads(path.read_text(encoding="utf-8"))
+        file_seed = data.pop("seed", None)
+        default = data.pop("default", None)
+        return cls(
+            {agent: _profile(spec, path.parent) for agent, spec in data.items()},
+            _profile(default, path.parent) if default is not None else None,
+            seed if seed is not None else file_seed,
+        )
+
+
+def _profile(spec: dict[str, Any], base_dir: Path) -> AgentProfile:
+    latency = dict(spec.get("latency", {"kind": "fixed", "seconds": 0.5}))
+    kind = latency.pop("kind")
+    if kind == "fixed":
+        model: LatencyModel = FixedLatency(**latency)
+    elif kind == "lognormal":
+        model = LogNormalLatency(**latency)
+    elif kind == "empirical":
+        model = (
+            EmpiricalLatency(latency["samples"])
+            if "samples" in latency
+            else EmpiricalLatency.from_file(base_dir / latency["file"])
+        )
+    else:
+        raise ValueError(f"unknown latency kind {kind!r} (fixed | lognormal | empirical)")
+    return AgentProfile(
+        model,
+        seconds_per_output_token=spec.get("seconds_per_output_token", 0.0),
+        failure_rate=spec.get("failure_rate", 0.0),
+        timeout_rate=spec.get("timeout_rate", 0.0),
+        timeout_s=spec.get("timeout_s", 60.0),
+    )
@@ -326,6 +326,99 @@ RCA_RESPONSE = json.dumps(
     }
 )
 
+# ─── RCA map-reduce sub-analyses ──────────────────────────────────────────────
+
+RCA_CHANGES_RESPONSE = json.dumps(
+    {
+        "suspects": [
+            {
+                "cr_id": "CR2077",
+                "service": "inventory-service",
+                "deployed_at": "2024-01-15T12:04:33Z",
+                "deployed_by": "james.wu@company.com",
+                "what_changed": "configuration — spring.datasource.hikari.maximum-pool-size 20 → 10",
+                "suspicion": "HIGH",
+                "reason": (
+                    "Deployed 1.96h before onset on the service logging the most errors; halves "
+                    "the DB connection pool. Matches the connection-pool-shrunk signature."
+                ),
+            },
+        ],
+        "cleared": [
+            {
+                "cr_id": "CR2081",
+                "reason": "CDN origin routing on api-gateway 5.7h before onset — no application-layer change",
+            },
+        ],
+        "evidence_trail": [
+            {
+                "source": "servicenow_crs",
+                "query_or_action": "get_active_change_requests(24h before onset, affected services + dependencies)",
+                "finding": "CR2077 halved inventory-service's HikariCP pool 2h before onset; "
+                           "CR2081 is an unrelated CDN change.",
+            },
+        ],
+    }
+)
+
+RCA_LOGS_RESPONSE = json.dumps(
+    {
+        "dominant_failure": (
+            "DB connection pool exhaustion on inventory-service: requests time out waiting "
+            "for a HikariCP connection and the failures propagate to order-service and api-gateway."
+        ),
+        "exception_patterns": [
+            {
+                "exception_class": "com.zaxxer.hikari.pool.HikariPool$PoolTimeoutException",
+                "count": 3,
+                "points_to": "HikariPool-1 on inventory-service at active=10/max=10, idle=0, pending_threads up to 189",
+            },
+            {
+                "exception_class": "feign.RetryableException",
+                "count": 1,
+                "points_to": "order-service timing out on calls to inventory-service",
+            },
+            {
+                "exception_class": "io.github.resilience4j.circuitbreaker.CallNotPermittedException",
+                "count": 1,
+                "points_to": "api-gateway breaker for inventory-service open at 42.1% vs 40% threshold",
+            },
+        ],
+        "config_clues": [
+            "Pool max in the logs is 10 (max_pool_size=10)",
+            "Connection timeout 30000ms",
+        ],
+        "evidence_trail": [
+            {
+                "source": "splunk_logs",
+                "query_or_action": "stream_error_logs(affected services)",
+                "finding": "HikariPool$PoolTimeoutException dominates; pool saturated at 10/10 with 189 waiting threads.",
+            },
+        ],
+    }
+)
+
+RCA_HISTORY_RESPONSE = json.dumps(
+    {
+        "matches": [
+            {
+                "incident_id": "INC-1843",
+                "root_cause": "inventory-service HikariCP pool of 10 exhausted under flash-sale traffic",
+                "resolution": "Increased maximum-pool-size to 30 and restarted",
+                "relevance": "Same service, same exception, same pool size under a traffic spike",
+            },
+        ],
+        "recurring_failure_mode": "Connection pool too small for peak concurrency on inventory-service",
+        "evidence_trail": [
+            {
+                "source": "past_incidents",
+                "query_or_action": "search_past_incidents(['connection pool', 'timeout', 'HikariCP', 'inventory-service'])",
+                "finding": "INC-1843 (Black Friday 2023) is the same failure; resolved in 28 min by raising the pool to 30.",
+            },
+        ],
+    }
+)
+
 # ─── Dispatch map — keyed by agent name ──────────────────────────────────────
 
 DRY_RUN_RESPONSES: dict[str, str] = {
@@ -333,4 +426,8 @@ DRY_RUN_RESPONSES: dict[str, str] = {
     "SIMILAR": SIMILAR_INCIDENT_RESPONSE,
     "SUMMARIZER": MI_SUMMARY_RESPONSE,
     "RCA": RCA_RESPONSE,
+    "RCA.changes": RCA_CHANGES_RESPONSE,
+    "RCA.logs": RCA_LOGS_RESPONSE,
+    "RCA.history": RCA_HISTORY_RESPONSE,
+    "RCA.synthesis": RCA_RESPONSE,
 }
@@ -0,0 +1,236 @@
+"""Local similarity index over past incidents.
+
+IncidentIndex scores past incidents against the current one without an LLM:
+BM25 over each incident's title, symptoms, root cause, resolution, tags and
+exception classes, blended with the Jaccard overlap of affected-service sets.
+Both sides use inverted indexes, so a query only touches incidents sharing a
+term or a service. Scoring is fully deterministic — ties break on incident id —
+and adding an incident that is already indexed replaces it, so the index can
+be fed every search result it sees and grow with the archive.
+
+Service sets are small (a handful of names), so the overlap is computed
+exactly over the service postings rather than estimated with MinHash.
+
+Usage:
+    index = IncidentIndex()
+    index.add_all(past_incidents)
+    index.search("inventory-service timeout cascade", ["inventory-service"], k=5)
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Any, Iterable
+
+# Text fields indexed, with how many times each counts (a cheap BM25F)
+_FIELDS = {
+    "title": 2,
+    "symptoms": 1,
+    "root_cause": 1,
+    "resolution": 1,
+    "tags": 1,
+    "exception_classes": 1,
+}
+
+# Share of the combined score given to text relevance; the rest is service overlap
+TEXT_WEIGHT = 0.6
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9]*|\d+")
+_CAMEL = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or the to was were with "
+    "after before during via into than that this".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased words; CamelCase and dotted names (exception classes) split into parts."""
+    tokens: list[str] = []
+    for word in _WORD.findall(text):
+        parts = _CAMEL.findall(word) if not word.islower() else [word]
+        if len(parts) > 1:
+            tokens.append(word.lower())
+        tokens.extend(p.lower() for p in parts)
+    return [t for t in tokens if t not in _STOPWORDS and len(t) > 1]
+
+
+class Candidate:
+    """One search hit with its score breakdown."""
+
+    __slots__ = ("incident", "score", "text_score", "service_overlap", "matched_terms")
+
+    def __init__(
+        self,
+        incident: dict[str, Any],
+        score: float,
+        text_score: float,
+        service_overlap: float,
+        matched_terms: list[str],
+    ) -> None:
+        self.incident = incident
+        self.score = score
+        self.text_score = text_score
+        self.service_overlap = service_overlap
+        self.matched_terms = matched_terms
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "incident_id": self.incident["incident_id"],
+            "score": round(self.score, 4),
+            "text_score": round(self.text_score, 4),
+            "service_overlap": round(self.service_overlap, 4),
+            "matched_terms": self.matched_terms,
+        }
+
+
+class IncidentIndex:
+    """BM25 + service-set Jaccard over past incidents, updated incrementally.
+
+    k1 and b are the usual BM25 parameters.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._docs: dict[str, dict[str, Any]] = {}
+        self._term_freqs: dict[str, Counter[str]] = {}
+        self._lengths: dict[str, int] = {}
+        self._services: dict[str, frozenset[str]] = {}
+        self._postings: dict[str, dict[str, int]] = {}
+        self._service_postings: dict[str, set[str]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, incident_id: object) -> bool:
+        return incident_id in self._docs
+
+    # ── Updates ──────────────────────────────────────────────────────────────
+
+    def add_all(self, incidents: Iterable[dict[str, Any]]) -> int:
+        """Index (or re-index) each incident. Returns how many were new."""
+        return sum(self.add(incident) for incident in incidents)
+
+    def add(self, incident: dict[str, Any]) -> bool:
+        """Index one incident, replacing any earlier version. Returns True if it was new."""
+        incident_id = incident["incident_id"]
+        is_new = incident_id not in self._docs
+        if not is_new:
+            self.remove(incident_id)
+
+        freqs: Counter[str] = Counter()
+        for field, weight in _FIELDS.items():
+            value = incident.get(field)
+            if not value:
+                continue
+            text = " ".join(value) if isinstance(value, list) else str(value)
+            for token in tokenize(text):
+                freqs[token] += weight
+        services = frozenset(incident.get("affected_services", ()))
+
+        self._docs[incident_id] = incident
+        self._term_freqs[incident_id] = freqs
+        self._lengths[incident_id] = sum(freqs.values())
+        self._services[incident_id] = services
+        self._total_length += self._lengths[incident_id]
+        for term, tf in freqs.items():
+            self._postings.setdefault(term, {})[incident_id] = tf
+        for service in services:
+            self._service_postings.setdefault(service, set()).add(incident_id)
+        return is_new
+
+    def remove(self, incident_id: str) -> bool:
+        if incident_id not in self._docs:
+            return False
+        freqs = self._term_freqs.pop(incident_id)
+        self._total_length -= self._lengths.pop(incident_id)
+        for term in freqs:
+            postings = self._postings[term]
+            del postings[incident_id]
+            if not postings:
+                del self._postings[term]
+        for service in self._services.pop(incident_id):
+            postings = self._service_postings[service]
+            postings.discard(incident_id)
+            if not postings:
+                del self._service_postings[service]
+        del self._docs[incident_id]
+        return True
+
+    # ── Search ───────────────────────────────────────────────────────────────
+
+    def search(self, text: str, services: Iterable[str] = (), k: int = 5) -> list[Candidate]:
+        """Top-k incidents by blended score, best first.
+
+        Text relevance is BM25 as a share of the most this query could score
+        (every term saturated), so both halves of the blend lie in [0, 1] and
+        the ranking can be pruned exactly, MaxScore-style: terms are scored
+        most selective first, and once the terms left could not lift an
+        incident that has matched nothing yet past the current k-th best,
+        they only update incidents that can still reach it.
+        """
+        if not self._docs or k <= 0:
+            return []
+        n = len(self._docs)
+        terms = []
+        for term in set(tokenize(text)):
+            postings = self._postings.get(term)
+            if postings:
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                terms.append((idf, term, postings))
+        terms.sort(key=lambda t: (-t[0], t[1]))
+        total_idf = sum(idf for idf, _, _ in terms) or 1.0
+        attainable = total_idf * (self.k1 + 1)
+
+        wanted = frozenset(services)
+        overlap: dict[str, float] = {}
+        for service in sorted(wanted):
+            for incident_id in self._service_postings.get(service, ()):
+                if incident_id not in overlap:
+                    theirs = self._services[incident_id]
+                    overlap[incident_id] = len(wanted & theirs) / len(wanted | theirs)
+        scores = {incident_id: (1 - TEXT_WEIGHT) * j for incident_id, j in overlap.items()}
+
+        k1, b = self.k1, self.b
+        avg_length = self._total_length / n or 1.0
+        lengths, term_freqs = self._lengths, self._term_freqs
+        bm25: dict[str, float] = {}
+        matched: dict[str, list[str]] = {}
+        idf_left = total_idf
+        for idf, term, postings in terms:
+            kth = heapq.nlargest(k, scores.values())[-1] if len(scores) >= k else -1.0
+            reachable = TEXT_WEIGHT * idf_left / total_idf
+            newcomers = reachable >= kth
+            if not newcomers:
+                scores = {d: s for d, s in scores.items() if s + reachable >= kth}
+            idf_left -= idf
+            if newcomers or len(postings) <= len(scores):
+                hits = postings.items()
+            else:
+                hits = [(d, term_freqs[d][term]) for d in scores if term in term_freqs[d]]
+            for incident_id, tf in hits:
+                if not newcomers and incident_id not in scores:
+                    continue
+                part = idf * tf * (k1 + 1) / (
+                    tf + k1 * (1 - b + b * lengths[incident_id] / avg_length)
+                )
+                bm25[incident_id] = bm25.get(incident_id, 0.0) + part
+                scores[incident_id] = scores.get(incident_id, 0.0) + TEXT_WEIGHT * part / attainable
+                matched.setdefault(incident_id, []).append(term)
+
+        # Highest score first, then lowest id: the same query always ranks the same way
+        top = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [
+            Candidate(
+                self._docs[incident_id],
+                score,
+                bm25.get(incident_id, 0.0) / attainable,
+                overlap.get(incident_id, 0.0),
+                matched.get(incident_id, []),
+            )
+            for incident_id, score in top
+        ]
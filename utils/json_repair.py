@@ -0,0 +1,136 @@
+"""Local repair of almost-JSON LLM replies.
+
+Most malformed replies are recoverable without another round-trip: the JSON
+is wrapped in a markdown fence or followed by prose, carries a trailing comma,
+or was cut off at max_tokens. repair_json() fixes those cases in order and
+reports which repairs it applied.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any
+
+_CLOSERS = {"{": "}", "[": "]"}
+_FENCE = re.compile(r"```[A-Za-z]*\s*\n?(.*?)(?:```|$)", re.DOTALL)
+_WHITESPACE = " \t\r\n"
+
+
+def repair_json(raw: str) -> tuple[Any, list[str]]:
+    """Parse `raw`, repairing it if needed. Returns (value, repairs applied).
+
+    Raises ValueError when no JSON can be recovered.
+    """
+    text = raw.strip()
+    repairs: list[str] = []
+
+    if "```" in text:
+        match = _FENCE.search(text)
+        if match:
+            text = match.group(1).strip()
+            repairs.append("fence")
+
+    body, complete = _extract(text)
+    if body is None:
+        raise ValueError("no JSON object or array in reply")
+    if body != text:
+        repairs.append("surrounding_prose")
+
+    if not complete:
+        body = _close_truncated(body)
+        if body is None:
+            raise ValueError("reply truncated before any complete value")
+        repairs.append("truncated_tail")
+
+    cleaned = _drop_trailing_commas(body)
+    if cleaned != body:
+        repairs.append("trailing_commas")
+
+    return json.loads(cleaned), repairs
+
+
+def _extract(text: str) -> tuple[str | None, bool]:
+    """Slice from the first { or [ to its matching bracket.
+
+    Returns (slice, complete); an unterminated value runs to the end of text.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return None, False
+    start = min(starts)
+    depth = 0
+    in_string = escape = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1], True
+    return text[start:], False
+
+
+def _close_truncated(text: str) -> str | None:
+    """Cut back to the last complete value and close every open bracket."""
+    stack: list[str] = []
+    in_string = escape = False
+    cut: int | None = None
+    cut_stack: list[str] = []
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+            cut, cut_stack = i + 1, stack.copy()
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            cut, cut_stack = i + 1, stack.copy()
+        elif ch == ",":
+            # Everything before a separator is a complete element or field
+            cut, cut_stack = i, stack.copy()
+    if cut is None:
+        return None
+    return text[:cut] + "".join(_CLOSERS[c] for c in reversed(cut_stack))
+
+
+def _drop_trailing_commas(text: str) -> str:
+    out: list[str] = []
+    in_string = escape = False
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "}]":
+            j = len(out) - 1
+            while j >= 0 and out[j] in _WHITESPACE:
+                j -= 1
+            if j >= 0 and out[j] == ",":
+                del out[j]
+        out.append(ch)
+    return "".join(out)
@@ -0,0 +1,135 @@
+"""Incremental JSON parsing for streamed LLM replies.
+
+The agents' replies are one JSON object. IncrementalJSONParser is fed the
+reply as it arrives and reports each value near the top of the document —
+top-level fields and the elements of top-level arrays — the moment its last
+character has been received, long before the closing brace.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+_WHITESPACE = " \t\r\n"
+
+
+class _Frame:
+    __slots__ = ("is_object", "path", "key", "index", "expect_key", "start")
+
+    def __init__(self, is_object: bool, path: str) -> None:
+        self.is_object = is_object
+        self.path = path          # path of this container ("" for the root)
+        self.key: str | None = None
+        self.index = 0
+        self.expect_key = is_object
+        self.start: int | None = None   # offset where the current value began
+
+    def child_path(self) -> str:
+        if self.is_object:
+            return f"{self.path}.{self.key}" if self.path else str(self.key)
+        return f"{self.path}[{self.index}]"
+
+
+class IncrementalJSONParser:
+    """Feed chunks of a JSON object; get back (path, value) as values complete.
+
+    Paths look like "headline", "probable_root_causes[0]" or
+    "top_match.title". Only values at most `max_depth` levels below the root
+    are reported; deeper values arrive inside their parent. Text before the
+    opening brace (e.g. a ```json fence) and after the closing brace is
+    ignored.
+
+    Usage:
+        parser = IncrementalJSONParser()
+        for chunk in stream:
+            for path, value in parser.feed(chunk):
+                ...
+    """
+
+    def __init__(self, max_depth: int = 2) -> None:
+        self.max_depth = max_depth
+        self._text = ""
+        self._pos = 0
+        self._stack: list[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._string_is_key = False
+        self.done = False
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        self._text += chunk
+        completed: list[tuple[str, Any]] = []
+        text = self._text
+        stack = self._stack
+
+        for i in range(self._pos, len(text)):
+            if self.done:
+                break
+            ch = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    frame = stack[-1]
+                    if self._string_is_key:
+                        frame.key = json.loads(text[self._string_start:i + 1])
+                    else:
+                        self._complete(frame, text[frame.start:i + 1], completed)
+                continue
+
+            if not stack:
+                if ch == "{":
+                    stack.append(_Frame(True, ""))
+                continue
+
+            frame = stack[-1]
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+                self._string_is_key = frame.is_object and frame.expect_key
+                if not self._string_is_key:
+                    frame.start = i
+            elif ch in "{[":
+                frame.start = i
+                stack.append(_Frame(ch == "{", frame.child_path()))
+            elif ch in "}]":
+                if frame.start is not None:
+                    # A number, literal or null ends at its container's close
+                    self._complete(frame, text[frame.start:i], completed)
+                stack.pop()
+                if stack:
+                    parent = stack[-1]
+                    self._complete(parent, text[parent.start:i + 1], completed)
+                else:
+                    self.done = True
+            elif ch == ",":
+                if frame.start is not None:
+                    self._complete(frame, text[frame.start:i], completed)
+                if frame.is_object:
+                    frame.expect_key = True
+                else:
+                    frame.index += 1
+            elif ch == ":":
+                frame.expect_key = False
+            elif ch not in _WHITESPACE and frame.start is None:
+                frame.start = i
+
+        self._pos = len(text)
+        return completed
+
+    def _complete(self, frame: _Frame, raw: str, completed: list[tuple[str, Any]]) -> None:
+        """Record the value that just finished inside `frame`."""
+        frame.start = None
+        path = frame.child_path()
+        if len(self._stack) > self.max_depth:
+            return
+        try:
+            completed.append((path, json.loads(raw)))
+        except json.JSONDecodeError:
+            pass
@@ -0,0 +1,342 @@
+"""Content-addressed cache for LLM completions.
+
+Re-analysing identical evidence (dashboard refreshes, replays, coalesced
+re-runs) returns the stored completion instead of paying LLM latency again.
+Entries are keyed on a hash of (the agent's model route, system prompt, full
+user prompt), held in an in-memory LRU with size and TTL eviction, and optionally
+mirrored to a directory so they survive restarts.
+
+Values that differ between runs over the same evidence, such as the time a
+re-fired alert was received, are masked out of the key: the orchestrator
+declares them per incident with volatile_scope(volatile_values(...)).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from utils.llm_client import (
+    BoundedLLMClient,
+    DryRunLLMClient,
+    FieldCallback,
+    LLMClient,
+    is_json,
+)
+from utils.json_stream import IncrementalJSONParser
+from utils.logger import log
+
+# Set by CachedLLMClient.bypass(); calls made inside skip the cache lookup but
+# still store their fresh result.
+_bypass: contextvars.ContextVar[bool] = contextvars.ContextVar("_bypass", default=False)
+
+# Set by volatile_scope() for the incident being analysed: strings masked out
+# of cache keys because they change from run to run without changing the evidence.
+_volatile: contextvars.ContextVar[tuple[str, ...]] = contextvars.ContextVar(
+    "_volatile", default=()
+)
+
+_MASK = "<volatile>"
+
+
+def volatile_values(*stamps: datetime) -> tuple[str, ...]:
+    """The forms a timestamp takes in a prompt: isoformat() and Pydantic's JSON."""
+    forms: list[str] = []
+    for stamp in stamps:
+        iso = stamp.isoformat()
+        forms.extend((iso, iso.replace("+00:00", "Z")))
+    return tuple(dict.fromkeys(forms))
+
+
+@contextlib.contextmanager
+def volatile_scope(values: Iterable[str]) -> Iterator[None]:
+    """Mask `values` out of the cache keys of requests made inside the block.
+
+    Tasks created inside inherit the scope, as with deadline.scope().
+    """
+    # Longest first, so no value is masked half-way by a shorter one
+    token = _volatile.set(tuple(sorted(set(values), key=len, reverse=True)))
+    try:
+        yield
+    finally:
+        _volatile.reset(token)
+
+
+class _Entry:
+    __slots__ = ("agent", "text", "created_at")
+
+    def __init__(self, agent: str, text: str, created_at: float) -> None:
+        self.agent = agent
+        self.text = text
+        self.created_at = created_at
+
+
+class CachedLLMClient:
+    """LRU + TTL response cache in front of an LLM client.
+
+    Wraps an LLMClient, DryRunLLMClient or BoundedLLMClient; anything other
+    than complete() is delegated to the wrapped client. Only replies that
+    parse as JSON are stored, so a malformed completion is never replayed.
+    Concurrent identical requests share one upstream call. A caller answered
+    from the cache or from another caller's request still gets on_field for
+    each field, replayed from the stored text.
+
+    Usage:
+        llm = CachedLLMClient(LLMClient(api_key), disk_dir=".llm_cache")
+        with llm.bypass():
+            ...                      # force fresh completions
+        llm.invalidate("RCA")        # drop one agent's entries
+    """
+
+    def __init__(
+        self,
+        inner: LLMClient | DryRunLLMClient | BoundedLLMClient,
+        max_entries: int = 256,
+        ttl_seconds: float | None = 3600.0,
+        disk_dir: str | os.PathLike[str] | None = None,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self._inner = inner
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = Path(disk_dir) if disk_dir is not None else None
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Future[str]] = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.bypassed = 0
+        self.shared = 0
+
+    # ── Keys ─────────────────────────────────────────────────────────────────
+
+    def key_for(
+        self, system: str, user: str, cache_prefix: str = "", agent_name: str = "LLM"
+    ) -> str:
+        """Content address of a request against the model the wrapped client would use.
+
+        Values declared volatile for the current incident are masked first.
+        """
+        routes = getattr(self._inner, "routes", None)
+        if routes is not None:
+            route = routes.route_for(agent_name)
+            model: Any = [route.models, route.max_tokens, route.temperature]
+        else:
+            model = getattr(self._inner, "model", None)
+        prompt = cache_prefix + user
+        for value in _volatile.get():
+            system = system.replace(value, _MASK)
+            prompt = prompt.replace(value, _MASK)
+        material = json.dumps(
+            [
+                model,
+                system,
+                prompt,
+            ],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    # ── Completion ───────────────────────────────────────────────────────────
+
+    async def complete(
+        self,
+        system: str,
+        user: str,
+        agent_name: str = "LLM",
+        hedge: bool = False,
+        cache_prefix: str = "",
+        on_field: FieldCallback | None = None,
+        output_schema: dict[str, Any] | None = None,
+    ) -> str:
+        key = self.key_for(system, user, cache_prefix, agent_name)
+        if _bypass.get():
+            self.bypassed += 1
+        else:
+            text = self._lookup(key)
+            if text is not None:
+                log(agent_name, f"← LLM cache hit  key={key[:12]}  chars={len(text)}")
+                _replay(text, on_field)
+                return text
+            shared = self._in_flight.get(key)
+            if shared is not None:
+                self.shared += 1
+                log(agent_name, f"LLM cache — joining in-flight request key={key[:12]}")
+                text = await asyncio.shield(shared)
+                _replay(text, on_field)
+                return text
+            self.misses += 1
+
+        future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        self._in_flight.setdefault(key, future)
+        try:
+            text = await self._inner.complete(
+                system,
+                user,
+                agent_name,
+                hedge=hedge,
+                cache_prefix=cache_prefix,
+                on_field=on_field,
+                output_schema=output_schema,
+            )
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved so a failure nobody joined is not reported as unhandled
+            future.exception()
+            raise
+        else:
+            future.set_result(text)
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+        if is_json(text):
+            self._store(key, _Entry(agent_name, text, time.time()))
+        return text
+
+    @contextlib.contextmanager
+    def bypass(self) -> Iterator[None]:
+        """Skip cache lookups for calls made inside the block."""
+        token = _bypass.set(True)
+        try:
+            yield
+        finally:
+            _bypass.reset(token)
+
+    # ── Invalidation ─────────────────────────────────────────────────────────
+
+    def invalidate(self, agent_name: str | None = None) -> int:
+        """Drop every entry, or only `agent_name`'s. Returns entries removed."""
+        doomed = [
+            key
+            for key, entry in self._entries.items()
+            if agent_name is None or entry.agent == agent_name
+        ]
+        for key in doomed:
+            del self._entries[key]
+        removed = len(doomed)
+
+        if self.disk_dir is not None:
+            for path in self.disk_dir.glob("*.json"):
+                entry = self._read_disk(path)
+                if entry is None or agent_name is None or entry.agent == agent_name:
+                    path.unlink(missing_ok=True)
+                    if path.stem not in doomed:
+                        removed += 1
+        log("LLM_CACHE", f"Invalidated {removed} entries ({agent_name or 'all agents'})")
+        return removed
+
+    def invalidate_key(self, key: str) -> bool:
+        """Drop a single entry by content address."""
+        found = self._entries.pop(key, None) is not None
+        if self.disk_dir is not None:
+            path = self.disk_dir / f"{key}.json"
+            if path.exists():
+                path.unlink(missing_ok=True)
+                found = True
+        return found
+
+    # ── Metrics ──────────────────────────────────────────────────────────────
+
+    def cache_stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "shared": self.shared,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "bypassed": self.bypassed,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+    # ── Internals ────────────────────────────────────────────────────────────
+
+    def _expired(self, entry: _Entry) -> bool:
+        return self.ttl_seconds is not None and time.time() - entry.created_at > self.ttl_seconds
+
+    def _lookup(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if not self._expired(entry):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.text
+            # The disk copy is no newer, so it has expired too
+            del self._entries[key]
+            self.expirations += 1
+            if self.disk_dir is not None:
+                (self.disk_dir / f"{key}.json").unlink(missing_ok=True)
+            return None
+
+        if self.disk_dir is None:
+            return None
+        path = self.disk_dir / f"{key}.json"
+        entry = self._read_disk(path)
+        if entry is None:
+            return None
+        if self._expired(entry):
+            path.unlink(missing_ok=True)
+            self.expirations += 1
+            return None
+        self.disk_hits += 1
+        self._remember(key, entry)
+        return entry.text
+
+    def _store(self, key: str, entry: _Entry) -> None:
+        self._remember(key, entry)
+        if self.disk_dir is None:
+            return
+        path = self.disk_dir / f"{key}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({"agent": entry.agent, "created_at": entry.created_at, "text": entry.text}),
+            encoding="utf-8",
+        )
+        os.replace(tmp, path)
+
+    def _remember(self, key: str, entry: _Entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def _read_disk(path: Path) -> _Entry | None:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            return _Entry(data["agent"], data["text"], float(data["created_at"]))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+
+def _replay(text: str, on_field: FieldCallback | None) -> None:
+    """Report each field of a finished reply, as streaming it would have."""
+    if on_field is None:
+        return
+    for path, value in IncrementalJSONParser().feed(text):
+        on_field(path, value)
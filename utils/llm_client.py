@@ -1,52 +1,580 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import contextvars
+import itertools
+import json
+import math
 import time
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from typing import Any, AsyncIterator, Callable, Iterator
 
 import anthropic
 
+from utils.deadline import DeadlineExceeded, run_with_deadline, timeout_kwargs
+from utils.dry_run_latency import LatencySimulator, SimulatedLLMError
+from utils.json_stream import IncrementalJSONParser
+from utils.llm_routing import SONNET, RoutingTable
 from utils.logger import log
+from utils.prompt_encoding import estimate_tokens
+from utils.rate_limit import RateLimiter, Reservation, backoff_delay
+from utils.usage import cost_usd
 
+_EPHEMERAL = {"type": "ephemeral"}
 
-class LLMClient:
-    """Thin async wrapper around anthropic.AsyncAnthropic."""
+# Tool the model is forced to call when structured output is enabled
+_OUTPUT_TOOL = "submit_output"
 
-    model = "claude-3-5-sonnet-20241022"
-    max_tokens = 2048
+# Receives (path, value) for each JSON field of a streamed reply as it completes
+FieldCallback = Callable[[str, Any], None]
+
+# Token usage of every LLM round-trip made on behalf of the current incident.
+# Set by collect_usage() before an incident's agents are launched; their tasks
+# (and any hedge requests they spawn) inherit it.
+_usage_sink: contextvars.ContextVar[list[dict[str, Any]] | None] = contextvars.ContextVar(
+    "_usage_sink", default=None
+)
+
+
+# Seconds the current request has spent waiting on the rate limiter or in
+# retry backoff. Set per request by _HedgedCompletion; kept out of its latency
+# samples, which should reflect the model's speed rather than our own queueing.
+_waited: contextvars.ContextVar[list[float] | None] = contextvars.ContextVar(
+    "_waited", default=None
+)
+
+
+# Set by BoundedLLMClient around a call, so that every request the call makes
+# (a hedge included) holds one of its slots while in flight.
+_request_slots: contextvars.ContextVar[BoundedLLMClient | None] = contextvars.ContextVar(
+    "_request_slots", default=None
+)
+
+
+def _add_wait(seconds: float) -> None:
+    waited = _waited.get()
+    if waited is not None:
+        waited[0] += seconds
+
+
+def _record_usage(record: dict[str, Any]) -> None:
+    sink = _usage_sink.get()
+    if sink is not None:
+        sink.append(record)
+
+
+@contextlib.contextmanager
+def collect_usage(sink: list[dict[str, Any]]) -> Iterator[None]:
+    """Append the usage record of every LLM call made inside the block to `sink`.
+
+    Tasks created inside inherit the scope, as with deadline.scope().
+    """
+    token = _usage_sink.set(sink)
+    try:
+        yield
+    finally:
+        _usage_sink.reset(token)
+
+
+def prompt_cache_summary(records: list[dict[str, Any]]) -> dict[str, Any]:
+    """Aggregate prompt-cache token counts over a set of usage records.
+
+    hit_rate is the share of input tokens served from the cache.
+    """
+    read = sum(r["cache_read_input_tokens"] for r in records)
+    written = sum(r["cache_creation_input_tokens"] for r in records)
+    uncached = sum(r["input_tokens"] for r in records)
+    total = read + written + uncached
+    return {
+        "calls": len(records),
+        "cache_read_tokens": read,
+        "cache_write_tokens": written,
+        "uncached_input_tokens": uncached,
+        "hit_rate": round(read / total, 3) if total else 0.0,
+    }
+
+
+def _retry_after(exc: anthropic.APIError) -> float | None:
+    """The server's retry-after hint in seconds, if it sent one."""
+    response = getattr(exc, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _is_retryable(exc: anthropic.APIError) -> bool:
+    """Rate limited (429), overloaded (529) or another transient server/network failure."""
+    if isinstance(exc, anthropic.APIConnectionError):
+        return True
+    status = getattr(exc, "status_code", None)
+    return status is not None and (status == 429 or status >= 500)
+
+
+class _FallBack(Exception):
+    """The current model should be abandoned for the next one in the route."""
+
+    def __init__(self, reason: str, attempts: int) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.attempts = attempts
+
+
+def _reply_text(response: Any) -> str:
+    """The reply as JSON text, whether it came back as text or a forced tool call."""
+    for block in response.content:
+        if block.type == "tool_use":
+            return json.dumps(block.input, ensure_ascii=False)
+    return "".join(block.text for block in response.content if block.type == "text")
 
-    def __init__(self, api_key: str) -> None:
-        self.client = anthropic.AsyncAnthropic(api_key=api_key)
-        self._api_key = api_key
 
-    async def complete(self, system: str, user: str, agent_name: str = "LLM") -> str:
-        log(agent_name, f"→ LLM call  model={self.model}  prompt_chars={len(user)}")
+def is_json(text: str) -> bool:
+    """True if text (optionally inside a ``` fence) parses as JSON."""
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        cleaned = "\n".join(cleaned.splitlines()[1:-1]).strip()
+    try:
+        json.loads(cleaned)
+    except json.JSONDecodeError:
+        return False
+    return True
+
+
+class _HedgedCompletion(ABC):
+    """complete() with optional request hedging, shared by the LLM clients.
+
+    Subclasses implement _request() — one round-trip. With hedge=True, once an
+    agent has enough latency history, a duplicate request is fired if the
+    first has not answered within the `hedge_percentile` of that agent's
+    recent latencies. The first reply that is valid JSON wins and the other
+    request is cancelled.
+
+    Each completed call adds one latency sample: the time its caller waited
+    for the reply, less the time the answering request spent rate limited or
+    backing off. A primary overtaken by its hedge is thus recorded at the
+    time it had run when cancelled, not dropped.
+    """
+
+    hedge_percentile = 0.9
+    hedge_min_samples = 10
+    latency_history = 200
+
+    # Output reserved from the rate limiter before an agent has any history
+    default_output_tokens = 1024
+
+    limiter: RateLimiter | None = None
+
+    def _init_hedging(self) -> None:
+        self._latencies: dict[str, deque[float]] = defaultdict(
+            lambda: deque(maxlen=self.latency_history)
+        )
+        self._output_tokens: dict[str, deque[int]] = defaultdict(
+            lambda: deque(maxlen=self.latency_history)
+        )
+        self.hedges_fired: dict[str, int] = defaultdict(int)
+        self.hedges_won: dict[str, int] = defaultdict(int)
+
+    @abstractmethod
+    async def _request(
+        self,
+        system: str,
+        user: str,
+        agent_name: str,
+        cache_prefix: str = "",
+        on_field: FieldCallback | None = None,
+        output_schema: dict[str, Any] | None = None,
+    ) -> str:
+        """One round-trip to the model; returns the reply text."""
+
+    async def complete(
+        self,
+        system: str,
+        user: str,
+        agent_name: str = "LLM",
+        hedge: bool = False,
+        cache_prefix: str = "",
+        on_field: FieldCallback | None = None,
+        output_schema: dict[str, Any] | None = None,
+    ) -> str:
+        """Send `cache_prefix + user` under `system`.
+
+        cache_prefix is the part of the user message that repeats across calls
+        (e.g. the serialized alert); clients that support prompt caching mark
+        it, together with the system prompt, as cacheable. With on_field the
+        reply is streamed and on_field is called with each JSON field as soon
+        as it is complete; a hedged call may report the same field twice.
+        output_schema is the JSON schema the reply must follow; clients that
+        support structured output use it to constrain generation.
+        """
         t0 = time.perf_counter()
-        try:
-            response = await self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                system=system,
-                messages=[{"role": "user", "content": user}],
+        delay = self.hedge_delay(agent_name) if hedge else None
+        if delay is None:
+            text, waited = await self._timed_request(
+                system, user, agent_name, cache_prefix, on_field, output_schema
             )
-        except anthropic.AuthenticationError as exc:
+            self._record_latency(agent_name, t0, waited)
+            return text
+
+        primary = asyncio.create_task(
+            self._timed_request(system, user, agent_name, cache_prefix, on_field, output_schema)
+        )
+        backup: asyncio.Task[tuple[str, float]] | None = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                text, waited = primary.result()
+                self._record_latency(agent_name, t0, waited)
+                return text
+
+            self.hedges_fired[agent_name] += 1
             log(
-                "ERROR",
-                f"Authentication failed for {agent_name} — "
-                f"key starts with '{self._api_key[:12]}...'. "
-                f"Run with --check-key to diagnose. Original error: {exc}",
+                agent_name,
+                f"⑂ hedging — no reply after {delay:.2f}s "
+                f"(p{self.hedge_percentile * 100:.0f} of last {len(self._latencies[agent_name])})",
             )
-            raise
-        except anthropic.APIError as exc:
-            log("ERROR", f"Anthropic API error in {agent_name}: {exc}")
-            raise
+            backup = asyncio.create_task(
+                self._timed_request(system, user, agent_name, cache_prefix, on_field, output_schema)
+            )
+            text, waited = await self._race(agent_name, primary, backup)
+            self._record_latency(agent_name, t0, waited)
+            return text
+        finally:
+            for task in (primary, backup):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    async def _race(
+        self,
+        agent_name: str,
+        primary: asyncio.Task[tuple[str, float]],
+        backup: asyncio.Task[tuple[str, float]],
+    ) -> tuple[str, float]:
+        pending: set[asyncio.Task[tuple[str, float]]] = {primary, backup}
+        fallback: asyncio.Task[tuple[str, float]] | None = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None and is_json(task.result()[0]):
+                    if task is backup:
+                        self.hedges_won[agent_name] += 1
+                        log(agent_name, "⑂ hedge won — primary request cancelled")
+                    return task.result()
+                # Prefer a reply that at least returned text over an error
+                if fallback is None or (fallback.exception() and not task.exception()):
+                    fallback = task
+        assert fallback is not None
+        return fallback.result()
+
+    async def _timed_request(
+        self,
+        system: str,
+        user: str,
+        agent_name: str,
+        cache_prefix: str,
+        on_field: FieldCallback | None,
+        output_schema: dict[str, Any] | None,
+    ) -> tuple[str, float]:
+        """One request; returns its reply and the seconds it spent waiting."""
+        waited = [0.0]
+        token = _waited.set(waited)
+        bound = _request_slots.get()
+        try:
+            async with bound.slot() if bound is not None else contextlib.nullcontext():
+                text = await self._request(
+                    system, user, agent_name, cache_prefix, on_field, output_schema
+                )
+        finally:
+            _waited.reset(token)
+        return text, waited[0]
+
+    def _record_latency(self, agent_name: str, started: float, waited: float) -> None:
+        self._latencies[agent_name].append(max(time.perf_counter() - started - waited, 0.0))
+
+    async def _reserve(self, agent_name: str, prompt: str) -> Reservation | None:
+        """Wait for rate-limiter capacity for one request, when a limiter is set."""
+        if self.limiter is None:
+            return None
+        history = self._output_tokens.get(agent_name)
+        expected_out = (
+            round(sum(history) / len(history)) if history else self.default_output_tokens
+        )
+        reservation = await run_with_deadline(
+            self.limiter.acquire(estimate_tokens(prompt), expected_out),
+            f"{agent_name} rate limiter",
+        )
+        _add_wait(reservation.waited)
+        if reservation.waited >= 0.05:
+            log(agent_name, f"⏳ rate limited — waited {reservation.waited:.2f}s for capacity")
+        return reservation
+
+    def _settle(
+        self,
+        agent_name: str,
+        reservation: Reservation | None,
+        input_tokens: int,
+        output_tokens: int,
+    ) -> None:
+        self._output_tokens[agent_name].append(output_tokens)
+        if self.limiter is not None and reservation is not None:
+            self.limiter.settle(reservation, input_tokens, output_tokens)
+
+    def hedge_delay(self, agent_name: str) -> float | None:
+        """Hedge trigger for the agent, or None until enough history exists."""
+        samples = self._latencies.get(agent_name)
+        if not samples or len(samples) < self.hedge_min_samples:
+            return None
+        ordered = sorted(samples)
+        rank = max(math.ceil(self.hedge_percentile * len(ordered)) - 1, 0)
+        return ordered[rank]
+
+    def hedge_stats(self) -> dict[str, dict[str, Any]]:
+        """Per-agent latency percentiles and hedge fired/won counters."""
+        stats: dict[str, dict[str, Any]] = {}
+        for agent_name, samples in self._latencies.items():
+            ordered = sorted(samples)
+            stats[agent_name] = {
+                "samples": len(ordered),
+                "p50_s": round(ordered[len(ordered) // 2], 3),
+                "hedge_delay_s": self.hedge_delay(agent_name),
+                "hedges_fired": self.hedges_fired[agent_name],
+                "hedges_won": self.hedges_won[agent_name],
+            }
+        return stats
+
+
+class LLMClient(_HedgedCompletion):
+    """Thin async wrapper around anthropic.AsyncAnthropic.
+
+    The system prompt and the caller's cache_prefix are sent as separate
+    content blocks with ephemeral cache_control breakpoints, so repeat calls
+    for the same agent and alert (retries, hedges, re-runs) read that prefix
+    from Anthropic's prompt cache instead of re-processing it. Calls with an
+    on_field callback use the streaming Messages API and parse the reply
+    incrementally. With structured_output, a call that passes output_schema
+    forces a single tool call whose input schema is that schema, so the reply
+    is always well-formed JSON.
+
+    Model, max_tokens and temperature come from the agent's route in
+    `routes` (see utils/llm_routing.py), falling back along the route's
+    model chain when a model is overloaded or slow.
+    """
+
+    # Used by check_key(); agent calls follow self.routes
+    model = SONNET
+
+    # Attempts after the first for 429/529/5xx/connection failures
+    max_retries = 4
+
+    def __init__(
+        self,
+        api_key: str,
+        limiter: RateLimiter | None = None,
+        structured_output: bool = False,
+        routes: RoutingTable | None = None,
+    ) -> None:
+        # Retries are ours, so backoff and the shared limiter see every 429
+        self.client = anthropic.AsyncAnthropic(api_key=api_key, max_retries=0)
+        self._api_key = api_key
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.structured_output = structured_output
+        self.routes = routes if routes is not None else RoutingTable()
+        self._init_hedging()
+
+    async def _request(
+        self,
+        system: str,
+        user: str,
+        agent_name: str,
+        cache_prefix: str = "",
+        on_field: FieldCallback | None = None,
+        output_schema: dict[str, Any] | None = None,
+    ) -> str:
+        route = self.routes.route_for(agent_name)
+        structured = self.structured_output and bool(output_schema)
+        log(
+            agent_name,
+            f"→ LLM call  route={route.describe()}  "
+            f"prompt_chars={len(cache_prefix) + len(user)}  cacheable_chars={len(cache_prefix)}"
+            + ("  streaming" if on_field else "")
+            + ("  structured" if structured else ""),
+        )
+        content: list[dict[str, Any]] = []
+        if cache_prefix:
+            content.append({"type": "text", "text": cache_prefix, "cache_control": _EPHEMERAL})
+        content.append({"type": "text", "text": user})
+        request: dict[str, Any] = {
+            "max_tokens": route.max_tokens,
+            "temperature": route.temperature,
+            "system": [{"type": "text", "text": system, "cache_control": _EPHEMERAL}],
+            "messages": [{"role": "user", "content": content}],
+        }
+        if structured:
+            request["tools"] = [
+                {
+                    "name": _OUTPUT_TOOL,
+                    "description": "Submit the analysis as structured output.",
+                    "input_schema": output_schema,
+                }
+            ]
+            request["tool_choice"] = {"type": "tool", "name": _OUTPUT_TOOL}
+
+        prompt = system + cache_prefix + user
+        retries = 0
+        for position, model in enumerate(route.models):
+            next_model = route.models[position + 1] if position + 1 < len(route.models) else None
+            try:
+                response, reservation, latency, attempts = await self._send(
+                    {**request, "model": model},
+                    agent_name,
+                    prompt,
+                    on_field,
+                    # The last model in the chain is waited on for as long as the deadline allows
+                    slow_after_s=route.slow_after_s if next_model else None,
+                    can_fall_back=next_model is not None,
+                )
+                retries += attempts - 1
+                break
+            except _FallBack as exc:
+                retries += exc.attempts
+                self.routes.record_fallback(agent_name, model, exc.reason, next_model)
 
-        latency = time.perf_counter() - t0
         usage = response.usage
+        record = {
+            "agent": agent_name,
+            "model": model,
+            "input_tokens": usage.input_tokens,
+            "output_tokens": usage.output_tokens,
+            # None when the request carried no cache breakpoint
+            "cache_creation_input_tokens": usage.cache_creation_input_tokens or 0,
+            "cache_read_input_tokens": usage.cache_read_input_tokens or 0,
+            "latency_s": round(latency, 3),
+            # Failed attempts before this reply, on this model or earlier ones in the route
+            "retries": retries,
+        }
+        record["cost_usd"] = cost_usd(
+            model,
+            record["input_tokens"],
+            record["output_tokens"],
+            record["cache_creation_input_tokens"],
+            record["cache_read_input_tokens"],
+        )
+        _record_usage(record)
+        self.routes.record(
+            agent_name,
+            model,
+            latency,
+            usage.input_tokens,
+            usage.output_tokens,
+            fallback=position > 0,
+        )
+        # Cache reads do not count towards the input-tokens-per-minute limit
+        self._settle(
+            agent_name,
+            reservation,
+            usage.input_tokens + record["cache_creation_input_tokens"],
+            usage.output_tokens,
+        )
         log(
             agent_name,
             f"← LLM done  in={usage.input_tokens} out={usage.output_tokens} "
+            f"cache_write={record['cache_creation_input_tokens']} "
+            f"cache_read={record['cache_read_input_tokens']} "
+            f"cache_hit={prompt_cache_summary([record])['hit_rate']:.0%} "
             f"latency={latency:.2f}s",
         )
-        return response.content[0].text
+        return _reply_text(response)
+
+    async def _send(
+        self,
+        request: dict[str, Any],
+        agent_name: str,
+        prompt: str,
+        on_field: FieldCallback | None,
+        slow_after_s: float | None,
+        can_fall_back: bool,
+    ) -> tuple[Any, Reservation | None, float, int]:
+        """One model's attempt, retried on transient errors.
+
+        Returns (response, reservation, latency of the final attempt, attempts).
+
+        Raises _FallBack when the model is overloaded or slower than
+        slow_after_s and the route has another model to try.
+        """
+        for attempt in itertools.count():
+            reservation = await self._reserve(agent_name, prompt)
+            t0 = time.perf_counter()
+            try:
+                # The enclosing deadline bounds both the HTTP request and the await
+                call = run_with_deadline(
+                    self.client.messages.create(**request, **timeout_kwargs())
+                    if on_field is None
+                    else self._stream({**request, **timeout_kwargs()}, on_field),
+                    f"{agent_name} LLM call",
+                )
+                if slow_after_s is not None:
+                    call = asyncio.wait_for(call, slow_after_s)
+                response = await call
+                return response, reservation, time.perf_counter() - t0, attempt + 1
+            except DeadlineExceeded:
+                raise
+            except asyncio.TimeoutError:
+                self._release(reservation)
+                raise _FallBack(f"no reply after {slow_after_s:g}s", attempt + 1) from None
+            except anthropic.AuthenticationError as exc:
+                log(
+                    "ERROR",
+                    f"Authentication failed for {agent_name} — "
+                    f"key starts with '{self._api_key[:12]}...'. "
+                    f"Run with --check-key to diagnose. Original error: {exc}",
+                )
+                raise
+            except anthropic.APIError as exc:
+                self._release(reservation)
+                status = getattr(exc, "status_code", None)
+                if can_fall_back and status == 529:
+                    raise _FallBack("overloaded (529)", attempt + 1) from None
+                if not _is_retryable(exc) or attempt >= self.max_retries:
+                    log("ERROR", f"Anthropic API error in {agent_name}: {exc}")
+                    raise
+                retry_after = _retry_after(exc)
+                wait = backoff_delay(attempt, retry_after)
+                if self.limiter is not None:
+                    self.limiter.retries += 1
+                    if status == 429:
+                        # Every caller shares the quota — hold them all back
+                        self.limiter.pause(wait)
+                log(
+                    agent_name,
+                    f"↻ {type(exc).__name__} ({status or 'network'}) — "
+                    f"retry {attempt + 1}/{self.max_retries} in {wait:.2f}s"
+                    + (f" (retry-after={retry_after:g}s)" if retry_after is not None else ""),
+                )
+                await run_with_deadline(asyncio.sleep(wait), f"{agent_name} LLM backoff")
+                _add_wait(wait)
+        raise AssertionError("unreachable")
+
+    def _release(self, reservation: Reservation | None) -> None:
+        if reservation is not None and self.limiter is not None:
+            self.limiter.release(reservation)
+
+    async def _stream(self, request: dict[str, Any], on_field: FieldCallback) -> Any:
+        """Stream a Messages request, reporting JSON fields as they complete."""
+        parser = IncrementalJSONParser()
+        async with self.client.messages.stream(**request) as stream:
+            async for event in stream:
+                # A forced tool call streams its input as partial JSON
+                if event.type == "text":
+                    chunk = event.text
+                elif event.type == "input_json":
+                    chunk = event.partial_json
+                else:
+                    continue
+                for path, value in parser.feed(chunk):
+                    on_field(path, value)
+            return await stream.get_final_message()
 
     async def check_key(self) -> tuple[bool, str]:
         """Probe the API with a minimal request. Returns (ok, message)."""
@@ -63,24 +591,44 @@ class LLMClient:
             return False, f"API error (key may be valid but another issue occurred): {exc}"
 
 
-class DryRunLLMClient:
+class DryRunLLMClient(_HedgedCompletion):
     """Fake LLM client for --dry-run mode.
 
-    Returns pre-baked realistic JSON responses keyed by agent name,
-    with a simulated 0.5 s latency so the parallel phase timing is visible.
+    Returns pre-baked realistic JSON responses keyed by agent name after a
+    simulated latency — 0.5 s by default, or per-agent distributions, token-
+    proportional delay and injected failures from a LatencySimulator (see
+    utils/dry_run_latency.py). With on_field the response is released in
+    chunks across that latency, as a streamed reply would be. With `routes`,
+    each call is booked against the agent's primary model so the routing
+    table can be exercised offline.
     """
 
     model = "dry-run (no API call)"
+    stream_chunks = 10
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        limiter: RateLimiter | None = None,
+        routes: RoutingTable | None = None,
+        latency: LatencySimulator | None = None,
+    ) -> None:
         from utils.dry_run_responses import DRY_RUN_RESPONSES
         self._responses = DRY_RUN_RESPONSES
+        self.limiter = limiter
+        self.routes = routes
+        self.latency = latency if latency is not None else LatencySimulator()
+        self._init_hedging()
 
-    async def complete(self, system: str, user: str, agent_name: str = "LLM") -> str:
-        import asyncio
+    async def _request(
+        self,
+        system: str,
+        user: str,
+        agent_name: str,
+        cache_prefix: str = "",
+        on_field: FieldCallback | None = None,
+        output_schema: dict[str, Any] | None = None,
+    ) -> str:
         log(agent_name, f"→ DRY-RUN LLM call  (no real API call)  agent={agent_name}")
-        await asyncio.sleep(0.5)  # simulate network round-trip; keeps parallel timing realistic
-
         response = self._responses.get(agent_name)
         if response is None:
             raise RuntimeError(
@@ -88,5 +636,120 @@ class DryRunLLMClient:
                 f"Known agents: {list(self._responses.keys())}"
             )
 
+        input_tokens = estimate_tokens(system + cache_prefix + user)
+        output_tokens = estimate_tokens(response)
+        plan = self.latency.plan(agent_name, output_tokens)
+        reservation = await self._reserve(agent_name, system + cache_prefix + user)
+        t0 = time.perf_counter()
+        try:
+            # simulate network round-trip; keeps parallel timing realistic
+            if on_field is None or plan.outcome != "ok":
+                await run_with_deadline(asyncio.sleep(plan.delay_s), f"{agent_name} LLM call")
+            else:
+                await run_with_deadline(
+                    self._stream(response, on_field, plan.delay_s), f"{agent_name} LLM call"
+                )
+            if plan.outcome == "timeout":
+                log("ERROR", f"DRY-RUN injected timeout in {agent_name} after {plan.delay_s:.1f}s")
+                raise TimeoutError(f"DryRunLLMClient: injected timeout for {agent_name}")
+            if plan.outcome == "error":
+                log("ERROR", f"DRY-RUN injected failure in {agent_name}")
+                raise SimulatedLLMError(f"DryRunLLMClient: injected failure for {agent_name}")
+        except BaseException:
+            if reservation is not None and self.limiter is not None:
+                self.limiter.release(reservation)
+            raise
+        latency = time.perf_counter() - t0
+        self._settle(agent_name, reservation, input_tokens, output_tokens)
+        model = self.routes.route_for(agent_name).model if self.routes is not None else self.model
+        _record_usage(
+            {
+                "agent": agent_name,
+                "model": model,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "cache_creation_input_tokens": 0,
+                "cache_read_input_tokens": 0,
+                "latency_s": round(latency, 3),
+                "retries": 0,
+                # What the call would have cost on the routed model
+                "cost_usd": cost_usd(model, input_tokens, output_tokens),
+                "estimated": True,
+            }
+        )
+        if self.routes is not None:
+            self.routes.record(agent_name, model, latency, input_tokens, output_tokens)
+
         log(agent_name, f"← DRY-RUN done  chars={len(response)}  (pre-baked response)")
         return response
+
+    async def _stream(self, response: str, on_field: FieldCallback, duration: float) -> None:
+        parser = IncrementalJSONParser()
+        size = -(-len(response) // self.stream_chunks)
+        for start in range(0, len(response), size):
+            await asyncio.sleep(duration / self.stream_chunks)
+            for path, value in parser.feed(response[start:start + size]):
+                on_field(path, value)
+
+
+class BoundedLLMClient:
+    """Caps concurrent in-flight LLM requests for every incident sharing one client.
+
+    Wraps an LLMClient or DryRunLLMClient, or a CachedLLMClient around one;
+    anything other than complete() is delegated to the wrapped client. The
+    slots are taken per request rather than per call: a hedge holds a slot of
+    its own, and a reply served from a cache holds none.
+    """
+
+    def __init__(self, inner: LLMClient | DryRunLLMClient, max_concurrent: int) -> None:
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be >= 1")
+        self._inner = inner
+        self._sem = asyncio.Semaphore(max_concurrent)
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self.waiting = 0
+
+    async def complete(
+        self,
+        system: str,
+        user: str,
+        agent_name: str = "LLM",
+        hedge: bool = False,
+        cache_prefix: str = "",
+        on_field: FieldCallback | None = None,
+        output_schema: dict[str, Any] | None = None,
+    ) -> str:
+        token = _request_slots.set(self)
+        try:
+            return await self._inner.complete(
+                system,
+                user,
+                agent_name,
+                hedge=hedge,
+                cache_prefix=cache_prefix,
+                on_field=on_field,
+                output_schema=output_schema,
+            )
+        finally:
+            _request_slots.reset(token)
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one slot for the duration of a single request."""
+        self.waiting += 1
+        t0 = time.perf_counter()
+        try:
+            await self._sem.acquire()
+        finally:
+            self.waiting -= 1
+        _add_wait(time.perf_counter() - t0)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._sem.release()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
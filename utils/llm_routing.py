@@ -0,0 +1,142 @@
+"""Per-agent model routing for LLM calls.
+
+Each agent gets its own model, max_tokens and temperature, plus a fallback
+chain: when the primary model is overloaded (529) or has not answered within
+`slow_after_s`, the call moves on to the next model in the chain. The table
+records every routing decision with its latency and token usage so the
+routes can be tuned from real traffic.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any, Sequence
+
+from utils.logger import log
+
+SONNET = "claude-3-5-sonnet-20241022"
+HAIKU = "claude-3-5-haiku-20241022"
+
+
+class Route:
+    """Model chain and generation settings for one agent's LLM calls.
+
+    `models[0]` is the primary; later entries are tried in order when the
+    one before is overloaded or slower than `slow_after_s`. The last model
+    is never abandoned for slowness.
+    """
+
+    __slots__ = ("models", "max_tokens", "temperature", "slow_after_s")
+
+    def __init__(
+        self,
+        models: Sequence[str],
+        max_tokens: int = 2048,
+        temperature: float = 0.0,
+        slow_after_s: float | None = None,
+    ) -> None:
+        if not models:
+            raise ValueError("a route needs at least one model")
+        self.models = tuple(models)
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.slow_after_s = slow_after_s
+
+    @property
+    def model(self) -> str:
+        return self.models[0]
+
+    def describe(self) -> str:
+        return (
+            f"{' → '.join(self.models)}  max_tokens={self.max_tokens}  "
+            f"temperature={self.temperature:g}"
+        )
+
+
+# IMPACT and SIMILAR (phase 1) and SUMMARIZER (phase 2) are extraction and
+# ranking work that a fast model handles well, and they sit on RCA's critical
+# path; RCA keeps the large model for the actual reasoning.
+DEFAULT_ROUTES: dict[str, Route] = {
+    "IMPACT": Route([HAIKU, SONNET], max_tokens=1024, slow_after_s=20.0),
+    "SIMILAR": Route([HAIKU, SONNET], max_tokens=1024, slow_after_s=20.0),
+    "SUMMARIZER": Route([HAIKU, SONNET], max_tokens=1536, temperature=0.3, slow_after_s=25.0),
+    "RCA": Route([SONNET, HAIKU], max_tokens=2048, slow_after_s=45.0),
+    # Map-reduce RCA: the sub-analyses each read one kind of evidence; the
+    # synthesis does the cross-referencing
+    "RCA.changes": Route([HAIKU, SONNET], max_tokens=1024, slow_after_s=20.0),
+    "RCA.logs": Route([HAIKU, SONNET], max_tokens=1024, slow_after_s=20.0),
+    "RCA.history": Route([HAIKU, SONNET], max_tokens=1024, slow_after_s=20.0),
+    "RCA.synthesis": Route([SONNET, HAIKU], max_tokens=2048, slow_after_s=30.0),
+}
+
+
+class RoutingTable:
+    """Agent name → Route, with per-route call statistics.
+
+    Usage:
+        routes = RoutingTable({"RCA": Route([SONNET, HAIKU], max_tokens=3000)})
+        route = routes.route_for("RCA")
+        ...                                   # call route.model
+        routes.record("RCA", SONNET, latency_s=4.2, input_tokens=3100, output_tokens=820)
+        routes.stats()
+    """
+
+    def __init__(
+        self,
+        routes: dict[str, Route] | None = None,
+        default: Route | None = None,
+    ) -> None:
+        self.routes = dict(DEFAULT_ROUTES if routes is None else routes)
+        self.default = default if default is not None else Route([SONNET])
+        self._calls: dict[tuple[str, str], dict[str, Any]] = defaultdict(
+            lambda: {
+                "calls": 0,
+                "fallbacks_from": 0,
+                "latency_s": 0.0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+            }
+        )
+
+    def route_for(self, agent_name: str) -> Route:
+        return self.routes.get(agent_name, self.default)
+
+    def record(
+        self,
+        agent_name: str,
+        model: str,
+        latency_s: float,
+        input_tokens: int,
+        output_tokens: int,
+        fallback: bool = False,
+    ) -> None:
+        """Book a completed call; `fallback` marks one served by a non-primary model."""
+        entry = self._calls[(agent_name, model)]
+        entry["calls"] += 1
+        entry["latency_s"] += latency_s
+        entry["input_tokens"] += input_tokens
+        entry["output_tokens"] += output_tokens
+        log(
+            agent_name,
+            f"⇢ routed to {model}{' (fallback)' if fallback else ''}  "
+            f"latency={latency_s:.2f}s in={input_tokens} out={output_tokens}",
+        )
+
+    def record_fallback(self, agent_name: str, model: str, reason: str, next_model: str) -> None:
+        """Book a call abandoned on `model` in favour of `next_model`."""
+        self._calls[(agent_name, model)]["fallbacks_from"] += 1
+        log(agent_name, f"⇢ {model} {reason} — falling back to {next_model}")
+
+    def stats(self) -> dict[str, dict[str, dict[str, Any]]]:
+        """Per agent, per model: calls, fallbacks away, mean latency and token totals."""
+        out: dict[str, dict[str, dict[str, Any]]] = defaultdict(dict)
+        for (agent_name, model), entry in sorted(self._calls.items()):
+            calls = entry["calls"]
+            out[agent_name][model] = {
+                "calls": calls,
+                "fallbacks_from": entry["fallbacks_from"],
+                "mean_latency_s": round(entry["latency_s"] / calls, 3) if calls else None,
+                "input_tokens": entry["input_tokens"],
+                "output_tokens": entry["output_tokens"],
+            }
+        return dict(out)
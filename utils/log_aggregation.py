@@ -0,0 +1,167 @@
+"""Incremental, bounded-memory aggregation of streamed error logs.
+
+ErrorLogAggregator consumes log entries one page at a time and keeps only
+fixed-size state: counts per exception class and per service, per-minute
+histograms, the extremes of every connection pool and circuit breaker seen,
+message templates mined with Drain (utils/log_templates.py), and one
+exemplar entry per (service, exception) pair. Memory stays flat however many
+entries stream through; summary() is what goes into a prompt.
+"""
+
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from typing import Any, Iterable
+
+from utils.log_templates import TemplateMiner
+
+# Full entries kept per (service, exception class) — enough to show the model
+# a real stack trace; message variety is carried by the templates
+_EXEMPLARS_PER_KEY = 1
+
+# Distinct (service, exception) pairs with exemplars; later pairs are only counted
+_MAX_EXEMPLAR_KEYS = 50
+
+# Per-service minute buckets kept in the histogram (most recent win)
+_MAX_MINUTES = 120
+
+# Most frequent templates included in the summary; the rest are only counted
+_MAX_TEMPLATES_IN_SUMMARY = 25
+
+
+class ErrorLogAggregator:
+    """Running aggregates over a stream of Splunk error log entries.
+
+    Usage:
+        agg = ErrorLogAggregator()
+        async for page in splunk.stream_error_logs(services):
+            agg.add_page(page)
+        agg.summary()
+    """
+
+    def __init__(self) -> None:
+        self.total = 0
+        self.first_timestamp: str | None = None
+        self.last_timestamp: str | None = None
+        self.exception_counts: Counter[str] = Counter()
+        self.service_counts: Counter[str] = Counter()
+        self.level_counts: Counter[str] = Counter()
+        self._per_minute: dict[str, Counter[str]] = defaultdict(Counter)
+        self._pools: dict[str, dict[str, Any]] = {}
+        self._breakers: dict[str, dict[str, Any]] = {}
+        self._exemplars: dict[tuple[str, str], list[dict[str, Any]]] = {}
+        self.templates = TemplateMiner()
+
+    def add_page(self, entries: Iterable[dict[str, Any]]) -> None:
+        for entry in entries:
+            self.add(entry)
+
+    def add(self, entry: dict[str, Any]) -> None:
+        self.total += 1
+        service = entry.get("service", "unknown")
+        exc = entry.get("exception_class", "unknown")
+        ts = entry.get("timestamp")
+        self.exception_counts[exc] += 1
+        self.service_counts[service] += 1
+        self.level_counts[entry.get("level", "UNKNOWN")] += 1
+
+        if ts:
+            if self.first_timestamp is None or ts < self.first_timestamp:
+                self.first_timestamp = ts
+            if self.last_timestamp is None or ts > self.last_timestamp:
+                self.last_timestamp = ts
+            minutes = self._per_minute[service]
+            minutes[ts[:16]] += 1   # "YYYY-MM-DDTHH:MM"
+            if len(minutes) > _MAX_MINUTES:
+                del minutes[min(minutes)]
+
+        message = entry.get("message")
+        if message:
+            self.templates.add(message, ts, service)
+
+        pool = entry.get("hikaricp")
+        if pool:
+            self._track_pool(service, pool, ts)
+        breaker = entry.get("circuit_breaker")
+        if breaker:
+            self._track_breaker(breaker, ts)
+
+        key = (service, exc)
+        kept = self._exemplars.get(key)
+        if kept is None and len(self._exemplars) < _MAX_EXEMPLAR_KEYS:
+            kept = self._exemplars[key] = []
+        if kept is not None and len(kept) < _EXEMPLARS_PER_KEY:
+            kept.append(entry)
+
+    def _track_pool(self, service: str, pool: dict[str, Any], ts: str | None) -> None:
+        name = f"{service}/{pool.get('pool_name', 'pool')}"
+        state = self._pools.get(name)
+        if state is None:
+            state = self._pools[name] = {
+                "max_pool_size": pool.get("max_pool_size"),
+                "samples": 0,
+                "max_active_connections": 0,
+                "min_idle_connections": None,
+                "max_pending_threads": 0,
+                "worst_at": None,
+            }
+        state["samples"] += 1
+        state["max_active_connections"] = max(
+            state["max_active_connections"], pool.get("active_connections", 0)
+        )
+        idle = pool.get("idle_connections")
+        lowest = state["min_idle_connections"]
+        if idle is not None and (lowest is None or idle < lowest):
+            state["min_idle_connections"] = idle
+        pending = pool.get("pending_threads", 0)
+        if pending >= state["max_pending_threads"]:
+            state["max_pending_threads"] = pending
+            state["worst_at"] = ts
+        if "connection_timeout_ms" in pool:
+            state["connection_timeout_ms"] = pool["connection_timeout_ms"]
+
+    def _track_breaker(self, breaker: dict[str, Any], ts: str | None) -> None:
+        name = breaker.get("name", "unknown")
+        state = self._breakers.setdefault(
+            name, {"states": Counter(), "max_failure_rate_pct": 0.0, "threshold_pct": None}
+        )
+        state["states"][breaker.get("state", "UNKNOWN")] += 1
+        state["max_failure_rate_pct"] = max(
+            state["max_failure_rate_pct"], breaker.get("failure_rate_pct", 0.0)
+        )
+        state["threshold_pct"] = breaker.get("threshold_pct", state["threshold_pct"])
+        if breaker.get("state") == "OPEN" and "first_open_at" not in state:
+            state["first_open_at"] = ts
+
+    def pools(self) -> dict[str, dict[str, Any]]:
+        """Connection-pool extremes keyed "service/pool_name"."""
+        return self._pools
+
+    def summary(self) -> dict[str, Any]:
+        """Aggregates plus exemplar entries, sized for a prompt."""
+        return {
+            "total_entries": self.total,
+            "window": {"first": self.first_timestamp, "last": self.last_timestamp},
+            "levels": dict(self.level_counts),
+            "exception_counts": dict(self.exception_counts.most_common()),
+            "message_templates": self.templates.summary(top=_MAX_TEMPLATES_IN_SUMMARY),
+            "other_templates": max(len(self.templates.templates) - _MAX_TEMPLATES_IN_SUMMARY, 0),
+            "per_service": {
+                service: {
+                    "entries": count,
+                    "per_minute": dict(sorted(self._per_minute[service].items())),
+                }
+                for service, count in self.service_counts.most_common()
+            },
+            "connection_pools": self._pools,
+            "circuit_breakers": {
+                name: {**state, "states": dict(state["states"])}
+                for name, state in self._breakers.items()
+            },
+            # The message is already represented by its template's samples
+            "exemplars": [
+                {k: v for k, v in entry.items() if k != "message"}
+                for kept in self._exemplars.values()
+                for entry in kept
+            ],
+        }
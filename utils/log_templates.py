@@ -0,0 +1,210 @@
+"""Drain-style log template mining.
+
+Error logs in a cascade are a few failure modes repeated thousands of times
+with different numbers in them. TemplateMiner clusters messages online with
+the Drain algorithm (He et al., 2017): numbers are masked first, messages are
+routed through a fixed-depth prefix tree keyed on token count and leading
+tokens, and joined to the most similar template in the leaf — or start a new
+one. Positions where joined messages disagree become <*>.
+
+Each template keeps its count, first/last-seen times, services, a couple of
+representative raw messages and running min/max/last of every numeric
+parameter, so a prompt built from the templates grows with the number of
+distinct failure modes rather than the log volume.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any
+
+_NUM = re.compile(r"\d+(?:\.\d+)?")
+NUM_MASK = "<NUM>"
+WILDCARD = "<*>"
+
+# Samples kept per template, distinct values kept per <*> position
+_SAMPLES = 2
+_WILDCARD_VALUES = 5
+
+
+class LogTemplate:
+    """One cluster of messages sharing a template."""
+
+    def __init__(self, template_id: int, tokens: list[str]) -> None:
+        self.template_id = template_id
+        self.tokens = tokens
+        self.count = 0
+        self.first_seen: str | None = None
+        self.last_seen: str | None = None
+        self.services: set[str] = set()
+        self.samples: list[str] = []
+        # Position → running stats of the numbers found in that token
+        self.numeric: dict[int, list[dict[str, float]]] = {}
+        # Position → distinct raw values seen where the template has <*>
+        self.variants: dict[int, list[str]] = {}
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.tokens)
+
+    def add(
+        self,
+        raw_tokens: list[str],
+        numbers: list[list[float]],
+        message: str,
+        timestamp: str | None,
+        service: str | None,
+    ) -> None:
+        self.count += 1
+        if timestamp:
+            if self.first_seen is None or timestamp < self.first_seen:
+                self.first_seen = timestamp
+            if self.last_seen is None or timestamp > self.last_seen:
+                self.last_seen = timestamp
+        if service:
+            self.services.add(service)
+        if len(self.samples) < _SAMPLES and message not in self.samples:
+            self.samples.append(message)
+
+        for pos, values in enumerate(numbers):
+            if not values:
+                continue
+            stats = self.numeric.setdefault(pos, [])
+            for i, value in enumerate(values):
+                if i == len(stats):
+                    stats.append({"min": value, "max": value, "last": value})
+                else:
+                    stats[i]["min"] = min(stats[i]["min"], value)
+                    stats[i]["max"] = max(stats[i]["max"], value)
+                    stats[i]["last"] = value
+
+        for pos, token in enumerate(self.tokens):
+            if token == WILDCARD:
+                seen = self.variants.setdefault(pos, [])
+                if len(seen) < _WILDCARD_VALUES and raw_tokens[pos] not in seen:
+                    seen.append(raw_tokens[pos])
+
+    def parameters(self) -> dict[str, Any]:
+        """Numeric parameters named by their masked token, e.g. "<NUM>ms#1"."""
+        params: dict[str, Any] = {}
+        for pos, stats in sorted(self.numeric.items()):
+            for i, stat in enumerate(stats):
+                name = f"{self.tokens[pos]}#{pos}" + (f".{i}" if len(stats) > 1 else "")
+                params[name] = {k: _compact(v) for k, v in stat.items()}
+        return params
+
+    def as_dict(self) -> dict[str, Any]:
+        out: dict[str, Any] = {
+            "template": self.text,
+            "count": self.count,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "services": sorted(self.services),
+            "samples": self.samples,
+        }
+        params = self.parameters()
+        if params:
+            out["numeric_params"] = params
+        if self.variants:
+            out["variants"] = {f"{WILDCARD}#{pos}": v for pos, v in sorted(self.variants.items())}
+        return out
+
+
+class TemplateMiner:
+    """Online Drain clustering of log messages.
+
+    depth is the parse-tree depth (token-count level plus depth - 2 leading
+    tokens); sim_threshold is the share of matching tokens a message needs to
+    join a template; max_children bounds each tree node, with overflow routed
+    through a <*> child.
+
+    Usage:
+        miner = TemplateMiner()
+        for entry in logs:
+            miner.add(entry["message"], entry["timestamp"], entry["service"])
+        miner.summary()
+    """
+
+    def __init__(
+        self,
+        depth: int = 4,
+        sim_threshold: float = 0.5,
+        max_children: int = 100,
+        max_templates: int = 500,
+    ) -> None:
+        if depth < 3:
+            raise ValueError("depth must be >= 3")
+        self.depth = depth
+        self.sim_threshold = sim_threshold
+        self.max_children = max_children
+        self.max_templates = max_templates
+        self._root: dict[int, Any] = {}
+        self.templates: list[LogTemplate] = []
+        self.messages = 0
+        self.unclustered = 0
+
+    def add(
+        self, message: str, timestamp: str | None = None, service: str | None = None
+    ) -> LogTemplate | None:
+        """Cluster one message. Returns its template, or None once max_templates is reached."""
+        self.messages += 1
+        raw_tokens = message.split()
+        tokens = [_NUM.sub(NUM_MASK, t) for t in raw_tokens]
+        numbers = [[float(n) for n in _NUM.findall(t)] for t in raw_tokens]
+
+        leaf = self._leaf(tokens)
+        template = self._best_match(leaf, tokens)
+        if template is None:
+            if len(self.templates) >= self.max_templates:
+                self.unclustered += 1
+                return None
+            template = LogTemplate(len(self.templates) + 1, list(tokens))
+            self.templates.append(template)
+            leaf.append(template)
+        else:
+            template.tokens = [
+                old if old == new else WILDCARD for old, new in zip(template.tokens, tokens)
+            ]
+        template.add(raw_tokens, numbers, message, timestamp, service)
+        return template
+
+    def summary(self, top: int | None = None) -> list[dict[str, Any]]:
+        """Templates by descending count (all, or the `top` most frequent)."""
+        ordered = sorted(self.templates, key=lambda t: -t.count)
+        return [t.as_dict() for t in (ordered if top is None else ordered[:top])]
+
+    # ── Parse tree ───────────────────────────────────────────────────────────
+
+    def _leaf(self, tokens: list[str]) -> list[LogTemplate]:
+        node = self._root.setdefault(len(tokens), {})
+        for token in tokens[: self.depth - 2]:
+            # Tokens carrying numbers are variable; keep them out of the routing
+            key = WILDCARD if NUM_MASK in token else token
+            if key not in node:
+                if len(node) >= self.max_children:
+                    key = WILDCARD
+                node = node.setdefault(key, {})
+            else:
+                node = node[key]
+        return node.setdefault("", [])
+
+    def _best_match(self, leaf: list[LogTemplate], tokens: list[str]) -> LogTemplate | None:
+        best: LogTemplate | None = None
+        best_rank = (-1.0, -1)
+        for template in leaf:
+            same = wildcards = 0
+            for old, new in zip(template.tokens, tokens):
+                if old == WILDCARD:
+                    wildcards += 1
+                elif old == new:
+                    same += 1
+            # Ties go to the more general template, as in Drain
+            rank = (same / len(tokens) if tokens else 1.0, wildcards)
+            if rank > best_rank:
+                best, best_rank = template, rank
+        best_score = best_rank[0]
+        return best if best is not None and best_score >= self.sim_threshold else None
+
+
+def _compact(value: float) -> float | int:
+    return int(value) if value.is_integer() else value
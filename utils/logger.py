@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import contextlib
 import contextvars
 from datetime import datetime
+from typing import Any, Callable, Iterator
 
 # ANSI color codes
 _RESET = "\033[0m"
@@ -10,6 +12,9 @@ _DIM = "\033[2m"
 
 _COLORS: dict[str, str] = {
     "ORCHESTRATOR": "\033[1;34m",   # bold blue
+    "ENGINE":       "\033[1;34m",   # bold blue
+    "LLM_CACHE":    "\033[2;37m",   # dim white
+    "TOOLS":        "\033[2;37m",   # dim white
     "IMPACT":       "\033[33m",     # yellow
     "SIMILAR":      "\033[33m",     # yellow
     "SUMMARIZER":   "\033[36m",     # cyan
@@ -23,27 +28,65 @@ _COLORS: dict[str, str] = {
 
 _NAME_WIDTH = 12
 
+
+def _color_for(name: str) -> str:
+    """The name's colour; sub-calls such as "RCA.CHANGES" take their agent's."""
+    return _COLORS.get(name) or _COLORS.get(name.split(".", 1)[0], "")
+
 # Web dashboard log capture — holds a list[dict] when a web request is active,
 # None in CLI mode. Each asyncio request context gets its own isolated copy.
 _log_sink: contextvars.ContextVar[list[dict] | None] = contextvars.ContextVar(
     "_log_sink", default=None
 )
 
+# Streaming event sink — a callable receiving (event, data) while a streaming
+# request is active, None otherwise. Log lines are forwarded as "log" events.
+_event_sink: contextvars.ContextVar[Callable[[str, dict[str, Any]], None] | None] = (
+    contextvars.ContextVar("_event_sink", default=None)
+)
+
+
+@contextlib.contextmanager
+def capture(
+    entries: list[dict] | None = None,
+    on_event: Callable[[str, dict[str, Any]], None] | None = None,
+) -> Iterator[None]:
+    """Collect log entries into `entries` and/or pass events to `on_event`
+    while the block runs. Tasks created inside inherit the capture."""
+    log_token = _log_sink.set(entries) if entries is not None else None
+    event_token = _event_sink.set(on_event) if on_event is not None else None
+    try:
+        yield
+    finally:
+        if event_token is not None:
+            _event_sink.reset(event_token)
+        if log_token is not None:
+            _log_sink.reset(log_token)
+
+
+def emit(event: str, data: dict[str, Any]) -> None:
+    """Publish a structured event to the active stream, if any."""
+    sink = _event_sink.get()
+    if sink is not None:
+        sink(event, data)
+
 
 def log(agent_name: str, message: str) -> None:
     now = datetime.now()
     timestamp = now.strftime("%H:%M:%S") + f".{now.microsecond // 1000:03d}"
-    color = _COLORS.get(agent_name.upper(), "")
+    color = _color_for(agent_name.upper())
     padded_name = agent_name.upper().ljust(_NAME_WIDTH)
 
     # CLI output — unchanged in all modes
     print(f"{_DIM}{timestamp}{_RESET}  │  {color}{padded_name}{_RESET}  │  {message}")
 
     # Web capture — no-op in CLI mode (sink is None)
+    entry = {
+        "timestamp": timestamp,
+        "agent": agent_name.upper(),
+        "message": message,
+    }
     sink = _log_sink.get()
     if sink is not None:
-        sink.append({
-            "timestamp": timestamp,
-            "agent": agent_name.upper(),
-            "message": message,
-        })
+        sink.append(entry)
+    emit("log", entry)
@@ -0,0 +1,211 @@
+"""Compact serialization of evidence embedded in agent prompts.
+
+Indented JSON spends a large share of prompt tokens on whitespace, and tool
+payloads repeat themselves: the same stack trace on every log line, the same
+HikariCP pool block with one counter changed. encode() keeps every value the
+agents reason over but writes it once:
+
+- no indentation or spaces after separators, and empty fields dropped,
+  except those a Pydantic model's schema declares: an explicit null there
+  ("no root cause yet") says more than a missing key. The legend notes
+  when fields were dropped, so an absent key reads as empty, not unknown;
+- long strings that occur more than once become "$S1", "$S2", ... and are
+  defined once in a legend line;
+- inside a list, a nested object that repeats the fields of the same object
+  in an earlier item is written as {"^": <earlier index>, <changed fields>}.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import math
+from collections import Counter
+from typing import AbstractSet, Any
+
+from pydantic import BaseModel
+
+# Rough chars-per-token ratio for English prose and JSON under Claude's tokenizer
+_CHARS_PER_TOKEN = 4
+
+# Shorter repeats cost less than the reference and legend entry that replace them
+_REF_MIN_CHARS = 40
+
+# A ditto must elide at least this many fields to be worth the "^" marker
+_DITTO_MIN_FIELDS = 2
+
+_EMPTY: tuple[Any, ...] = (None, "", [], {})
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count without a tokenizer round-trip."""
+    return math.ceil(len(text) / _CHARS_PER_TOKEN)
+
+
+def encode(obj: Any, keep: AbstractSet[str] = frozenset()) -> str:
+    """Compact, deduplicated JSON for a prompt, with a legend line if needed.
+
+    Fields named in `keep` are written even when null or empty.
+    """
+    dropped: set[str] = set()
+    data = _ditto(_prune(obj, keep, dropped))
+    repeated = Counter(s for s in _strings(data) if len(s) >= _REF_MIN_CHARS)
+    refs = {
+        text: f"$S{i}"
+        for i, text in enumerate((s for s, n in repeated.items() if n > 1), start=1)
+    }
+    if refs:
+        data = _substitute(data, refs)
+
+    out = json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+    notes = []
+    if dropped:
+        notes.append("fields left out are null or empty")
+    if refs:
+        table = json.dumps(
+            {ref: text for text, ref in refs.items()}, separators=(",", ":"), ensure_ascii=False
+        )
+        notes.append(f"strings {', '.join(refs.values())} are {table}")
+    if _has_ditto(data):
+        notes.append('{"^":N,...} repeats the fields of the same object in item N except those shown')
+    if notes:
+        out += "\n(" + "; ".join(notes) + ")"
+    return out
+
+
+class PromptEncoder:
+    """Encodes the evidence for one prompt and tallies the saving.
+
+    `before` is what the same values cost as indented JSON, the encoding the
+    agents used previously.
+
+    Usage:
+        enc = PromptEncoder()
+        prompt = f"METRICS:\\n{enc.encode(metrics)}"
+        enc.stats()   # {"before_tokens": ..., "after_tokens": ...}
+    """
+
+    def __init__(self) -> None:
+        self.before_chars = 0
+        self.after_chars = 0
+
+    def encode(self, obj: Any) -> str:
+        """Encode a JSON-able value or a Pydantic model (None encodes as null).
+
+        A model keeps the null and empty values of the fields its schema names.
+        """
+        keep: AbstractSet[str] = frozenset()
+        if isinstance(obj, BaseModel):
+            keep = _schema_fields(type(obj))
+            obj = obj.model_dump(mode="json")
+        text = encode(obj, keep)
+        self.before_chars += len(json.dumps(obj, indent=2, default=str))
+        self.after_chars += len(text)
+        return text
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "before_tokens": math.ceil(self.before_chars / _CHARS_PER_TOKEN),
+            "after_tokens": math.ceil(self.after_chars / _CHARS_PER_TOKEN),
+        }
+
+
+# ── Transforms ───────────────────────────────────────────────────────────────
+
+
+@functools.lru_cache(maxsize=None)
+def _schema_fields(model: type[BaseModel]) -> frozenset[str]:
+    """Every field name in the model's JSON schema, nested models included."""
+    names: set[str] = set()
+
+    def walk(node: Any) -> None:
+        if isinstance(node, dict):
+            names.update(node.get("properties", {}))
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(model.model_json_schema())
+    return frozenset(names)
+
+
+def _prune(obj: Any, keep: AbstractSet[str], dropped: set[str]) -> Any:
+    """Drop empty object fields not in `keep`, noting them in `dropped`.
+
+    List items are kept so indices stay stable.
+    """
+    if isinstance(obj, dict):
+        pruned = {}
+        for k, v in obj.items():
+            v = _prune(v, keep, dropped)
+            if v in _EMPTY and k not in keep:
+                dropped.add(k)
+            else:
+                pruned[k] = v
+        return pruned
+    if isinstance(obj, list):
+        return [_prune(v, keep, dropped) for v in obj]
+    return obj
+
+
+def _ditto(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        return {k: _ditto(v) for k, v in obj.items()}
+    if not isinstance(obj, list):
+        return obj
+
+    out: list[Any] = []
+    last_seen: dict[str, tuple[int, dict]] = {}
+    for i, item in enumerate(obj):
+        if not isinstance(item, dict):
+            out.append(_ditto(item))
+            continue
+        encoded = {}
+        for key, value in item.items():
+            prev = last_seen.get(key)
+            if isinstance(value, dict):
+                last_seen[key] = (i, value)
+            # Only when every earlier field is present, so none is implied wrongly
+            if (
+                prev is not None
+                and isinstance(value, dict)
+                and set(prev[1]) <= set(value)
+            ):
+                same = [f for f in prev[1] if prev[1][f] == value[f]]
+                if len(same) >= _DITTO_MIN_FIELDS:
+                    changed = {f: _ditto(v) for f, v in value.items() if f not in same}
+                    encoded[key] = {"^": prev[0], **changed}
+                    continue
+            encoded[key] = _ditto(value)
+        out.append(encoded)
+    return out
+
+
+def _strings(obj: Any) -> list[str]:
+    if isinstance(obj, str):
+        return [obj]
+    if isinstance(obj, dict):
+        return [s for v in obj.values() for s in _strings(v)]
+    if isinstance(obj, list):
+        return [s for v in obj for s in _strings(v)]
+    return []
+
+
+def _substitute(obj: Any, refs: dict[str, str]) -> Any:
+    if isinstance(obj, str):
+        return refs.get(obj, obj)
+    if isinstance(obj, dict):
+        return {k: _substitute(v, refs) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_substitute(v, refs) for v in obj]
+    return obj
+
+
+def _has_ditto(obj: Any) -> bool:
+    if isinstance(obj, dict):
+        return "^" in obj or any(_has_ditto(v) for v in obj.values())
+    if isinstance(obj, list):
+        return any(_has_ditto(v) for v in obj)
+    return False
@@ -0,0 +1,257 @@
+"""Process-wide LLM rate limiting.
+
+One RateLimiter is shared by every agent and incident using an LLM client.
+It meters requests, input tokens and output tokens per minute with token
+buckets, and hands out capacity in priority order — P1 incidents before P3 —
+so a storm of low-severity alerts cannot starve the incident that matters.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import math
+import random
+import time
+from collections import defaultdict, deque
+from typing import Any, Iterator
+
+# Priority of LLM calls made by the current task (lower is served first). Set
+# with priority_scope(), from the alert severity, before the agents launch.
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("_priority", default=3)
+
+SEVERITY_PRIORITY = {"P1": 1, "P2": 2, "P3": 3, "P4": 4}
+
+_WAIT_HISTORY = 500
+
+
+@contextlib.contextmanager
+def priority_scope(priority: int) -> Iterator[None]:
+    """Queue LLM calls made inside the block at `priority` (1 is served first).
+
+    Tasks created inside inherit the scope, as with deadline.scope().
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def backoff_delay(
+    attempt: int,
+    retry_after: float | None = None,
+    base: float = 1.0,
+    cap: float = 30.0,
+) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's retry-after."""
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after is not None:
+        # Small jitter on top so throttled callers do not return in lockstep
+        delay = max(delay, retry_after * random.uniform(1.0, 1.1))
+    return delay
+
+
+class _Bucket:
+    """Token bucket refilled continuously at `per_minute`, holding at most a minute's worth."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until `amount` is available (amounts above capacity wait for a full bucket)."""
+        missing = min(amount, self.capacity) - self.level
+        return 0.0 if missing <= 0 else missing / self.rate
+
+
+class Reservation:
+    """Capacity granted to one request; settle it with the real token usage."""
+
+    __slots__ = ("input_tokens", "output_tokens", "waited")
+
+    def __init__(self, input_tokens: int, output_tokens: int, waited: float) -> None:
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.waited = waited
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "throttled")
+
+    def __init__(self, priority: int, seq: int) -> None:
+        self.priority = priority
+        self.seq = seq
+        self.throttled = False
+
+    def __lt__(self, other: _Waiter) -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class RateLimiter:
+    """Requests/min plus input and output tokens/min, granted in priority order.
+
+    Output tokens are unknown until a reply arrives, so acquire() reserves an
+    estimate and settle() books the difference once usage is known. A limit
+    of None leaves that dimension unmetered.
+
+    Usage:
+        limiter = RateLimiter(requests_per_min=50, input_tokens_per_min=40_000)
+        res = await limiter.acquire(input_tokens=1200, output_tokens=800)
+        ...                                    # make the request
+        limiter.settle(res, input_tokens=1180, output_tokens=655)
+    """
+
+    def __init__(
+        self,
+        requests_per_min: float | None = 50,
+        input_tokens_per_min: float | None = 40_000,
+        output_tokens_per_min: float | None = 8_000,
+    ) -> None:
+        self._requests = _Bucket(requests_per_min) if requests_per_min else None
+        self._input = _Bucket(input_tokens_per_min) if input_tokens_per_min else None
+        self._output = _Bucket(output_tokens_per_min) if output_tokens_per_min else None
+        self._queue: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._changed: asyncio.Event | None = None
+        self._paused_until = 0.0
+        self.granted = 0
+        self.throttled = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self._waits: deque[float] = deque(maxlen=_WAIT_HISTORY)
+        self._waits_by_priority: dict[int, deque[float]] = defaultdict(
+            lambda: deque(maxlen=_WAIT_HISTORY)
+        )
+
+    # ── Capacity ─────────────────────────────────────────────────────────────
+
+    async def acquire(
+        self, input_tokens: int, output_tokens: int, priority: int | None = None
+    ) -> Reservation:
+        """Wait for capacity. Callers queue by priority (default: the task's _priority)."""
+        waiter = _Waiter(_priority.get() if priority is None else priority, next(self._seq))
+        heapq.heappush(self._queue, waiter)
+        start = time.monotonic()
+        try:
+            while True:
+                delay: float | None = None
+                if self._queue[0] is waiter:
+                    delay = self._delay(input_tokens, output_tokens)
+                    if delay <= 0:
+                        heapq.heappop(self._queue)
+                        self._take(input_tokens, output_tokens)
+                        break
+                    if not waiter.throttled:
+                        waiter.throttled = True
+                        self.throttled += 1
+                await self._wait_for_change(delay)
+        except BaseException:
+            if waiter in self._queue:
+                self._queue.remove(waiter)
+                heapq.heapify(self._queue)
+            raise
+        finally:
+            self._notify()
+
+        waited = time.monotonic() - start
+        self.granted += 1
+        self._waits.append(waited)
+        self._waits_by_priority[waiter.priority].append(waited)
+        return Reservation(input_tokens, output_tokens, waited)
+
+    def settle(self, reservation: Reservation, input_tokens: int, output_tokens: int) -> None:
+        """Book actual usage against the buckets in place of the reserved estimate."""
+        now = time.monotonic()
+        for bucket, actual, reserved in (
+            (self._input, input_tokens, reservation.input_tokens),
+            (self._output, output_tokens, reservation.output_tokens),
+        ):
+            if bucket is None:
+                continue
+            bucket.refill(now)
+            # May go negative: an under-estimate is paid back before the next grant
+            bucket.level = min(bucket.capacity, bucket.level - (actual - reserved))
+        self._notify()
+
+    def release(self, reservation: Reservation) -> None:
+        """Return the token estimate of a request the server rejected."""
+        self.settle(reservation, 0, 0)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller back, e.g. after the server answered 429 with retry-after."""
+        self.rate_limited += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._notify()
+
+    # ── Metrics ──────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queue_depth": len(self._queue),
+            "granted": self.granted,
+            "throttled": self.throttled,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "wait_p50_s": _percentile(self._waits, 0.5),
+            "wait_p95_s": _percentile(self._waits, 0.95),
+            "wait_p95_by_priority_s": {
+                f"P{p}": _percentile(waits, 0.95)
+                for p, waits in sorted(self._waits_by_priority.items())
+            },
+        }
+
+    # ── Internals ────────────────────────────────────────────────────────────
+
+    def _metered(self, input_tokens: int, output_tokens: int) -> list[tuple[_Bucket, int]]:
+        return [
+            (bucket, amount)
+            for bucket, amount in (
+                (self._requests, 1),
+                (self._input, input_tokens),
+                (self._output, output_tokens),
+            )
+            if bucket is not None
+        ]
+
+    def _delay(self, input_tokens: int, output_tokens: int) -> float:
+        now = time.monotonic()
+        delay = self._paused_until - now
+        for bucket, amount in self._metered(input_tokens, output_tokens):
+            bucket.refill(now)
+            delay = max(delay, bucket.wait_for(amount))
+        return delay
+
+    def _take(self, input_tokens: int, output_tokens: int) -> None:
+        for bucket, amount in self._metered(input_tokens, output_tokens):
+            bucket.level -= amount
+
+    async def _wait_for_change(self, timeout: float | None) -> None:
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _notify(self) -> None:
+        # Wake every waiter so the (possibly new) head re-checks capacity
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+
+
+def _percentile(samples: deque[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return round(ordered[max(math.ceil(q * len(ordered)) - 1, 0)], 3)
@@ -0,0 +1,197 @@
+"""Service dependency graph learned from distributed traces.
+
+Every parent → child span pair whose services differ is a call from the
+parent's service to the child's. ServiceGraph accumulates those edges as
+traces arrive (a trace among the last `max_seen_traces` seen is skipped, so
+feeding it the same traces twice changes nothing) and answers two questions
+about any set of services:
+
+    upstream     who calls them, directly or transitively — the services a
+                 failure there spreads to: the blast radius
+    downstream   what they call, directly or transitively — the dependencies
+                 a root cause may sit in
+
+Each service's traversal is a breadth-first search memoized until the graph
+next gains an edge, so repeated queries during an incident cost one dict
+merge per service, whatever the size of the topology. Ownership (PagerDuty's
+owning_team) can be attached to group the blast radius by team.
+
+Usage:
+    graph = ServiceGraph()
+    graph.add_traces(traces)
+    graph.blast_radius(["inventory-service"])    # {"inventory-service": 0, "order-service": 1, ...}
+    graph.dependencies(["order-service"])        # {"order-service": 0, "inventory-service": 1, ...}
+"""
+
+from __future__ import annotations
+
+from collections import Counter, OrderedDict, deque
+from typing import Any, Iterable, Mapping
+
+
+class ServiceGraph:
+    """Caller → callee edges between services, with memoized reachability."""
+
+    def __init__(self, max_seen_traces: int = 100_000) -> None:
+        self._callees: dict[str, set[str]] = {}
+        self._callers: dict[str, set[str]] = {}
+        self.calls: Counter[tuple[str, str]] = Counter()
+        self.errors: Counter[tuple[str, str]] = Counter()
+        self.owners: dict[str, str] = {}
+        # Recently added trace ids, oldest first; bounded, since the process
+        # graph outlives every incident
+        self.max_seen_traces = max_seen_traces
+        self._seen_traces: OrderedDict[str, None] = OrderedDict()
+        # service → {reachable service: hops}, per direction; cleared on new edges
+        self._upstream: dict[str, dict[str, int]] = {}
+        self._downstream: dict[str, dict[str, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._callees.keys() | self._callers.keys())
+
+    def __contains__(self, service: object) -> bool:
+        return service in self._callees or service in self._callers
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.calls)
+
+    # ── Updates ──────────────────────────────────────────────────────────────
+
+    def add_traces(self, traces: Iterable[dict[str, Any]]) -> int:
+        """Add each trace's calls. Returns how many new edges appeared."""
+        return sum(self.add_trace(trace) for trace in traces)
+
+    def add_trace(self, trace: dict[str, Any]) -> int:
+        """Add one trace's calls (a recently seen trace id is ignored). Returns new edges."""
+        trace_id = trace.get("trace_id")
+        if trace_id is not None:
+            if trace_id in self._seen_traces:
+                self._seen_traces.move_to_end(trace_id)
+                return 0
+            self._seen_traces[trace_id] = None
+            if len(self._seen_traces) > self.max_seen_traces:
+                self._seen_traces.popitem(last=False)
+        spans = trace.get("spans", [])
+        service_of = {span["span_id"]: span.get("service", "unknown") for span in spans}
+        new_edges = 0
+        for span in spans:
+            caller = service_of.get(span.get("parent_span_id"))
+            callee = service_of[span["span_id"]]
+            if caller is None or caller == callee:
+                continue
+            new_edges += self.add_call(caller, callee, failed=span.get("status") == "ERROR")
+        return new_edges
+
+    def add_call(self, caller: str, callee: str, failed: bool = False) -> bool:
+        """Record one call. Returns True if the edge is new."""
+        edge = (caller, callee)
+        is_new = edge not in self.calls
+        self.calls[edge] += 1
+        if failed:
+            self.errors[edge] += 1
+        if is_new:
+            self._callees.setdefault(caller, set()).add(callee)
+            self._callers.setdefault(callee, set()).add(caller)
+            self._upstream.clear()
+            self._downstream.clear()
+        return is_new
+
+    def add_ownership(self, ownership: Mapping[str, dict[str, Any]]) -> None:
+        """Attach owning teams from PagerDuty's get_service_ownership result."""
+        for service, meta in ownership.items():
+            team = meta.get("owning_team")
+            if team:
+                self.owners[service] = team
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    def callers(self, service: str) -> set[str]:
+        return set(self._callers.get(service, ()))
+
+    def callees(self, service: str) -> set[str]:
+        return set(self._callees.get(service, ()))
+
+    def upstream(self, service: str) -> dict[str, int]:
+        """Every service that reaches `service` through calls, with its hop count (itself at 0)."""
+        return self._reach(service, self._callers, self._upstream)
+
+    def downstream(self, service: str) -> dict[str, int]:
+        """Every service `service` reaches through calls, with its hop count (itself at 0)."""
+        return self._reach(service, self._callees, self._downstream)
+
+    def blast_radius(self, services: Iterable[str]) -> dict[str, int]:
+        """`services` and everything upstream of them, each at its fewest hops from the set."""
+        return _nearest(self.upstream(service) for service in services)
+
+    def dependencies(self, services: Iterable[str]) -> dict[str, int]:
+        """`services` and everything downstream of them, each at its fewest hops from the set."""
+        return _nearest(self.downstream(service) for service in services)
+
+    def summary(self, services: Iterable[str]) -> dict[str, Any]:
+        """Blast radius and dependencies of `services`, sized for a prompt."""
+        services = list(dict.fromkeys(services))
+        radius = self.blast_radius(services)
+        deps = self.dependencies(services)
+        by_hops: dict[int, list[str]] = {}
+        for service, hops in radius.items():
+            by_hops.setdefault(hops, []).append(service)
+        by_team: dict[str, list[str]] = {}
+        for service in radius:
+            by_team.setdefault(self.owners.get(service, "unknown"), []).append(service)
+        edges = [
+            (caller, callee)
+            for caller in radius
+            for callee in sorted(self._callees.get(caller, ()))
+            if callee in radius
+        ]
+        return {
+            "graph": {"services": len(self), "edges": self.edge_count},
+            "blast_radius": list(radius),
+            "blast_radius_by_hops": {hops: by_hops[hops] for hops in sorted(by_hops)},
+            "blast_radius_by_team": by_team,
+            "dependencies_outside_radius": [s for s in deps if s not in radius],
+            "failing_calls": [
+                {
+                    "call": f"{caller} → {callee}",
+                    "calls": self.calls[(caller, callee)],
+                    "errors": self.errors[(caller, callee)],
+                }
+                for caller, callee in edges
+                if self.errors[(caller, callee)]
+            ],
+        }
+
+    @staticmethod
+    def _reach(
+        service: str, neighbours: dict[str, set[str]], memo: dict[str, dict[str, int]]
+    ) -> dict[str, int]:
+        found = memo.get(service)
+        if found is None:
+            found = {service: 0}
+            queue = deque([service])
+            while queue:
+                current = queue.popleft()
+                hops = found[current] + 1
+                for nxt in sorted(neighbours.get(current, ())):
+                    if nxt not in found:
+                        found[nxt] = hops
+                        queue.append(nxt)
+            memo[service] = found
+        return found
+
+
+def _nearest(reaches: Iterable[dict[str, int]]) -> dict[str, int]:
+    """Merge per-service reachability, keeping each service's fewest hops;
+    ordered nearest first, then by name."""
+    merged: dict[str, int] = {}
+    for reach in reaches:
+        for service, hops in reach.items():
+            if hops < merged.get(service, hops + 1):
+                merged[service] = hops
+    return dict(sorted(merged.items(), key=lambda item: (item[1], item[0])))
+
+
+# Shared by every agent in the process: each incident's traces extend the
+# topology the next one sees
+process_service_graph = ServiceGraph()
@@ -0,0 +1,289 @@
+"""Known failure signatures, matched deterministically before any LLM call.
+
+Some root causes are mechanical to spot: a change request that shrank a
+connection pool, followed by pool-timeout exceptions and a saturated pool on
+the same service, is the same story every time. Each Signature names the
+exception classes, the config_change parameter (and the direction it moved)
+and, optionally, the pool state that together identify one such failure.
+match_signatures() checks every change request in the window against the
+library in milliseconds, and provisional_rca() turns the matches into an
+RCAOutput-shaped dict the bridge can act on while the LLM is still working.
+
+Usage:
+    matches = match_signatures(logs, change_requests)
+    provisional = provisional_rca(matches)   # None when nothing matched
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Iterable
+
+from utils.log_aggregation import ErrorLogAggregator
+
+# CRs deployed longer than this before onset match with reduced confidence
+_RECENT_HOURS = 3.0
+
+
+class Signature:
+    """One known failure: a config change plus the symptoms it produces.
+
+    `direction` is "decrease", "increase" or None (any change). With
+    `pool_saturated`, the CR's service must show a connection pool running at
+    its maximum with threads waiting; without that evidence the match is kept
+    at lower confidence.
+    """
+
+    __slots__ = (
+        "name", "exceptions", "parameter", "direction", "pool_saturated",
+        "cause", "remediation", "confidence_pct",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        exceptions: str,
+        parameter: str,
+        cause: str,
+        remediation: list[str],
+        direction: str | None = "decrease",
+        pool_saturated: bool = False,
+        confidence_pct: int = 70,
+    ) -> None:
+        self.name = name
+        self.exceptions = re.compile(exceptions)
+        self.parameter = re.compile(parameter, re.IGNORECASE)
+        self.direction = direction
+        self.pool_saturated = pool_saturated
+        self.cause = cause
+        self.remediation = remediation
+        self.confidence_pct = confidence_pct
+
+
+SIGNATURES: list[Signature] = [
+    Signature(
+        "connection-pool-shrunk",
+        exceptions=r"HikariPool\$(Pool|Connection)Timeout|SQLTransientConnectionException",
+        parameter=r"max(imum)?[-_.]?pool[-_.]?size|max[-_.]?connections",
+        direction="decrease",
+        pool_saturated=True,
+        confidence_pct=85,
+        cause="the smaller pool saturates under load, so requests time out waiting for a connection",
+        remediation=[
+            "Roll back {cr_id}: restore {parameter} to {old_value} on {service}",
+            "Watch {service} pool active/pending connections and the error rate recover",
+            "Load-test pool sizing at peak traffic before re-applying the change",
+        ],
+    ),
+    Signature(
+        "timeout-lowered",
+        exceptions=r"Timeout",
+        parameter=r"timeout",
+        direction="decrease",
+        cause="calls that used to complete now exceed the shortened timeout",
+        remediation=[
+            "Roll back {cr_id}: restore {parameter} to {old_value} on {service}",
+            "Compare {service} call latency percentiles with the new timeout before re-applying",
+        ],
+    ),
+    Signature(
+        "thread-pool-shrunk",
+        exceptions=r"RejectedExecutionException",
+        parameter=r"thread|executor|worker",
+        direction="decrease",
+        cause="the smaller executor fills up and rejects work under load",
+        remediation=[
+            "Roll back {cr_id}: restore {parameter} to {old_value} on {service}",
+            "Check {service} executor queue depth at peak before re-applying",
+        ],
+    ),
+    Signature(
+        "memory-limit-lowered",
+        exceptions=r"OutOfMemoryError",
+        parameter=r"memory|heap|xmx",
+        direction="decrease",
+        confidence_pct=75,
+        cause="the service no longer fits its working set in the reduced memory limit",
+        remediation=[
+            "Roll back {cr_id}: restore {parameter} to {old_value} on {service}",
+            "Review {service} heap usage at peak before re-applying",
+        ],
+    ),
+    Signature(
+        "breaker-threshold-lowered",
+        exceptions=r"CallNotPermittedException",
+        parameter=r"circuit|failure[-_.]?rate",
+        direction="decrease",
+        confidence_pct=60,
+        cause="the circuit breaker now opens on failure rates it used to tolerate",
+        remediation=[
+            "Roll back {cr_id}: restore {parameter} to {old_value} on {service}",
+        ],
+    ),
+]
+
+
+class SignatureMatch:
+    """A change request matched to a signature, with the evidence found."""
+
+    __slots__ = ("signature", "cr", "confidence_pct", "evidence")
+
+    def __init__(
+        self, signature: Signature, cr: dict[str, Any], confidence_pct: int, evidence: list[str]
+    ) -> None:
+        self.signature = signature
+        self.cr = cr
+        self.confidence_pct = confidence_pct
+        self.evidence = evidence
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "signature": self.signature.name,
+            "cr_id": self.cr["cr_id"],
+            "service": self.cr["service"],
+            "confidence_pct": self.confidence_pct,
+            "evidence": self.evidence,
+        }
+
+
+def match_signatures(
+    logs: ErrorLogAggregator,
+    change_requests: Iterable[dict[str, Any]],
+    signatures: Iterable[Signature] = SIGNATURES,
+) -> list[SignatureMatch]:
+    """Every (signature, CR) pair whose config change and symptoms line up,
+    most confident first."""
+    signatures = list(signatures)
+    matches = []
+    for cr in change_requests:
+        change = cr.get("config_change")
+        if not change:
+            continue
+        for signature in signatures:
+            match = _match(signature, cr, change, logs)
+            if match is not None:
+                matches.append(match)
+    matches.sort(key=lambda m: (-m.confidence_pct, m.cr["cr_id"], m.signature.name))
+    return matches
+
+
+def _match(
+    signature: Signature, cr: dict[str, Any], change: dict[str, Any], logs: ErrorLogAggregator
+) -> SignatureMatch | None:
+    parameter = change.get("parameter", "")
+    if not signature.parameter.search(parameter):
+        return None
+    old, new = _number(change.get("old_value")), _number(change.get("new_value"))
+    if signature.direction is not None:
+        if old is None or new is None:
+            return None
+        if (new < old) != (signature.direction == "decrease") or new == old:
+            return None
+    hits = {
+        exc: count for exc, count in logs.exception_counts.items() if signature.exceptions.search(exc)
+    }
+    if not hits:
+        return None
+
+    service = cr["service"]
+    confidence = signature.confidence_pct
+    evidence = [
+        f"{cr['cr_id']} changed {parameter} {change.get('old_value')} → {change.get('new_value')} "
+        f"on {service}",
+        "logs: " + ", ".join(f"{exc.rsplit('.', 1)[-1]} ×{count}" for exc, count in hits.items()),
+    ]
+    if logs.service_counts.get(service):
+        evidence.append(f"{service} logged {logs.service_counts[service]} errors")
+    else:
+        confidence -= 20
+
+    if signature.pool_saturated:
+        saturated = [
+            (name, pool)
+            for name, pool in logs.pools().items()
+            if name.startswith(f"{service}/")
+            and pool["max_pool_size"] is not None
+            and pool["max_active_connections"] >= pool["max_pool_size"]
+            and pool["max_pending_threads"] > 0
+        ]
+        if saturated:
+            name, pool = saturated[0]
+            evidence.append(
+                f"{name} saturated: active={pool['max_active_connections']}/"
+                f"max={pool['max_pool_size']}, pending_threads={pool['max_pending_threads']}"
+            )
+            if new is not None and pool["max_pool_size"] == new:
+                confidence += 10
+                evidence.append(f"pool max in the logs equals the CR's new value ({change.get('new_value')})")
+        else:
+            confidence -= 20
+
+    hours = cr.get("hours_before_onset")
+    if hours is not None:
+        if hours <= _RECENT_HOURS:
+            evidence.append(f"deployed {hours}h before onset")
+        else:
+            confidence -= 15
+    return SignatureMatch(signature, cr, max(min(confidence, 99), 1), evidence)
+
+
+def provisional_rca(matches: list[SignatureMatch]) -> dict[str, Any] | None:
+    """An RCAOutput-shaped dict built from the matches, or None if there are none.
+
+    Each CR appears once, under its most confident signature.
+    """
+    best: dict[str, SignatureMatch] = {}
+    for match in matches:
+        best.setdefault(match.cr["cr_id"], match)
+    if not best:
+        return None
+    ranked = list(best.values())[:3]
+    top = ranked[0]
+    change = top.cr["config_change"]
+    fields = {
+        "cr_id": top.cr["cr_id"],
+        "service": top.cr["service"],
+        "parameter": change.get("parameter"),
+        "old_value": change.get("old_value"),
+        "new_value": change.get("new_value"),
+    }
+    return {
+        "probable_root_causes": [
+            {
+                "rank": rank,
+                "cause": f"{m.evidence[0]} — {m.signature.cause}",
+                "evidence": "; ".join(m.evidence[1:]),
+                "confidence_pct": m.confidence_pct,
+            }
+            for rank, m in enumerate(ranked, 1)
+        ],
+        "correlated_change_requests": [
+            {
+                "cr_id": m.cr["cr_id"],
+                "service": m.cr["service"],
+                "deployed_at": m.cr.get("deployed_at"),
+                "deployed_by": m.cr.get("deployed_by"),
+                "description": m.cr.get("title", ""),
+            }
+            for m in ranked
+        ],
+        "recommended_resolution": top.cr.get("rollback_plan")
+        or f"Roll back {top.cr['cr_id']}",
+        "rollback_candidate": top.cr["cr_id"],
+        "remediation_steps": [step.format(**fields) for step in top.signature.remediation],
+        "evidence_trail": [
+            {
+                "source": "servicenow_crs",
+                "query_or_action": f"signature {m.signature.name}",
+                "finding": " | ".join(m.evidence),
+            }
+            for m in ranked
+        ],
+    }
+
+
+def _number(value: Any) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
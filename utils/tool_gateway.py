@@ -0,0 +1,216 @@
+"""Memoizing gateway in front of the tool backends.
+
+Agents reach Dynatrace, Splunk, ServiceNow and PagerDuty through the `tools`
+dict. ToolGateway stands in for that dict: `tools["splunk"].query_error_logs(
+services)` looks the same to an agent, but results are memoized by (tool,
+function, normalized arguments) with a per-function TTL in a bounded LRU, and
+concurrent identical calls share one upstream request.
+
+Results are shared, not copied: every caller of the same call gets the same
+object, so callers must treat tool results as read-only.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Iterator, Mapping
+from typing import Any, Awaitable, Callable
+
+from utils.logger import log
+
+# Seconds a result stays fresh. Live telemetry goes stale quickly; ownership
+# and incident history barely change during an incident.
+DEFAULT_TTLS: dict[str, float] = {
+    "dynatrace.get_service_metrics": 30.0,
+    "dynatrace.get_distributed_traces": 30.0,
+    "splunk.query_error_logs": 30.0,
+    "servicenow.get_active_change_requests": 120.0,
+    "servicenow.search_past_incidents": 600.0,
+    "pagerduty.get_oncall_roster": 300.0,
+    "pagerduty.get_service_ownership": 600.0,
+}
+
+
+def normalize_args(args: tuple[Any, ...], kwargs: dict[str, Any]) -> str:
+    """Canonical form of a call's arguments.
+
+    Lists of strings (service names, keywords) are treated as sets — order
+    and duplicates do not change what a backend returns for them.
+    """
+    return json.dumps([_normalize(args), _normalize(kwargs)], sort_keys=True, default=str)
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        if all(isinstance(v, str) for v in value):
+            return sorted(set(value))
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    return value
+
+
+class _ToolStats:
+    __slots__ = ("hits", "misses", "shared", "expirations", "evictions", "errors")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        lookups = self.hits + self.shared + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self.shared,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            "hit_rate": round((self.hits + self.shared) / lookups, 3) if lookups else 0.0,
+        }
+
+
+class _GatewayTool:
+    """One backend as seen through the gateway; attributes mirror the module."""
+
+    def __init__(self, gateway: ToolGateway, name: str, backend: Any) -> None:
+        self._gateway = gateway
+        self._name = name
+        self._backend = backend
+
+    def __getattr__(self, attr: str) -> Any:
+        target = getattr(self._backend, attr)
+        if not inspect.iscoroutinefunction(target):
+            return target
+
+        @functools.wraps(target)
+        def call(*args: Any, **kwargs: Any) -> Awaitable[Any]:
+            return self._gateway._call(f"{self._name}.{attr}", target, args, kwargs)
+
+        return call
+
+
+class ToolGateway(Mapping[str, Any]):
+    """Drop-in replacement for the tools dict with memoization and coalescing.
+
+    Results are never cached when the call raises. At most `max_entries`
+    results are kept, least recently used evicted first, and expired ones are
+    dropped whenever a call completes. Callers share the cached object and
+    must not mutate it.
+
+    Usage:
+        tools = ToolGateway({"splunk": mock_splunk, ...}, ttls={"splunk.query_error_logs": 10})
+        await tools["splunk"].query_error_logs(["inventory-service"])
+        tools.stats()   # {"splunk.query_error_logs": {"hits": ..., "misses": ...}, ...}
+    """
+
+    def __init__(
+        self,
+        tools: Mapping[str, Any],
+        ttls: dict[str, float] | None = None,
+        default_ttl_seconds: float = 30.0,
+        max_entries: int = 1024,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self._backends = dict(tools)
+        self._tools = {name: _GatewayTool(self, name, mod) for name, mod in tools.items()}
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl_seconds = default_ttl_seconds
+        self.max_entries = max_entries
+        self._results: OrderedDict[tuple[str, str], tuple[float, Any]] = OrderedDict()
+        self._in_flight: dict[tuple[str, str], asyncio.Task[Any]] = {}
+        self._stats: dict[str, _ToolStats] = {}
+
+    # ── Mapping ──────────────────────────────────────────────────────────────
+
+    def __getitem__(self, name: str) -> Any:
+        return self._tools[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tools)
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    # ── Calls ────────────────────────────────────────────────────────────────
+
+    async def _call(
+        self,
+        qualname: str,
+        target: Callable[..., Awaitable[Any]],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> Any:
+        stats = self._stats.setdefault(qualname, _ToolStats())
+        key = (qualname, normalize_args(args, kwargs))
+
+        cached = self._results.get(key)
+        if cached is not None:
+            expires_at, value = cached
+            if time.monotonic() < expires_at:
+                stats.hits += 1
+                self._results.move_to_end(key)
+                log("TOOLS", f"↺ {qualname} served from cache")
+                return value
+            del self._results[key]
+            stats.expirations += 1
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            stats.shared += 1
+            log("TOOLS", f"↺ {qualname} joined in-flight call")
+        else:
+            stats.misses += 1
+            # Its own task, so a caller hitting its deadline does not cancel
+            # the request for everyone sharing it
+            task = asyncio.create_task(target(*args, **kwargs))
+            self._in_flight[key] = task
+            task.add_done_callback(functools.partial(self._finished, key, stats))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: tuple[str, str], stats: _ToolStats, task: asyncio.Task[Any]) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            stats.errors += 1
+            return
+        now = time.monotonic()
+        self._expire(now)
+        ttl = self.ttls.get(key[0], self.default_ttl_seconds)
+        if ttl > 0:
+            self._results[key] = (now + ttl, task.result())
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                (evicted, _), _ = self._results.popitem(last=False)
+                self._stats.setdefault(evicted, _ToolStats()).evictions += 1
+
+    def _expire(self, now: float) -> None:
+        doomed = [key for key, (expires_at, _) in self._results.items() if expires_at <= now]
+        for key in doomed:
+            del self._results[key]
+            self._stats.setdefault(key[0], _ToolStats()).expirations += 1
+
+    def invalidate(self, qualname: str | None = None) -> int:
+        """Drop cached results for one "tool.function", or all. Returns entries removed."""
+        doomed = [key for key in self._results if qualname is None or key[0] == qualname]
+        for key in doomed:
+            del self._results[key]
+        return len(doomed)
+
+    # ── Metrics ──────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Hit/miss counts per "tool.function"."""
+        return {name: stats.as_dict() for name, stats in sorted(self._stats.items())}
@@ -0,0 +1,271 @@
+"""Distributed-trace processing: span trees, critical paths and a span index.
+
+TraceIndex ingests traces as Dynatrace returns them, links each trace's spans
+into a tree, and computes per span its self time (duration not covered by
+children) and the trace's critical path — the chain of spans that actually
+determined the end-to-end latency. Spans are indexed by service and by
+string-valued tag, and the slowest are kept per service, so thousands of
+traces reduce to a summary whose size depends on the number of services.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+from collections import Counter, defaultdict
+from typing import Any, Iterable
+
+# Slowest spans remembered per service
+_SLOWEST_PER_SERVICE = 5
+
+# Critical paths of the slowest traces included in the summary
+_PATHS_IN_SUMMARY = 3
+
+# Matching spans shown per tag lookup in the summary
+_FLAGGED_IN_SUMMARY = 5
+
+
+class Span:
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "service", "operation", "start_ms",
+        "duration_ms", "status", "tags", "error", "children", "self_ms",
+    )
+
+    def __init__(self, trace_id: str, raw: dict[str, Any]) -> None:
+        self.trace_id = trace_id
+        self.span_id: str = raw["span_id"]
+        self.parent_id: str | None = raw.get("parent_span_id")
+        self.service: str = raw.get("service", "unknown")
+        self.operation: str = raw.get("operation", "")
+        # Spans without an offset are taken to start with their trace
+        self.start_ms: float = raw.get("start_offset_ms", 0)
+        self.duration_ms: float = raw.get("duration_ms", 0)
+        self.status: str = raw.get("status", "OK")
+        self.tags: dict[str, Any] = raw.get("tags", {})
+        self.error: str | None = raw.get("error")
+        self.children: list[Span] = []
+        self.self_ms: float = self.duration_ms
+
+    @property
+    def end_ms(self) -> float:
+        return self.start_ms + self.duration_ms
+
+    def label(self) -> str:
+        return f"{self.service}:{self.operation}" if self.operation else self.service
+
+    def brief(self) -> dict[str, Any]:
+        out: dict[str, Any] = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "service": self.service,
+            "operation": self.operation,
+            "duration_ms": self.duration_ms,
+            "self_ms": self.self_ms,
+            "status": self.status,
+        }
+        if self.tags:
+            out["tags"] = self.tags
+        if self.error:
+            out["error"] = self.error
+        return out
+
+
+class Trace:
+    """One trace's span tree with its critical path."""
+
+    def __init__(self, raw: dict[str, Any]) -> None:
+        self.trace_id: str = raw["trace_id"]
+        self.endpoint: str = raw.get("endpoint", "")
+        self.status: str = raw.get("status", "OK")
+        self.duration_ms: float = raw.get("total_duration_ms", 0)
+        self.spans = [Span(self.trace_id, s) for s in raw.get("spans", [])]
+
+        by_id = {span.span_id: span for span in self.spans}
+        self.roots: list[Span] = []
+        for span in self.spans:
+            parent = by_id.get(span.parent_id) if span.parent_id else None
+            # A span whose parent was not sampled is treated as a root
+            (parent.children if parent is not None else self.roots).append(span)
+        for span in self.spans:
+            span.self_ms = span.duration_ms - _covered(span, span.children)
+
+        self.critical_path: list[tuple[Span, float]] = []
+        if self.roots:
+            root = max(self.roots, key=lambda s: s.end_ms)
+            self.critical_path = _merge(_critical_segments(root, root.end_ms))
+
+    def path_summary(self) -> str:
+        """e.g. "api-gateway:POST /checkout 25ms → inventory-service:reserveStock 18370ms"."""
+        return " → ".join(f"{span.label()} {ms:.0f}ms" for span, ms in self.critical_path)
+
+
+class TraceIndex:
+    """Span trees for many traces, indexed by service, tag and duration.
+
+    Usage:
+        index = TraceIndex()
+        index.add_all(traces)
+        index.find_by_tag("hikaricp.pool_status", "pool_exhausted")
+        index.summary()
+    """
+
+    def __init__(self) -> None:
+        self.traces = 0
+        self.trace_status: Counter[str] = Counter()
+        self._by_service: dict[str, list[Span]] = defaultdict(list)
+        self._by_tag: dict[tuple[str, str], list[Span]] = defaultdict(list)
+        self._slowest: dict[str, list[tuple[float, int, Span]]] = defaultdict(list)
+        self._self_ms: Counter[str] = Counter()
+        self._critical_ms: Counter[str] = Counter()
+        self._errors: Counter[str] = Counter()
+        self._slowest_traces: list[tuple[float, int, Trace]] = []
+        self._seq = itertools.count()
+
+    def add_all(self, traces: Iterable[dict[str, Any]]) -> None:
+        for raw in traces:
+            self.add(raw)
+
+    def add(self, raw: dict[str, Any]) -> Trace:
+        trace = Trace(raw)
+        self.traces += 1
+        self.trace_status[trace.status] += 1
+        for span in trace.spans:
+            self._by_service[span.service].append(span)
+            self._self_ms[span.service] += span.self_ms
+            if span.status not in ("OK", "SKIPPED"):
+                self._errors[span.service] += 1
+            for tag, value in span.tags.items():
+                if isinstance(value, str):
+                    self._by_tag[(tag, value)].append(span)
+            _keep_top(
+                self._slowest[span.service],
+                span.duration_ms,
+                next(self._seq),
+                span,
+                _SLOWEST_PER_SERVICE,
+            )
+        for span, ms in trace.critical_path:
+            self._critical_ms[span.service] += ms
+        if trace.critical_path:
+            _keep_top(
+                self._slowest_traces, trace.duration_ms, next(self._seq), trace, _PATHS_IN_SUMMARY
+            )
+        return trace
+
+    # ── Lookups ──────────────────────────────────────────────────────────────
+
+    def find_by_tag(self, tag: str, value: str) -> list[Span]:
+        return list(self._by_tag.get((tag, value), ()))
+
+    def spans_for(self, service: str) -> list[Span]:
+        return list(self._by_service.get(service, ()))
+
+    def slowest(self, service: str) -> list[Span]:
+        return [span for _, _, span in sorted(self._slowest.get(service, ()), reverse=True)]
+
+    def services(self) -> list[str]:
+        return sorted(self._by_service)
+
+    # ── Summary ──────────────────────────────────────────────────────────────
+
+    def summary(self, flag_tags: Iterable[tuple[str, str]] = ()) -> dict[str, Any]:
+        """Per-service critical-path and self time, the slowest traces' paths,
+        and spans matching each (tag, value) in flag_tags."""
+        critical_total = sum(self._critical_ms.values()) or 1.0
+        per_service = {}
+        for service in sorted(self._by_service, key=lambda s: -self._critical_ms[s]):
+            durations = sorted(span.duration_ms for span in self._by_service[service])
+            per_service[service] = {
+                "spans": len(durations),
+                "errors": self._errors[service],
+                "critical_path_ms": round(self._critical_ms[service]),
+                "critical_path_share": round(self._critical_ms[service] / critical_total, 3),
+                "self_time_ms": round(self._self_ms[service]),
+                "p50_ms": _percentile(durations, 0.5),
+                "p95_ms": _percentile(durations, 0.95),
+            }
+        out: dict[str, Any] = {
+            "traces": self.traces,
+            "trace_status": dict(self.trace_status),
+            "per_service": per_service,
+            "slowest_critical_paths": [
+                {
+                    "trace_id": trace.trace_id,
+                    "endpoint": trace.endpoint,
+                    "duration_ms": trace.duration_ms,
+                    "path": trace.path_summary(),
+                }
+                for _, _, trace in sorted(self._slowest_traces, reverse=True)
+            ],
+        }
+        for tag, value in flag_tags:
+            matches = self.find_by_tag(tag, value)
+            if matches:
+                matches.sort(key=lambda s: -s.duration_ms)
+                out.setdefault("flagged_spans", {})[f"{tag}={value}"] = {
+                    "count": len(matches),
+                    "examples": [span.brief() for span in matches[:_FLAGGED_IN_SUMMARY]],
+                }
+        return out
+
+
+# ── Span arithmetic ──────────────────────────────────────────────────────────
+
+
+def _covered(parent: Span, children: list[Span]) -> float:
+    """Milliseconds of `parent` covered by at least one child (overlaps counted once)."""
+    covered = 0.0
+    cursor = parent.start_ms
+    for child in sorted(children, key=lambda s: s.start_ms):
+        start = max(child.start_ms, cursor)
+        end = min(child.end_ms, parent.end_ms)
+        if end > start:
+            covered += end - start
+            cursor = end
+    return covered
+
+
+def _critical_segments(span: Span, end: float) -> list[tuple[Span, float]]:
+    """Walk back from `end`: the last-finishing child owns the time it covers,
+    the span itself owns the gaps. Returns (span, ms) segments, latest first."""
+    segments: list[tuple[Span, float]] = []
+    cursor = min(end, span.end_ms)
+    for child in sorted(span.children, key=lambda s: s.end_ms, reverse=True):
+        if child.start_ms >= cursor or cursor <= span.start_ms:
+            continue
+        child_end = min(child.end_ms, cursor)
+        if cursor > child_end:
+            segments.append((span, cursor - child_end))
+        segments.extend(_critical_segments(child, child_end))
+        cursor = max(child.start_ms, span.start_ms)
+    if cursor > span.start_ms:
+        segments.append((span, cursor - span.start_ms))
+    return segments
+
+
+def _merge(segments: list[tuple[Span, float]]) -> list[tuple[Span, float]]:
+    """Oldest first, with a span's separate gaps summed into one entry."""
+    totals: dict[int, float] = {}
+    order: list[Span] = []
+    for span, ms in reversed(segments):
+        if id(span) not in totals:
+            order.append(span)
+            totals[id(span)] = 0.0
+        totals[id(span)] += ms
+    return [(span, totals[id(span)]) for span in order]
+
+
+def _keep_top(
+    heap: list[tuple[float, int, Any]], key: float, seq: int, item: Any, size: int
+) -> None:
+    if len(heap) < size:
+        heapq.heappush(heap, (key, seq, item))
+    elif key > heap[0][0]:
+        heapq.heapreplace(heap, (key, seq, item))
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
@@ -0,0 +1,123 @@
+"""Token, latency and cost accounting for LLM calls.
+
+Every LLM round-trip produces one usage record (see utils/llm_client.py):
+agent, model, input/output tokens, cache write/read tokens, latency, retries
+and cost. The orchestrator attaches an incident's records to its
+IncidentContext; summarize() rolls records up per agent, and process_usage
+keeps running per-agent totals over the lifetime of the process.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Iterable
+
+# USD per million tokens: (input, output, cache write, cache read)
+PRICING: dict[str, tuple[float, float, float, float]] = {
+    "claude-3-5-sonnet-20241022": (3.00, 15.00, 3.75, 0.30),
+    "claude-3-5-haiku-20241022": (0.80, 4.00, 1.00, 0.08),
+}
+
+_SUMMED = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+    "retries",
+    "latency_s",
+    "cost_usd",
+)
+
+
+def cost_usd(
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    cache_creation_input_tokens: int = 0,
+    cache_read_input_tokens: int = 0,
+) -> float:
+    """List-price cost of one call; 0.0 for models without a price (e.g. dry runs)."""
+    price = PRICING.get(model)
+    if price is None:
+        return 0.0
+    per_input, per_output, per_write, per_read = price
+    return round(
+        (
+            input_tokens * per_input
+            + output_tokens * per_output
+            + cache_creation_input_tokens * per_write
+            + cache_read_input_tokens * per_read
+        )
+        / 1_000_000,
+        6,
+    )
+
+
+def summarize(records: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """Roll usage records up into a total and one entry per agent."""
+    per_agent: dict[str, dict[str, Any]] = {}
+    for record in records:
+        _accumulate(per_agent, record)
+    return _rollup(per_agent)
+
+
+def _accumulate(per_agent: dict[str, dict[str, Any]], record: dict[str, Any]) -> None:
+    entry = per_agent.get(record["agent"])
+    if entry is None:
+        entry = per_agent[record["agent"]] = dict.fromkeys(("calls", *_SUMMED), 0)
+    entry["calls"] += 1
+    for key in _SUMMED:
+        entry[key] += record.get(key, 0)
+
+
+def _rollup(per_agent: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    """Total plus rounded copies of the per-agent entries."""
+    total = dict.fromkeys(("calls", *_SUMMED), 0)
+    rounded = {}
+    for agent, entry in sorted(per_agent.items()):
+        for key, value in entry.items():
+            total[key] += value
+        rounded[agent] = dict(entry)
+    for entry in (total, *rounded.values()):
+        entry["latency_s"] = round(entry["latency_s"], 3)
+        entry["cost_usd"] = round(entry["cost_usd"], 6)
+    return {"total": total, "per_agent": rounded}
+
+
+class UsageLedger:
+    """Running per-agent usage totals across incidents.
+
+    Records are folded into the totals as they are added, not kept, so the
+    ledger's size and summary() cost do not grow with the calls it has seen.
+    Incidents are counted once each; a re-run of one of the last
+    `recent_incidents` incidents is not counted again.
+
+    Usage:
+        ledger = UsageLedger()
+        ledger.add(ctx.alert.incident_id, ctx.llm_usage)
+        ledger.summary()   # {"incidents": 1, "total": {...}, "per_agent": {...}}
+    """
+
+    def __init__(self, recent_incidents: int = 1024) -> None:
+        self.incidents = 0
+        self.recent_incidents = recent_incidents
+        self._recent: OrderedDict[str, None] = OrderedDict()
+        self._per_agent: dict[str, dict[str, Any]] = {}
+
+    def add(self, incident_id: str, records: Iterable[dict[str, Any]]) -> None:
+        if incident_id in self._recent:
+            self._recent.move_to_end(incident_id)
+        else:
+            self.incidents += 1
+            self._recent[incident_id] = None
+            if len(self._recent) > self.recent_incidents:
+                self._recent.popitem(last=False)
+        for record in records:
+            _accumulate(self._per_agent, record)
+
+    def summary(self) -> dict[str, Any]:
+        return {"incidents": self.incidents, **_rollup(self._per_agent)}
+
+
+# Every incident handled by this process, whichever orchestrator ran it
+process_usage = UsageLedger()